@@ -0,0 +1,367 @@
+# Modo ASGI: as rotas quentes de swipe (/dev/match, /company/match, /dev/skip/<id>,
+# /company/skip/<id>) rodam como corrotinas sobre SQLAlchemy assíncrono (aiosqlite/asyncpg),
+# então uma requisição esperando o banco não prende uma thread. Os streams de notificação
+# (/dev/notifications, /company/notifications) também: milhares de conexões ociosas custam
+# uma Subscription cada, sem thread. O resto do app continua
+# sendo o Flask (WSGI), servido pelo adaptador do asgiref. Formulários, templates, sessão
+# e flash são os mesmos: cada requisição assíncrona roda dentro de um request context do Flask.
+# Uso: DATABASE_URL=sqlite:////caminho/devs.db uvicorn asgi:application --workers 4
+import asyncio
+import io
+import json
+import sys
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import flash, redirect, render_template, request, session, url_for
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.exceptions import HTTPException
+
+import main
+from main import db, deck_cache, insert_ignore_statement, Company, CompanyLikeDev, CompanySkipDev, \
+    Developer, DevLikeCompany, DevSkipCompany, Match
+from notifications import NotificationsBusy, sse_stream_async
+
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+
+def async_url(url):
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f'Sem driver assíncrono para {backend}.')
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+app = main.create_app()
+# Mesmo banco do app (o Flask-SQLAlchemy já resolveu o caminho relativo do SQLite)
+with app.app_context():
+    sync_url = db.engine.url
+async_engine = create_async_engine(async_url(sync_url), **main.engine_options(str(sync_url)))
+main.configure_sqlite(app, async_engine.sync_engine)
+app.extensions['metrics'].instrument_engine(async_engine.sync_engine)
+async_session = async_sessionmaker(async_engine, expire_on_commit=False)
+
+# Escritas (equivalentes a record_swipe / like_and_match, numa transação por requisição)
+
+async def record_swipe(adb, model, **values):
+    result = await adb.execute(insert_ignore_statement(model).values(**values))
+    await adb.commit()
+    return result.rowcount > 0
+
+
+async def like_and_match(adb, kind, owner_id, target_id):
+    if kind == 'dev':
+        dev_id, company_id = owner_id, target_id
+        own_like, other_like = DevLikeCompany, CompanyLikeDev
+    else:
+        dev_id, company_id = target_id, owner_id
+        own_like, other_like = CompanyLikeDev, DevLikeCompany
+
+    if async_engine.dialect.name == 'postgresql':
+        await adb.execute(db.text('SELECT pg_advisory_xact_lock(:dev_id, :company_id)'),
+                          {'dev_id': dev_id, 'company_id': company_id})
+    result = await adb.execute(insert_ignore_statement(own_like).values(dev_id=dev_id, company_id=company_id))
+    created = result.rowcount > 0
+    reciprocal = (await adb.execute(
+        db.select(other_like.id).filter_by(dev_id=dev_id, company_id=company_id).limit(1))).first()
+    matched = False
+    if reciprocal is not None:
+        result = await adb.execute(insert_ignore_statement(Match).values(dev_id=dev_id, company_id=company_id))
+        matched = result.rowcount > 0
+    await adb.commit()
+    return created, matched
+
+
+async def publish_match(developer, company):
+    # O barramento SQLite grava em disco: fora do loop
+    await asyncio.to_thread(main.publish_match, developer, company)
+
+# Baralho: o topo normalmente já está na memória; só o reabastecimento síncrono vai para uma thread
+
+def peek_in_app(deck):
+    with app.app_context():
+        return deck.peek()
+
+
+async def peek(deck):
+    with deck.cond:
+        if deck.ids and not deck.refilling:
+            return deck.ids[0]
+    return await asyncio.to_thread(peek_in_app, deck)
+
+
+async def current_from_deck(adb, deck, model):
+    # Como main.current_from_deck: descarta ids removidos e os já avaliados em outro worker
+    while True:
+        candidate_id = await peek(deck)
+        if candidate_id is None:
+            return None
+        candidate = await adb.get(model, candidate_id)
+        swiped = await adb.scalar(main.already_swiped_statement(deck.kind, deck.owner_id, candidate_id))
+        if candidate is not None and not swiped:
+            return candidate
+        deck.discard(candidate_id)
+
+# Rotas (mesmo fluxo, mensagens e templates das versões síncronas em main.py)
+
+async def dev_skip(adb, company_id):
+    if 'developer_id' not in session:
+        flash('Por favor, faça login primeiro.', 'warning')
+        return redirect(url_for('main.dev_login'))
+
+    dev_id = session['developer_id']
+    deck = deck_cache.get('dev', dev_id)
+    await record_swipe(adb, DevSkipCompany, dev_id=dev_id, company_id=company_id)
+    deck.discard(company_id)
+
+    next_empresa = await current_from_deck(adb, deck, Company)
+    if next_empresa:
+        return render_template("dev_match.html", company=next_empresa)
+    flash('Nenhuma nova empresa disponível no momento.', 'info')
+    return redirect(url_for('main.dev_profile'))
+
+
+async def company_skip(adb, dev_id):
+    if 'company_id' not in session:
+        flash('Por favor, faça login primeiro.', 'warning')
+        return redirect(url_for('main.company_login'))
+
+    company_id = session['company_id']
+    deck = deck_cache.get('company', company_id)
+    await record_swipe(adb, CompanySkipDev, company_id=company_id, dev_id=dev_id)
+    deck.discard(dev_id)
+
+    next_dev = await current_from_deck(adb, deck, Developer)
+    if next_dev:
+        return render_template("company_match.html", dev=next_dev)
+    flash('Nenhum novo desenvolvedor disponível no momento.', 'info')
+    return redirect(url_for('main.company_profile'))
+
+
+async def company_match(adb):
+    if 'company_id' not in session:
+        flash('Por favor, faça login primeiro.', 'warning')
+        return redirect(url_for('main.company_login'))
+
+    company_id = session['company_id']
+    deck = deck_cache.get('company', company_id)
+    next_dev = await current_from_deck(adb, deck, Developer)
+
+    if request.method == "POST" and next_dev:
+        if 'skip' in request.form:
+            await record_swipe(adb, CompanySkipDev, company_id=company_id, dev_id=next_dev.id)
+            deck.discard(next_dev.id)
+            next_dev = await current_from_deck(adb, deck, Developer)
+            return render_template("company_match.html", dev=next_dev)
+
+        elif 'match' in request.form:
+            created, matched = await like_and_match(adb, 'company', company_id, next_dev.id)
+            deck.discard(next_dev.id)
+            if matched:
+                await publish_match(next_dev, await adb.get(Company, company_id))
+                flash(f'Match com o desenvolvedor {next_dev.name} realizado com sucesso!', 'success')
+            elif created:
+                flash(f'Você curtiu o desenvolvedor {next_dev.name}. O match acontece quando a curtida for recíproca.', 'success')
+            else:
+                flash(f'Você já curtiu o desenvolvedor {next_dev.name}.', 'info')
+
+            next_dev = await current_from_deck(adb, deck, Developer)
+            if next_dev:
+                return render_template("company_match.html", dev=next_dev)
+            flash('Nenhum novo desenvolvedor disponível no momento.', 'info')
+            return redirect(url_for('main.company_profile'))
+
+    return render_template("company_match.html", dev=next_dev)
+
+
+async def dev_match(adb):
+    if 'developer_id' not in session:
+        flash('Por favor, faça login primeiro.', 'warning')
+        return redirect(url_for('main.dev_login'))
+
+    dev_id = session['developer_id']
+    deck = deck_cache.get('dev', dev_id)
+    next_company = await current_from_deck(adb, deck, Company)
+    if not next_company:
+        flash('Nenhuma nova empresa disponível ou houve um erro na busca.', 'warning')
+        return redirect(url_for('main.dev_profile'))
+
+    if request.method == "POST":
+        if 'skip' in request.form:
+            return await dev_skip(adb, next_company.id)
+        elif 'match' in request.form:
+            created, matched = await like_and_match(adb, 'dev', dev_id, next_company.id)
+            deck.discard(next_company.id)
+            if matched:
+                await publish_match(await adb.get(Developer, dev_id), next_company)
+                flash(f'Match com a empresa {next_company.name} realizado com sucesso!', 'success')
+            elif created:
+                flash(f'Você curtiu a empresa {next_company.name}. O match acontece quando a curtida for recíproca.', 'success')
+            else:
+                flash(f'Você já curtiu a empresa {next_company.name}.', 'info')
+            next_company = await current_from_deck(adb, deck, Company)
+
+    return render_template("dev_match.html", company=next_company)
+
+
+ASYNC_VIEWS = {
+    'main.dev_match': dev_match,
+    'main.company_match': company_match,
+    'main.dev_skip': dev_skip,
+    'main.company_skip': company_skip,
+}
+
+SESSION_KEYS = {'main.dev_notifications': ('dev', 'developer_id'),
+                'main.company_notifications': ('company', 'company_id')}
+
+# Adaptação ASGI
+
+def match_endpoint(scope):
+    adapter = app.url_map.bind('localhost', script_name=scope.get('root_path') or None,
+                               url_scheme=scope.get('scheme', 'http'))
+    try:
+        endpoint, _ = adapter.match(scope['path'], method=scope['method'])
+    except HTTPException:
+        return None
+    return endpoint
+
+
+def build_environ(scope, body):
+    # Environ WSGI da requisição, para o request context do Flask (sessão, form, url_for)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('ascii'),
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    server = scope.get('server') or ('localhost', 80)
+    environ['SERVER_NAME'], environ['SERVER_PORT'] = server[0], str(server[1])
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', []):
+        name, value = name.decode('latin-1'), value.decode('latin-1')
+        if name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        elif name == 'content-type':
+            key = 'CONTENT_TYPE'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        environ[key] = environ[key] + ',' + value if key in environ else value
+    return environ
+
+
+async def read_body(receive):
+    body, more = b'', True
+    while more:
+        message = await receive()
+        body += message.get('body', b'')
+        more = message.get('more_body', False)
+    return body
+
+
+async def serve_async(view, scope, receive, send):
+    # O mesmo ciclo do Flask (before_request, view, after_request/sessão, teardown), com a view
+    # aguardando o banco. O request context usa contextvars, isolado por task do asyncio.
+    environ = build_environ(scope, await read_body(receive))
+    with app.request_context(environ):
+        try:
+            try:
+                rv = app.preprocess_request()
+                if rv is None:
+                    async with async_session() as adb:
+                        rv = await view(adb, **request.view_args)
+            except Exception as e:
+                rv = app.handle_user_exception(e)
+            response = app.finalize_request(rv)
+        except Exception as e:
+            response = app.finalize_request(app.handle_exception(e), from_error_handler=True)
+
+    headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in response.headers.items()]
+    await send({'type': 'http.response.start', 'status': response.status_code, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': response.get_data()})
+
+
+async def send_json(send, status, payload, headers=()):
+    body = json.dumps(payload).encode()
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json'), *headers]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def serve_notifications(kind, session_key, scope, receive, send):
+    config = app.config
+    with app.request_context(build_environ(scope, b'')):
+        owner_id = session.get(session_key)
+        if owner_id is None:
+            return await send_json(send, 401, {'error': 'Por favor, faça login primeiro.'})
+        try:
+            subscription = main.get_notification_bus().subscribe(f'{kind}:{owner_id}', config['NOTIFY_MAX_PENDING'])
+        except NotificationsBusy as e:
+            return await send_json(send, 503, {'error': str(e)}, [(b'retry-after', b'30')])
+
+    disconnected = asyncio.ensure_future(wait_disconnect(receive))
+    stream = sse_stream_async(subscription, config['NOTIFY_HEARTBEAT'], config['NOTIFY_RETRY_MS'])
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'), (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no')]})
+        async for chunk in stream:
+            if disconnected.done():
+                break
+            # send espera o cliente ler (controle de fluxo do servidor): um cliente lento acumula
+            # eventos na Subscription até o limite e então recebe "resync"
+            await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+        else:
+            await send({'type': 'http.response.body', 'body': b''})
+    except OSError:
+        pass
+    finally:
+        disconnected.cancel()
+        await stream.aclose()
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await async_engine.dispose()
+            bus = app.extensions.get('notification_bus')
+            if bus is not None:
+                bus.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+wsgi_application = WsgiToAsgi(app)
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] == 'http':
+        endpoint = match_endpoint(scope)
+        if endpoint in SESSION_KEYS:
+            return await serve_notifications(*SESSION_KEYS[endpoint], scope, receive, send)
+        view = ASYNC_VIEWS.get(endpoint)
+        if view is not None:
+            return await serve_async(view, scope, receive, send)
+    return await wsgi_application(scope, receive, send)
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run('asgi:application', port=6001)
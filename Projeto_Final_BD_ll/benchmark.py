@@ -0,0 +1,1393 @@
+# Benchmarks do TinderJobs
+# Uso: python benchmark.py candidates [--max-history 1000000]
+# Ponta a ponta (banco descartável, selecionado por DATABASE_URL):
+#   DATABASE_URL=sqlite:////tmp/bench.db python benchmark.py generate
+#   DATABASE_URL=sqlite:////tmp/bench.db python benchmark.py e2e --output resultado.json
+import argparse
+import asyncio
+import csv
+import gzip
+import json
+import os
+import random
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+import numpy as np
+from werkzeug.security import generate_password_hash
+
+import main
+from bulk import read_records, write_records
+from main import db, Developer, Company, CompanySkipDev, DevSkipCompany, DevLikeCompany, CompanyLikeDev, Match
+from ranking import SkillIndex
+from seen import Bitmap
+
+app = main.create_app()  # app do DATABASE_URL; os benchmarks com banco próprio usam make_bench_app
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CHUNK = 50000
+
+SKILLS = [
+    'python', 'java', 'javascript', 'typescript', 'go', 'rust', 'c++', 'c#', 'php', 'ruby',
+    'sql', 'postgres', 'mysql', 'sqlite', 'mongodb', 'redis', 'flask', 'django', 'fastapi',
+    'react', 'vue.js', 'angular', 'node.js', 'spring', 'docker', 'kubernetes', 'aws', 'azure',
+    'linux', 'git', 'pandas', 'numpy', 'spark', 'kafka', 'graphql', 'html', 'css', 'figma',
+]
+FILLER = ['experiência', 'com', 'em', 'de', 'projetos', 'anos', 'sólida', 'conhecimento', 'equipe', 'ágil']
+
+
+def skill_text(rng, words=12):
+    # Habilidades seguem uma distribuição de cauda longa (poucas muito comuns)
+    skills = rng.choices(SKILLS, weights=[1 / (i + 1) for i in range(len(SKILLS))], k=words // 2)
+    return ' '.join(skills + rng.choices(FILLER, k=words - len(skills)))
+
+
+def make_bench_app(uri='sqlite://', **config):
+    # App separado (banco em memória por padrão) para não tocar no instance/devs.db
+    return main.create_app({'SQLALCHEMY_DATABASE_URI': uri, **config})
+
+
+def bulk_insert(model, rows):
+    for start in range(0, len(rows), CHUNK):
+        db.session.execute(db.insert(model), rows[start:start + CHUNK])
+    db.session.commit()
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def bench_candidates(args):
+    # Latência por swipe enquanto o histórico de skips cresce de 10 até --max-history linhas,
+    # pelo caminho das rotas (current_from_deck sobre o baralho de cada lado): primeira carga
+    # de um baralho novo e swipes seguintes, com cada candidato conferido no banco
+    sizes = []
+    size = 10
+    while size <= args.max_history:
+        sizes.append(size)
+        size *= 10
+
+    with make_bench_app().app_context():
+        db.create_all()
+        total = args.max_history + args.unseen
+        bulk_insert(Developer, [
+            {'id': i, 'name': f'dev{i}', 'email': f'dev{i}@bench', 'password': 'x',
+             'cel': '0', 'habilidades': 'python'}
+            for i in range(1, total + 1)
+        ])
+        bulk_insert(Company, [
+            {'id': i, 'name': f'emp{i}', 'email': f'emp{i}@bench', 'password': 'x',
+             'telefone': '0', 'descricao': 'python'}
+            for i in range(1, total + 1)
+        ])
+
+        print(f"{'historico':>10} {'empresa 1ª carga ms':>20} {'swipe p50 ms':>13} {'swipe p99 ms':>13} "
+              f"{'dev 1ª carga ms':>16} {'swipe p50 ms':>13} {'swipe p99 ms':>13}")
+        done = 0
+        for size in sizes:
+            bulk_insert(CompanySkipDev, [
+                {'company_id': 1, 'dev_id': i} for i in range(done + 1, size + 1)
+            ])
+            bulk_insert(DevSkipCompany, [
+                {'dev_id': 1, 'company_id': i} for i in range(done + 1, size + 1)
+            ])
+            done = size
+
+            row = []
+            for kind, model in (('company', Developer), ('dev', Company)):
+                # Baralho novo do usuário 1 (histórico inteiro pelo bitmap) e swipes sobre ele
+                first_load, _ = timed(lambda: main.current_from_deck(main.SwipeDeck(kind, 1), model), 5)
+                deck = main.SwipeDeck(kind, 1)
+                main.current_from_deck(deck, model)
+
+                def swipe():
+                    deck.discard(deck.peek())
+                    main.current_from_deck(deck, model)
+                row.extend([first_load, *timed(swipe, min(args.repeat, args.unseen - 1))])
+            print(f'{size:>10} {row[0]:>20.3f} {row[1]:>13.3f} {row[2]:>13.3f} '
+                  f'{row[3]:>16.3f} {row[4]:>13.3f} {row[5]:>13.3f}')
+
+
+def bench_seen(args):
+    # Bitmap de "já avaliados" por tamanho de histórico: tempo de montagem a partir das
+    # tabelas, memória, blob persistido e custo da exclusão como a recarga do baralho a faz
+    # (contains sobre todos os ids do índice, em SkillIndex.top, e a janela conferida no banco)
+    with make_bench_app().app_context():
+        db.create_all()
+        bulk_insert(Developer, [
+            {'id': i, 'name': f'dev{i}', 'email': f'dev{i}@bench', 'password': 'x',
+             'cel': '0', 'habilidades': 'python'}
+            for i in range(1, args.developers + 1)
+        ])
+        bulk_insert(Company, [{'id': 1, 'name': 'emp', 'email': 'emp@bench', 'password': 'x',
+                               'telefone': '0', 'descricao': 'python'}])
+        all_ids = np.arange(1, args.developers + 1)
+        np_rng = np.random.default_rng(5)
+
+        print(f"{'historico':>10} {'padrão':>10} {'montagem ms':>12} {'bitmap KB':>10} {'blob KB':>8} "
+              f"{'exclusão ms':>12} {'janela+banco ms':>16}")
+        size = 10
+        while size <= min(args.max_history, args.developers):
+            for pattern in ('sequencial', 'aleatório'):
+                db.session.query(CompanySkipDev).delete()
+                if pattern == 'sequencial':
+                    dev_ids = np.arange(1, size + 1)
+                else:
+                    dev_ids = np_rng.choice(args.developers, size, replace=False) + 1
+                insert_columns(CompanySkipDev, ('company_id', 'dev_id'), (np.ones(size, dtype=np.int64), dev_ids))
+
+                build, _ = timed(lambda: main.load_seen('company', 1), 5)
+                seen = main.load_seen('company', 1)
+                diff, _ = timed(lambda: seen.contains(all_ids), args.repeat)
+                candidates = all_ids[~seen.contains(all_ids)][:args.window].tolist()
+                window, _ = timed(lambda: main.unswiped_ids('company', 1, candidates), args.repeat)
+                print(f'{size:>10} {pattern:>10} {build:>12.2f} {seen.nbytes / 1024:>10.1f} '
+                      f'{len(seen.to_bytes()) / 1024:>8.2f} {diff:>12.3f} {window:>16.3f}')
+            size *= 10
+
+
+def bench_ranking(args):
+    # Pontua --developers candidatos contra a descrição de uma empresa (um produto matriz-vetor)
+    rng = random.Random(42)
+    index = SkillIndex()
+    start = time.perf_counter()
+    index.load((i, skill_text(rng)) for i in range(1, args.developers + 1))
+    index.score('python', [1])  # monta a matriz
+    print(f'carga de {args.developers} devs: {(time.perf_counter() - start) * 1000:.0f} ms')
+
+    candidate_ids = list(range(1, args.developers + 1))
+    query = 'Procuramos dev python com flask, postgres e docker'
+    p50, p99 = timed(lambda: index.score(query, candidate_ids), args.repeat)
+    print(f'score de {len(candidate_ids)} candidatos: p50 {p50:.2f} ms, p99 {p99:.2f} ms')
+    p50, p99 = timed(lambda: index.rank(query, candidate_ids), args.repeat)
+    print(f'rank de {len(candidate_ids)} candidatos: p50 {p50:.2f} ms, p99 {p99:.2f} ms')
+
+    # Recarga do baralho: os DECK_SIZE melhores entre todos, sem os 10% já avaliados
+    seen = Bitmap()
+    seen.add(range(1, args.developers + 1, 10))
+    deck_size = app.config['DECK_SIZE']
+    p50, p99 = timed(lambda: index.top(query, deck_size, exclude=seen), args.repeat)
+    print(f'top {deck_size} de {args.developers} (recarga do baralho): p50 {p50:.2f} ms, p99 {p99:.2f} ms')
+
+    # Edição incremental de um perfil seguida de novo score
+    def edit_and_score():
+        index.update(rng.randint(1, args.developers), skill_text(rng))
+        index.score(query, candidate_ids)
+    p50, p99 = timed(edit_and_score, args.repeat)
+    print(f'edição + score: p50 {p50:.2f} ms, p99 {p99:.2f} ms')
+
+
+def bench_search(args):
+    # Latência de search_developers (índice invertido + exclusão no banco) com --developers devs
+    rng = random.Random(7)
+    queries = [
+        'python AND postgres', 'java OR kotlin', 'react NOT angular', 'pyth*',
+        '(docker OR kubernetes) AND aws', 'rust', 'node.js AND mongodb', 'c++ OR c#',
+    ]
+    with make_bench_app().app_context():
+        db.create_all()
+        bulk_insert(Developer, [
+            {'id': i, 'name': f'dev{i}', 'email': f'dev{i}@bench', 'password': 'x',
+             'cel': '0', 'habilidades': skill_text(rng)}
+            for i in range(1, args.developers + 1)
+        ])
+        bulk_insert(Company, [{'id': 1, 'name': 'emp', 'email': 'emp@bench', 'password': 'x',
+                               'telefone': '0', 'descricao': 'python'}])
+        # A empresa já pulou 10% dos devs
+        bulk_insert(CompanySkipDev, [{'company_id': 1, 'dev_id': i} for i in range(1, args.developers + 1, 10)])
+
+        start = time.perf_counter()
+        main.get_skill_indexes()[0].search('python')
+        print(f'índice de {args.developers} devs: {(time.perf_counter() - start) * 1000:.0f} ms')
+
+        for query in queries:
+            samples = []
+            for _ in range(args.repeat):
+                after_id = rng.randint(0, args.developers)
+                start = time.perf_counter()
+                main.search_developers(1, query, after_id=after_id)
+                samples.append((time.perf_counter() - start) * 1000)
+            samples.sort()
+            p95 = samples[int(len(samples) * 0.95) - 1]
+            print(f'{query:<32} p50 {statistics.median(samples):6.2f} ms  p95 {p95:6.2f} ms')
+
+
+def bench_swipes(args):
+    # Swipes/s com --clients threads gravando ao mesmo tempo num SQLite em arquivo:
+    # um commit por swipe, group commit (SwipeWriter) e API em lote
+    modes = [
+        ('commit por swipe', {'SWIPE_COMMIT_WINDOW': 0}, 1),
+        ('group commit', {'SWIPE_COMMIT_WINDOW': args.window}, 1),
+        (f'API em lote ({args.batch}/chamada)', {'SWIPE_COMMIT_WINDOW': 0}, args.batch),
+    ]
+    per_client = args.swipes // args.clients
+    for name, config, batch in modes:
+        with tempfile.TemporaryDirectory() as tmp:
+            bench_app = make_bench_app('sqlite:///' + os.path.join(tmp, 'bench.db'), **config)
+            with bench_app.app_context():
+                db.create_all()
+                bulk_insert(Company, [
+                    {'id': i, 'name': f'emp{i}', 'email': f'emp{i}@bench', 'password': 'x',
+                     'telefone': '0', 'descricao': 'python'}
+                    for i in range(1, args.clients + 1)
+                ])
+
+            errors = []
+
+            def client(company_id):
+                with bench_app.app_context():
+                    for start in range(1, per_client + 1, batch):
+                        try:
+                            if batch == 1:
+                                main.record_swipe(CompanySkipDev, company_id=company_id, dev_id=start)
+                            else:
+                                swipes = [{'action': 'skip', 'target_id': i}
+                                          for i in range(start, min(start + batch, per_client + 1))]
+                                main.apply_swipe_batch('company', company_id, {'swipes': swipes})
+                        except Exception as e:
+                            db.session.rollback()
+                            errors.append(e)
+
+            threads = [threading.Thread(target=client, args=(i,)) for i in range(1, args.clients + 1)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+            with bench_app.app_context():
+                written = db.session.query(CompanySkipDev).count()
+                db.engine.dispose()
+            print(f'{name:<28} {written / elapsed:10.0f} swipes/s  ({written} gravados, {len(errors)} erros)')
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[max(int(len(samples) * fraction) - 1, 0)] if samples else 0.0
+
+
+def bench_load(args):
+    # Carga mista leitura/escrita por --duration segundos em cada configuração de banco.
+    # Leitura = janela do baralho (anti-join) + carregar o candidato; escrita = um skip.
+    configs = [
+        ('sqlite padrão', None, {'SQLITE_PRAGMAS': {}}),
+        ('sqlite WAL', None, {}),
+    ]
+    if args.postgres_url:
+        configs.append(('postgresql', args.postgres_url, {}))
+    mixes = [('leitura 90%', 0.9), ('escrita 90%', 0.1)]
+
+    for config_name, uri, config in configs:
+        for mix_name, read_ratio in mixes:
+            with tempfile.TemporaryDirectory() as tmp:
+                bench_app = make_bench_app(uri or 'sqlite:///' + os.path.join(tmp, 'load.db'),
+                                           SWIPE_COMMIT_WINDOW=0, **config)
+                with bench_app.app_context():
+                    db.drop_all()  # o banco do --postgres-url precisa ser descartável
+                    db.create_all()
+                    rng = random.Random(3)
+                    bulk_insert(Developer, [
+                        {'id': i, 'name': f'dev{i}', 'email': f'dev{i}@bench', 'password': 'x',
+                         'cel': '0', 'habilidades': skill_text(rng)}
+                        for i in range(1, args.developers + 1)
+                    ])
+                    bulk_insert(Company, [
+                        {'id': i, 'name': f'emp{i}', 'email': f'emp{i}@bench', 'password': 'x',
+                         'telefone': '0', 'descricao': 'python'}
+                        for i in range(1, args.clients + 1)
+                    ])
+
+                reads, writes, errors = [], [], []
+                deadline = time.perf_counter() + args.duration
+
+                def client(company_id):
+                    rng = random.Random(company_id)
+                    with bench_app.app_context():
+                        while time.perf_counter() < deadline:
+                            start = time.perf_counter()
+                            try:
+                                if rng.random() < read_ratio:
+                                    # Leitura como em /company/match: o topo do baralho, conferido no banco
+                                    main.current_from_deck(main.deck_cache.get('company', company_id), Developer)
+                                    db.session.rollback()
+                                    reads.append((time.perf_counter() - start) * 1000)
+                                else:
+                                    main.record_swipe(CompanySkipDev, company_id=company_id,
+                                                      dev_id=rng.randint(1, args.developers))
+                                    writes.append((time.perf_counter() - start) * 1000)
+                            except Exception as e:
+                                db.session.rollback()
+                                errors.append(e)
+
+                threads = [threading.Thread(target=client, args=(i,)) for i in range(1, args.clients + 1)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                with bench_app.app_context():
+                    if uri:
+                        db.drop_all()
+                    db.engine.dispose()
+
+                total = len(reads) + len(writes)
+                print(f'{config_name:<14} {mix_name:<12} {total / args.duration:8.0f} ops/s  '
+                      f'leitura p99 {percentile(reads, 0.99):7.2f} ms  '
+                      f'escrita p99 {percentile(writes, 0.99):7.2f} ms  {len(errors)} erros')
+
+
+def bench_logins(args):
+    # p99 dos swipes (leitura do baralho + skip) com e sem uma onda de logins concorrentes:
+    # hash na thread da requisição (PASSWORD_WORKERS=0) vs. pool de processos limitado
+    modes = [
+        ('sem logins', 0, 0),
+        ('logins, hash na thread', 0, args.login_clients),
+        (f'logins, pool de {args.workers}', args.workers, args.login_clients),
+    ]
+    stored = generate_password_hash('bench', app.config['PASSWORD_HASH_METHOD'])
+    for name, workers, login_clients in modes:
+        with tempfile.TemporaryDirectory() as tmp:
+            bench_app = make_bench_app('sqlite:///' + os.path.join(tmp, 'logins.db'),
+                                       SWIPE_COMMIT_WINDOW=0, PASSWORD_WORKERS=workers)
+            with bench_app.app_context():
+                db.create_all()
+                bulk_insert(Developer, [
+                    {'id': i, 'name': f'dev{i}', 'email': f'dev{i}@bench', 'password': stored,
+                     'cel': '0', 'habilidades': 'python'}
+                    for i in range(1, args.developers + 1)
+                ])
+                bulk_insert(Company, [
+                    {'id': i, 'name': f'emp{i}', 'email': f'emp{i}@bench', 'password': stored,
+                     'telefone': '0', 'descricao': 'python'}
+                    for i in range(1, args.swipe_clients + 1)
+                ])
+                main.get_password_pool()  # cria o pool fora da medição
+
+            swipes, logins, errors = [], [], []
+            deadline = time.perf_counter() + args.duration
+
+            def swipe_client(company_id):
+                rng = random.Random(company_id)
+                with bench_app.app_context():
+                    while time.perf_counter() < deadline:
+                        start = time.perf_counter()
+                        try:
+                            # Um skip como em /company/match: topo do baralho, gravação e descarte
+                            deck = main.deck_cache.get('company', company_id)
+                            dev = main.current_from_deck(deck, Developer)
+                            dev_id = dev.id if dev else rng.randint(1, args.developers)
+                            main.record_swipe(CompanySkipDev, company_id=company_id, dev_id=dev_id)
+                            deck.discard(dev_id)
+                            swipes.append((time.perf_counter() - start) * 1000)
+                        except Exception as e:
+                            db.session.rollback()
+                            errors.append(e)
+
+            def login_client(number):
+                rng = random.Random(-number)
+                with bench_app.app_context():
+                    while time.perf_counter() < deadline:
+                        start = time.perf_counter()
+                        try:
+                            developer = db.session.get(Developer, rng.randint(1, args.developers))
+                            main.check_login(developer, 'bench')
+                            db.session.rollback()
+                            logins.append((time.perf_counter() - start) * 1000)
+                        except Exception as e:
+                            db.session.rollback()
+                            errors.append(e)
+
+            threads = [threading.Thread(target=swipe_client, args=(i,)) for i in range(1, args.swipe_clients + 1)]
+            threads += [threading.Thread(target=login_client, args=(i,)) for i in range(login_clients)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            with bench_app.app_context():
+                bench_app.extensions['password_pool'].shutdown()
+                db.engine.dispose()
+
+            print(f'{name:<24} swipes {len(swipes) / args.duration:7.0f}/s  p50 {percentile(swipes, 0.5):7.2f} ms  '
+                  f'p99 {percentile(swipes, 0.99):7.2f} ms   logins {len(logins) / args.duration:6.1f}/s  '
+                  f'p99 {percentile(logins, 0.99):8.1f} ms  {len(errors)} erros')
+
+
+def require_disposable_database():
+    # generate/e2e gravam no banco do app; sem DATABASE_URL seria o instance/devs.db versionado
+    if 'DATABASE_URL' not in os.environ:
+        sys.exit('Defina DATABASE_URL com um banco descartável (ex.: sqlite:////tmp/bench.db).')
+
+
+def insert_columns(model, columns, arrays):
+    # Insere colunas numpy em blocos de CHUNK linhas, sem montar todas as linhas de uma vez
+    for start in range(0, len(arrays[0]), CHUNK):
+        values = zip(*(array[start:start + CHUNK].tolist() for array in arrays))
+        db.session.execute(db.insert(model), [dict(zip(columns, row)) for row in values])
+    db.session.commit()
+
+
+def power_law_swipes(np_rng, owners, targets, mean, alpha):
+    # Histórico de swipes por usuário com cauda pesada (Pareto com média ~mean): a maioria
+    # avalia poucos perfis, alguns avaliam milhares. Alvos também seguem popularidade Zipf.
+    # Devolve pares únicos (dono, alvo), ids começando em 1.
+    scale = mean * (alpha - 1) / alpha
+    counts = np.minimum((np_rng.pareto(alpha, owners) + 1) * scale, targets).astype(np.int64)
+    popularity = 1 / np.arange(1, targets + 1) ** 0.8
+    popularity = popularity[np_rng.permutation(targets)]
+    chosen = np_rng.choice(targets, size=int(counts.sum()), p=popularity / popularity.sum())
+    keys = np.unique(np.repeat(np.arange(owners, dtype=np.int64), counts) * targets + chosen)
+    return keys // targets + 1, keys % targets + 1
+
+
+def bench_generate(args):
+    # Popula o banco de DATABASE_URL com dados sintéticos (apaga as tabelas antes)
+    require_disposable_database()
+    rng = random.Random(args.seed)
+    np_rng = np.random.default_rng(args.seed)
+    start = time.perf_counter()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        for first in range(1, args.developers + 1, CHUNK):
+            bulk_insert(Developer, [
+                {'id': i, 'name': f'dev{i}', 'email': f'dev{i}@tinderjobs.dev', 'password': args.password,
+                 'cel': '0', 'habilidades': skill_text(rng)}
+                for i in range(first, min(first + CHUNK, args.developers + 1))
+            ])
+        for first in range(1, args.companies + 1, CHUNK):
+            bulk_insert(Company, [
+                {'id': i, 'name': f'emp{i}', 'email': f'emp{i}@tinderjobs.dev', 'password': args.password,
+                 'telefone': '0', 'descricao': skill_text(rng, words=30)}
+                for i in range(first, min(first + CHUNK, args.companies + 1))
+            ])
+
+        # Cada swipe vira like com probabilidade --like-ratio; like recíproco vira Match
+        dev_ids, company_ids = power_law_swipes(np_rng, args.developers, args.companies, args.dev_swipes, args.alpha)
+        liked = np_rng.random(len(dev_ids)) < args.like_ratio
+        insert_columns(DevSkipCompany, ('dev_id', 'company_id'), (dev_ids[~liked], company_ids[~liked]))
+        insert_columns(DevLikeCompany, ('dev_id', 'company_id'), (dev_ids[liked], company_ids[liked]))
+        dev_likes = dev_ids[liked] * (args.companies + 1) + company_ids[liked]
+
+        # Empresas: histórico próprio + retribuição de parte dos likes recebidos (--reciprocity)
+        company_ids, dev_ids = power_law_swipes(np_rng, args.companies, args.developers, args.company_swipes, args.alpha)
+        liked = np_rng.random(len(dev_ids)) < args.like_ratio
+        keys = dev_ids * (args.companies + 1) + company_ids
+        returned = dev_likes[np_rng.random(len(dev_likes)) < args.reciprocity]
+        skipped = np.setdiff1d(keys[~liked], returned)
+        company_likes = np.union1d(keys[liked], returned)
+        insert_columns(CompanySkipDev, ('company_id', 'dev_id'), (skipped % (args.companies + 1), skipped // (args.companies + 1)))
+        insert_columns(CompanyLikeDev, ('company_id', 'dev_id'), (company_likes % (args.companies + 1), company_likes // (args.companies + 1)))
+
+        mutual = np.intersect1d(dev_likes, company_likes)
+        insert_columns(Match, ('dev_id', 'company_id'), (mutual // (args.companies + 1), mutual % (args.companies + 1)))
+
+        print(json.dumps({'rows': table_counts(), 'seconds': round(time.perf_counter() - start, 1)}, indent=2))
+
+
+def table_counts():
+    models = (Developer, Company, DevSkipCompany, CompanySkipDev, DevLikeCompany, CompanyLikeDev, Match)
+    return {model.__tablename__: db.session.query(db.func.count(model.id)).scalar() for model in models}
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / 1024 / (1024 if sys.platform == 'darwin' else 1), 1)  # macOS mede em bytes
+
+
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def serve_wsgi(port):
+    # Implantação WSGI com thread por conexão (keep-alive HTTP/1.1), como o app.run do main.py
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class Handler(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    make_server('127.0.0.1', port, app, threaded=True, request_handler=Handler).serve_forever()
+
+
+class HttpConnection:
+    # Cliente HTTP/1.1 mínimo sobre asyncio (keep-alive, cookies); basta para o benchmark
+    def __init__(self, port, cookies):
+        self.port = port
+        self.cookies = cookies
+        self.reader = self.writer = None
+
+    async def request(self, method, path, form=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection('127.0.0.1', self.port)
+        body = urlencode(form).encode() if form else b''
+        lines = [f'{method} {path} HTTP/1.1', f'Host: 127.0.0.1:{self.port}', f'Content-Length: {len(body)}',
+                 'Cookie: ' + '; '.join(f'{k}={v}' for k, v in self.cookies.items())]
+        if form:
+            lines.append('Content-Type: application/x-www-form-urlencoded')
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        length, close = 0, False
+        while True:
+            line = (await self.reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            name, value = name.lower(), value.strip()
+            if name == 'content-length':
+                length = int(value)
+            elif name == 'connection' and value.lower() == 'close':
+                close = True
+            elif name == 'set-cookie':
+                key, _, rest = value.partition('=')
+                self.cookies[key] = rest.split(';', 1)[0]
+        await self.reader.readexactly(length)
+        if close:
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+def process_status(pid, field):
+    # Soma de um campo de /proc/<pid>/status no processo e nos filhos diretos (workers do uvicorn)
+    total = 0
+    for candidate in [pid] + [int(p) for p in open(f'/proc/{pid}/task/{pid}/children').read().split()]:
+        try:
+            with open(f'/proc/{candidate}/status') as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith(field + ':'))
+        except OSError:
+            pass
+    return total
+
+
+def process_threads(pid):
+    return process_status(pid, 'Threads')
+
+
+async def drive_swipers(port, args, company_ids, pid):
+    # --clients conexões simultâneas, cada uma logada como uma empresa (cookie de sessão
+    # assinado aqui mesmo, sem passar pelo login), fazendo POST /company/match em loop
+    serializer = app.session_interface.get_signing_serializer(app)
+    cookie = app.config['SESSION_COOKIE_NAME']
+    latencies, errors, peak_threads = [], [], 0
+    deadline = time.perf_counter() + args.duration
+
+    async def swiper(company_id):
+        rng = random.Random(company_id)
+        connection = HttpConnection(port, {cookie: serializer.dumps({'company_id': company_id})})
+        try:
+            while time.perf_counter() < deadline:
+                action = 'match' if rng.random() < args.like_ratio else 'skip'
+                start = time.perf_counter()
+                try:
+                    status = await connection.request('POST', '/company/match', {action: ''})
+                except (OSError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+                    connection.close()
+                    errors.append(e)
+                    continue
+                if status >= 400:
+                    errors.append(status)
+                else:
+                    latencies.append((time.perf_counter() - start) * 1000)
+        finally:
+            connection.close()
+
+    async def sample_threads():
+        nonlocal peak_threads
+        while time.perf_counter() < deadline:
+            peak_threads = max(peak_threads, process_threads(pid))
+            await asyncio.sleep(0.2)
+
+    start = time.perf_counter()
+    await asyncio.gather(sample_threads(), *(swiper(i) for i in company_ids))
+    elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed, peak_threads
+
+
+async def scrape_peak_connections(port):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'GET /metrics HTTP/1.0\r\nHost: 127.0.0.1:{port}\r\n\r\n'.encode())
+    text = (await reader.read()).decode('utf-8', 'replace')
+    writer.close()
+    for line in text.splitlines():
+        if line.startswith('tinderjobs_db_connections_in_use_peak '):
+            return int(float(line.split()[1]))
+    return None
+
+
+def wait_for_port(port, process, timeout=60):
+    import socket
+    deadline = time.time() + timeout
+    while time.time() < deadline and process.poll() is None:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def error_summary(errors):
+    # "53× ConnectionResetError, 3× 500": exceção do lado do cliente ou status HTTP
+    counts = Counter(type(e).__name__ if isinstance(e, Exception) else str(e) for e in errors)
+    return ', '.join(f'{count}× {name}' for name, count in counts.most_common())
+
+
+def server_modes(args):
+    # (nome, comando, processos): WSGI com threads vs. ASGI pelo uvicorn
+    return [
+        ('WSGI com threads', [sys.executable, '-c', f'import benchmark; benchmark.serve_wsgi({args.port})'], 1),
+        (f'ASGI ({args.workers} workers)', [sys.executable, '-m', 'uvicorn', 'asgi:application', '--port', str(args.port),
+                                           '--workers', str(args.workers), '--log-level', 'warning',
+                                           '--limit-concurrency', str(args.clients * 2)], args.workers),
+    ]
+
+
+def bench_serving(args):
+    # WSGI com threads (um processo) vs. ASGI (uvicorn, --workers processos) com --clients
+    # swipers simultâneos contra o banco de DATABASE_URL (dados de `generate`)
+    require_disposable_database()
+    with app.app_context():
+        companies = db.session.query(db.func.count(Company.id)).scalar()
+    if companies < args.clients:
+        sys.exit(f'São precisas ao menos {args.clients} empresas: rode "python benchmark.py generate".')
+    here = os.path.dirname(os.path.abspath(__file__))
+    company_ids = list(range(1, args.clients + 1))
+    print(f"{'modo':<22} {'clientes':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>9} {'erros':>6} "
+          f"{'threads':>8} {'conexões/worker':>16} {'conexões banco':>15}")
+    for name, command, workers in server_modes(args):
+        server = subprocess.Popen(command, cwd=here)
+        try:
+            if not wait_for_port(args.port, server):
+                print(f'{name:<22} não iniciou (dependências do modo instaladas?)')
+                continue
+            latencies, errors, elapsed, threads = asyncio.run(drive_swipers(args.port, args, company_ids, server.pid))
+            connections = asyncio.run(scrape_peak_connections(args.port))
+            print(f'{name:<22} {args.clients:>8} {len(latencies) / elapsed:>8.0f} {percentile(latencies, 0.5):>8.1f} '
+                  f'{percentile(latencies, 0.99):>9.1f} {len(errors):>6} {threads:>8} {args.clients / workers:>16.0f} '
+                  f'{connections if connections is not None else "-":>15}')
+            if errors:
+                print(f'{"":<22} erros: {error_summary(errors)}')
+        finally:
+            server.terminate()
+            server.wait()
+
+
+async def open_stream(port, path, cookies):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    cookie = '; '.join(f'{k}={v}' for k, v in cookies.items())
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nAccept: text/event-stream\r\n'
+                 f'Cookie: {cookie}\r\n\r\n'.encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    while (await reader.readline()).strip():
+        pass
+    return status, reader, writer
+
+
+async def listen_streams(port, args, bus):
+    # --streams conexões SSE ociosas (uma por empresa); depois publica --events matches em
+    # empresas sorteadas pelo barramento compartilhado e mede o atraso até chegar no cliente
+    serializer = app.session_interface.get_signing_serializer(app)
+    cookie = app.config['SESSION_COOKIE_NAME']
+    latencies, failures, streams = [], 0, []
+    for start in range(1, args.streams + 1, 500):
+        opened = await asyncio.gather(*(open_stream(port, '/company/notifications',
+                                                    {cookie: serializer.dumps({'company_id': i})})
+                                        for i in range(start, min(start + 500, args.streams + 1))),
+                                      return_exceptions=True)
+        for result in opened:
+            if isinstance(result, Exception) or result[0] != 200:
+                failures += 1
+            else:
+                streams.append(result)
+
+    async def consume(reader):
+        # A leitura é incremental (linha a linha): o cliente lê no ritmo de um navegador
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                if line.startswith(b'data: '):
+                    data = json.loads(line[6:])
+                    if 'at' in data:
+                        latencies.append((time.time() - data['at']) * 1000)
+        except (OSError, ValueError):
+            pass
+
+    consumers = [asyncio.ensure_future(consume(reader)) for _, reader, _ in streams]
+    await asyncio.sleep(1)
+    rng = random.Random(0)
+    for _ in range(args.events):
+        company_id = rng.randint(1, args.streams)
+        await asyncio.to_thread(bus.publish, f'company:{company_id}', 'match', {'id': 0, 'name': 'bench', 'at': time.time()})
+        await asyncio.sleep(1 / args.rate)
+    await asyncio.sleep(2)
+    for consumer in consumers:
+        consumer.cancel()
+    for _, _, writer in streams:
+        writer.close()
+    return len(streams), failures, latencies
+
+
+def bench_streams(args):
+    # Conexões SSE ociosas por processo: memória, threads e atraso de entrega de cada modo
+    from notifications import SQLiteBus
+    require_disposable_database()
+    args.clients = args.streams
+    bus_path = os.path.join(tempfile.mkdtemp(), 'bus.db')
+    bus = SQLiteBus(bus_path, max_streams=0)
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, NOTIFY_BUS=f'sqlite:///{bus_path}')
+    print(f"{'modo':<22} {'streams':>8} {'falhas':>7} {'eventos':>8} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'threads':>8} {'RSS MB':>8} {'KB/stream':>10}")
+    for name, command, _ in server_modes(args):
+        server = subprocess.Popen(command, cwd=here, env=env)
+        try:
+            if not wait_for_port(args.port, server):
+                print(f'{name:<22} não iniciou (dependências do modo instaladas?)')
+                continue
+            time.sleep(1)
+            idle_rss = process_status(server.pid, 'VmRSS')
+            streams, failures, latencies = asyncio.run(listen_streams(args.port, args, bus))
+            rss = process_status(server.pid, 'VmRSS')
+            print(f'{name:<22} {streams:>8} {failures:>7} {len(latencies):>8} {percentile(latencies, 0.5):>8.1f} '
+                  f'{percentile(latencies, 0.99):>8.1f} {process_threads(server.pid):>8} {rss / 1024:>8.0f} '
+                  f'{(rss - idle_rss) / max(streams, 1):>10.1f}')
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def caching_log(args, rows):
+    # Tráfego sintético: sessões que abrem o próprio perfil algumas vezes (voltar, atualizar,
+    # vir do match); às vezes o perfil é editado entre uma visita e outra
+    rng = random.Random(args.seed)
+    log = []
+    for _ in range(args.sessions):
+        kind = rng.choice(('dev', 'company'))
+        owner_id = rng.randint(1, rows['developer' if kind == 'dev' else 'company'])
+        for _ in range(rng.randint(1, args.views * 2 - 1)):
+            if rng.random() < args.edit_ratio:
+                log.append({'user': f'{kind}:{owner_id}', 'method': 'POST', 'path': f'/{kind}/edit_profile'})
+            log.append({'user': f'{kind}:{owner_id}', 'method': 'GET', 'path': f'/{kind}/profile'})
+    return log
+
+
+def replay(log):
+    # Cada usuário é um navegador: guarda ETags e o corpo da página e não repete estáticos
+    # imutáveis. Conta os bytes transferidos (corpo + cabeçalhos) e o tempo no servidor.
+    import re
+    metrics = app.extensions['metrics']
+    render_before = sum(series[2] for series in metrics.template_seconds.series.values())
+    browsers = {}
+    wire_bytes, requests, page_ms, statuses = 0, 0, [], defaultdict(int)
+
+    def fetch(browser, path, method='GET', data=None):
+        nonlocal wire_bytes, requests
+        headers = {'Accept-Encoding': 'gzip, br'}
+        cached = browser['cache'].get(path)
+        if cached and cached['immutable']:
+            return cached
+        if cached and cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        start = time.perf_counter()
+        response = browser['client'].open(path, method=method, data=data, headers=headers)
+        body = response.get_data()
+        if path.endswith('/profile'):
+            page_ms.append((time.perf_counter() - start) * 1000)
+        requests += 1
+        wire_bytes += len(body) + sum(len(k) + len(v) + 4 for k, v in response.headers.items())
+        statuses[response.status_code] += 1
+        if response.status_code == 304:
+            return cached
+        if response.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        entry = {'body': body, 'etag': response.headers.get('ETag'),
+                 'immutable': 'immutable' in response.headers.get('Cache-Control', '')}
+        if method == 'GET' and response.status_code == 200:
+            browser['cache'][path] = entry
+        return entry
+
+    for entry in log:
+        browser = browsers.get(entry['user'])
+        if browser is None:
+            kind, owner_id = entry['user'].split(':')
+            client = app.test_client()
+            with client.session_transaction() as session:
+                session['developer_id' if kind == 'dev' else 'company_id'] = int(owner_id)
+            browser = browsers[entry['user']] = {'client': client, 'cache': {}}
+        if entry['method'] == 'POST':
+            # Edição: abre o formulário e reenvia o perfil com o nome alterado
+            fetch(browser, entry['path'])
+            kind, owner_id = entry['user'].split(':')
+            with app.app_context():
+                if kind == 'dev':
+                    user = db.session.get(Developer, int(owner_id))
+                    form = {'name': user.name, 'habilidades': user.habilidades}
+                else:
+                    user = db.session.get(Company, int(owner_id))
+                    form = {'name': user.name, 'descricao': user.descricao}
+            form['name'] = form['name'][:90] + '+' if not form['name'].endswith('+') else form['name'][:-1]
+            fetch(browser, entry['path'], 'POST', form)
+            continue
+        page = fetch(browser, entry['path'])
+        for asset in re.findall(rb'(?:src|href)="(/static/[^"]+)"', page['body']):
+            fetch(browser, asset.decode())
+
+    render_ms = (sum(series[2] for series in metrics.template_seconds.series.values()) - render_before) * 1000
+    return requests, wire_bytes, page_ms, render_ms, statuses
+
+
+def bench_caching(args):
+    # Reproduz o mesmo log de tráfego com HTTP_CACHE_ENABLED desligado e ligado
+    require_disposable_database()
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        rows = table_counts()
+    if not rows['developer'] or not rows['company']:
+        sys.exit('Banco vazio: rode "python benchmark.py generate" antes.')
+    if args.log:
+        with open(args.log, encoding='utf-8') as f:
+            log = [json.loads(line) for line in f if line.strip()]
+    else:
+        log = caching_log(args, rows)
+    pages = sum(1 for entry in log if entry['method'] == 'GET')
+    print(f'{len(log)} entradas ({pages} visitas a perfis)')
+    print(f"{'modo':<12} {'requisições':>11} {'KB':>9} {'KB/visita':>10} {'render ms':>10} {'perfil p50 ms':>14} "
+          f"{'p99 ms':>8} {'304':>6}")
+    for name, enabled in (('sem cache', False), ('com cache', True)):
+        app.config['HTTP_CACHE_ENABLED'] = enabled
+        replay(log[:50])  # aquecimento
+        requests, wire_bytes, page_ms, render_ms, statuses = replay(log)
+        print(f'{name:<12} {requests:>11} {wire_bytes / 1024:>9.0f} {wire_bytes / 1024 / pages:>10.2f} '
+              f'{render_ms:>10.0f} {percentile(page_ms, 0.5):>14.2f} {percentile(page_ms, 0.99):>8.2f} '
+              f'{statuses[304]:>6}')
+
+
+def table_bytes(model):
+    # Páginas ocupadas pela tabela e seus índices (SQLite com dbstat); None se indisponível
+    if db.engine.dialect.name != 'sqlite':
+        return None
+    names = [model.__tablename__] + [index.name for index in model.__table__.indexes]
+    try:
+        return db.session.execute(db.text('SELECT SUM(pgsize) FROM dbstat WHERE name IN :names')
+                                  .bindparams(db.bindparam('names', expanding=True)), {'names': names}).scalar()
+    except Exception:
+        db.session.rollback()
+        return None
+
+
+def bench_archive(args):
+    # Arquiva todos os skips existentes com --writers threads gravando skips novos ao mesmo
+    # tempo: tamanho das tabelas quentes, escrita por lote, p99 dos swipes e exclusão correta
+    require_disposable_database()
+    sides = [('dev', DevSkipCompany), ('company', CompanySkipDev)]
+    app.config['ENGAGEMENT_ROLLUP_LAG'] = 0
+    with app.app_context():
+        rows = table_counts()
+        if not rows['dev_skip_company'] and not rows['company_skip_dev']:
+            sys.exit('Sem skips: rode "python benchmark.py generate" antes.')
+        main.rollup_engagement(app.config['ENGAGEMENT_ROLLUP_BATCH'])  # só o que já foi contado é arquivado
+        before = {model: (db.session.query(db.func.count(model.id)).scalar(), table_bytes(model)) for _, model in sides}
+        rng = random.Random(args.seed)
+        samples = {}
+        for kind, model in sides:
+            owner_column = model.dev_id if kind == 'dev' else model.company_id
+            owners = [row[0] for row in db.session.query(owner_column).distinct().limit(args.sample * 10)]
+            for owner_id in rng.sample(owners, min(args.sample, len(owners))):
+                samples[kind, owner_id] = set(main.load_seen(kind, owner_id).ids().tolist())
+        db.session.commit()
+
+    latencies = {'antes': [], 'durante': []}
+    phase = ['antes']
+    stop = threading.Event()
+
+    def writer(number):
+        rng = random.Random(number)
+        with app.app_context():
+            while not stop.is_set():
+                kind, model = rng.choice(sides)
+                owner, other = (rows['developer'], rows['company']) if kind == 'dev' else (rows['company'], rows['developer'])
+                values = {'dev_id': rng.randint(1, owner), 'company_id': rng.randint(1, other)} if kind == 'dev' else \
+                    {'company_id': rng.randint(1, owner), 'dev_id': rng.randint(1, other)}
+                start = time.perf_counter()
+                main.record_swipe(model, **values)
+                latencies[phase[0]].append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.baseline)
+    phase[0] = 'durante'
+    cutoff = datetime.utcnow()
+    results = {}
+    start = time.perf_counter()
+    with app.app_context():
+        for kind, _ in sides:
+            results[kind] = main.archive_skips(kind, cutoff, args.batch, args.pause)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        wrong = 0
+        for (kind, owner_id), seen in samples.items():
+            if not seen <= set(main.load_seen(kind, owner_id).ids().tolist()):
+                wrong += 1
+            candidates, _ = main.SwipeDeck(kind, owner_id).fetch(50, [])  # a recarga do baralho
+            wrong += bool(seen & set(candidates))
+        archive_bytes = db.session.query(db.func.sum(db.func.length(main.SkipArchive.bitmap))).scalar() or 0
+        after = {model: (db.session.query(db.func.count(model.id)).scalar(), table_bytes(model)) for _, model in sides}
+
+    for kind, model in sides:
+        archived, lock_ms = results[kind]
+        (rows_before, bytes_before), (rows_after, bytes_after) = before[model], after[model]
+        size = f'{bytes_before / 2**20:.1f} -> {bytes_after / 2**20:.1f} MB' if bytes_before else '-'
+        print(f'{model.__tablename__:<18} linhas {rows_before} -> {rows_after}  tabela+índices {size}  '
+              f'{archived} arquivadas em {len(lock_ms)} lotes')
+        if lock_ms:
+            print(f'{"":<18} escrita por lote: p50 {percentile(lock_ms, 0.5):.2f} ms, p99 {percentile(lock_ms, 0.99):.2f} ms, '
+                  f'máx. {max(lock_ms):.2f} ms')
+    print(f'arquivo: {archive_bytes / 2**20:.2f} MB em blobs; {elapsed:.1f} s no total')
+    for name, samples_ms in latencies.items():
+        print(f'swipes {name:<8} {len(samples_ms):>7}  p50 {percentile(samples_ms, 0.5):.2f} ms  '
+              f'p99 {percentile(samples_ms, 0.99):.2f} ms')
+    print(f'exclusão: {len(samples)} usuários conferidos, {wrong} com divergência')
+
+
+def bench_bulk(args):
+    # Importa --rows desenvolvedores de um CSV gerado (com --invalid e --duplicates de linhas
+    # recusadas) e exporta tudo de volta: linhas/s, memória de pico e erros por linha
+    require_disposable_database()
+    rng = random.Random(args.seed)
+    stored = generate_password_hash(args.password, 'pbkdf2:sha256:1000')  # já com hash, como no export
+    path = os.path.join(tempfile.mkdtemp(), 'developers.csv')
+    expected, recent = 0, deque(maxlen=args.chunk * 2)  # e-mails repetidos no mesmo lote e no anterior
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(('name', 'email', 'password', 'cel', 'habilidades'))
+        for i in range(args.rows):
+            draw = rng.random()
+            if draw < args.invalid:
+                writer.writerow(('', f'invalido{i}@tinderjobs.dev', stored, '0', skill_text(rng)))
+            elif draw < args.invalid + args.duplicates and recent:
+                writer.writerow((f'dev{i}', f'dev{rng.choice(recent)}@tinderjobs.dev', stored, '0', skill_text(rng)))
+            else:
+                writer.writerow((f'dev{i}', f'dev{i}@tinderjobs.dev', stored, '0', skill_text(rng)))
+                recent.append(i)
+                expected += 1
+    size = os.path.getsize(path)
+
+    rejected = defaultdict(int)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        start = time.perf_counter()
+        with open(path, encoding='utf-8', newline='') as f:
+            summary = main.import_records('dev', read_records(f, 'csv'), args.chunk,
+                                          lambda line, email, message: rejected.__setitem__(message, rejected[message] + 1))
+        imported = time.perf_counter() - start
+        start = time.perf_counter()
+        with open(os.devnull, 'w') as out:
+            for text in write_records(main.export_rows(db.engine, 'dev', args.chunk), main.bulk_columns('dev'), 'csv'):
+                out.write(text)
+        exported = time.perf_counter() - start
+        count = db.session.query(db.func.count(Developer.id)).scalar()
+        database = db.engine.url.database if db.engine.dialect.name == 'sqlite' else None
+    os.remove(path)
+
+    print(f'arquivo: {args.rows} linhas, {size / 2**20:.0f} MB')
+    print(f'importação: {imported:.1f} s ({args.rows / imported:.0f} linhas/s), {summary["imported"]} importadas '
+          f'(esperado {expected}, no banco {count}), {summary["rejected"]} recusadas')
+    for message, n in sorted(rejected.items()):
+        print(f'  {n:>8}  {message}')
+    print(f'exportação: {exported:.1f} s ({count / exported:.0f} linhas/s)')
+    # O RSS inclui as páginas do banco mapeadas pelo SQLite (mmap_size em SQLITE_PRAGMAS)
+    database = f' (banco: {os.path.getsize(database) / 2**20:.0f} MB)' if database else ''
+    print(f'memória de pico: {peak_rss_mb()} MB{database}')
+
+
+def direct_engagement(company_id, since):
+    # O painel sem rollups: COUNT/GROUP BY no histórico inteiro da empresa
+    likes = db.session.query(db.func.count(DevLikeCompany.id)).filter(DevLikeCompany.company_id == company_id).scalar()
+    skips = db.session.query(db.func.count(DevSkipCompany.id)).filter(DevSkipCompany.company_id == company_id).scalar()
+    matches = db.session.query(db.func.count(Match.id)).filter(Match.company_id == company_id).scalar()
+    per_day = db.session.query(db.func.date(Match.match_date), db.func.count(Match.id)).filter(
+        Match.company_id == company_id, Match.match_date >= since).group_by(db.func.date(Match.match_date)).all()
+    return {'likes_received': likes, 'skips_received': skips, 'matches': matches}, per_day
+
+
+def bench_analytics(args):
+    # Backfill dos rollups, um delta com --swipes swipes novos e a latência do painel da empresa
+    # (rollup) contra COUNT/GROUP BY direto, na empresa mais curtida e numa mediana
+    require_disposable_database()
+    app.config['ENGAGEMENT_ROLLUP_LAG'] = 0
+    rng = random.Random(args.seed)
+    batch = app.config['ENGAGEMENT_ROLLUP_BATCH']
+    with app.app_context():
+        rows = table_counts()
+        if not rows['dev_like_company']:
+            sys.exit('Sem swipes: rode "python benchmark.py generate" antes.')
+        popularity = db.session.query(DevLikeCompany.company_id, db.func.count(DevLikeCompany.id)) \
+            .group_by(DevLikeCompany.company_id).order_by(db.func.count(DevLikeCompany.id).desc()).all()
+        companies = {'mais curtida': popularity[0][0], 'mediana': popularity[len(popularity) // 2][0]}
+        received = dict(popularity)
+
+        start = time.perf_counter()
+        main.backfill_engagement(batch)
+        print(f'backfill: {time.perf_counter() - start:.1f} s para {sum(rows.values())} linhas de swipe')
+
+        # Delta: swipes novos depois do backfill
+        for model, owner_count, other_count in ((DevLikeCompany, rows['developer'], rows['company']),
+                                                (DevSkipCompany, rows['developer'], rows['company'])):
+            pairs = {(rng.randint(1, owner_count), rng.randint(1, other_count)) for _ in range(args.swipes // 2)}
+            main.insert_ignore_many(model, [{'dev_id': d, 'company_id': c} for d, c in pairs])
+        db.session.commit()
+        start = time.perf_counter()
+        added = main.rollup_engagement(batch)
+        print(f'delta: {sum(added.values())} linhas em {(time.perf_counter() - start) * 1000:.0f} ms')
+
+        since = datetime.utcnow() - timedelta(days=app.config['ENGAGEMENT_DAYS'])
+        wrong = 0
+        for name, company_id in companies.items():
+            direct, _ = timed(lambda: direct_engagement(company_id, since), args.repeat)
+            rollup, _ = timed(lambda: main.engagement_summary('company', company_id, app.config['ENGAGEMENT_DAYS']),
+                           args.repeat)
+            expected, _ = direct_engagement(company_id, since)
+            totals = main.engagement_summary('company', company_id, 1)['totals']
+            wrong += any(totals[key] != value for key, value in expected.items())
+            print(f'{name:<13} ({received[company_id]:>6} likes recebidos)  direto {direct:8.2f} ms  '
+                  f'rollup {rollup:6.2f} ms')
+        print(f'totais divergentes: {wrong}')
+
+
+COLD_START = '''
+import json, resource, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+app = main.create_app()
+created = time.perf_counter()
+status = app.test_client().get('/').status_code
+served = time.perf_counter()
+print(json.dumps({'import': (imported - start) * 1000, 'create_app': (created - imported) * 1000,
+                  'first_request': (served - created) * 1000, 'status': status,
+                  'numpy': 'numpy' in sys.modules, 'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+'''
+
+
+def smaps_rollup(pid):
+    # Rss conta as páginas compartilhadas com o mestre em cada worker; Pss as divide entre os
+    # processos e Private_Dirty é o que o worker realmente copiou (copy-on-write)
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        fields = dict(line.split()[:2] for line in f if line.split()[0] in ('Rss:', 'Pss:', 'Private_Dirty:'))
+    return {key.rstrip(':'): int(value) / 1024 for key, value in fields.items()}
+
+
+def read_ready(process, count, timeout=60):
+    # Tempos de "worker <pid> pronto em X ms" no stderr do serve.py
+    ready = {}
+    deadline = time.time() + timeout
+    while len(ready) < count and time.time() < deadline:
+        line = process.stderr.readline()
+        if not line:
+            break
+        if ' pronto em ' in line:
+            words = line.split()
+            ready[int(words[1])] = float(words[4])
+    return ready
+
+
+def bench_startup(args):
+    # Partida a frio (import + create_app + primeira requisição, processo novo a cada vez) e o
+    # serve.py com --workers: prontidão de cada worker depois do fork, memória por worker e
+    # substituição de um worker morto
+    here = os.path.dirname(os.path.abspath(__file__))
+    runs = []
+    for _ in range(args.repeat):
+        result = subprocess.run([sys.executable, '-c', COLD_START], capture_output=True, text=True, cwd=here)
+        if result.returncode:
+            sys.exit(result.stderr)
+        runs.append(json.loads(result.stdout.splitlines()[-1]))
+    for key in ('import', 'create_app', 'first_request'):
+        print(f'{key:<14} mediana {statistics.median(run[key] for run in runs):8.1f} ms')
+    print(f'RSS máximo     mediana {statistics.median(run["rss"] for run in runs):8.1f} MB  '
+          f'(numpy carregado: {runs[0]["numpy"]}, GET / -> {runs[0]["status"]})')
+
+    if not sys.platform.startswith('linux'):
+        return
+    command = [sys.executable, 'serve.py', '--workers', str(args.workers), '--port', str(args.port)]
+    if args.preload_indexes:
+        command.append('--preload-indexes')
+    process = subprocess.Popen(command, cwd=here, stderr=subprocess.PIPE, text=True)
+    try:
+        ready = read_ready(process, args.workers)
+        if len(ready) < args.workers or not wait_for_port(args.port, process):
+            sys.exit('serve.py não subiu')
+        print(f'\n{args.workers} workers: pronto em ' + ', '.join(f'{ms:.1f}' for ms in ready.values()) + ' ms')
+        for pid in [process.pid] + list(ready):
+            memory = smaps_rollup(pid)
+            print(f'{"mestre" if pid == process.pid else "worker":<6} {pid:>7}  Rss {memory["Rss"]:6.1f} MB  '
+                  f'Pss {memory["Pss"]:6.1f} MB  Private_Dirty {memory["Private_Dirty"]:5.1f} MB')
+        os.kill(next(iter(ready)), signal.SIGKILL)
+        respawned = read_ready(process, 1)
+        print(f'worker substituído pronto em {next(iter(respawned.values()), float("nan")):.1f} ms')
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def bench_e2e(args):
+    # Sessões login -> match -> skip pelo test client do Flask, contra os dados de `generate`.
+    # Cada requisição é cronometrada por "MÉTODO rota [ação]"; o resultado sai em JSON.
+    require_disposable_database()
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        rows = table_counts()
+    if not rows['developer'] or not rows['company']:
+        sys.exit('Banco vazio: rode "python benchmark.py generate" antes.')
+
+    roles = {
+        'dev': ('/dev/login', '/dev/match', 'dev', rows['developer']),
+        'company': ('/company/login', '/company/match', 'emp', rows['company']),
+    }
+    latencies = defaultdict(list)
+    lock = threading.Lock()
+
+    def request(client, name, method, path, data=None):
+        start = time.perf_counter()
+        response = client.open(path, method=method, data=data)
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies[name].append(elapsed)
+        return response
+
+    def session(rng, role):
+        login_path, match_path, prefix, total = roles[role]
+        owner_id = rng.randint(1, total)
+        client = app.test_client()
+        request(client, f'POST {login_path}', 'POST', login_path,
+                {'email': f'{prefix}{owner_id}@tinderjobs.dev', 'password': args.password})
+        request(client, f'GET {match_path}', 'GET', match_path)
+        for _ in range(args.swipes):
+            action = 'match' if rng.random() < args.like_ratio else 'skip'
+            response = request(client, f'POST {match_path} {action}', 'POST', match_path, {action: '1'})
+            if response.status_code != 200:  # redirecionou: acabaram os candidatos
+                break
+
+    # Aquecimento fora da medição: índices de habilidades e caches do SQLite
+    warmup_start = time.perf_counter()
+    session(random.Random(0), 'dev')
+    session(random.Random(0), 'company')
+    warmup = (time.perf_counter() - warmup_start) * 1000
+    latencies.clear()
+
+    def worker(number):
+        rng = random.Random(args.seed + number)
+        for i in range(number, args.sessions, args.clients):
+            session(rng, 'dev' if i % 2 else 'company')
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(samples) for samples in latencies.values())
+    result = {
+        'commit': current_commit(),
+        'database': app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0],
+        'rows': rows,
+        'config': {'sessions': args.sessions, 'swipes': args.swipes, 'clients': args.clients,
+                   'like_ratio': args.like_ratio, 'seed': args.seed},
+        'warmup_ms': round(warmup, 1),
+        'elapsed_s': round(elapsed, 3),
+        'requests': total,
+        'throughput_rps': round(total / elapsed, 1),
+        'peak_rss_mb': peak_rss_mb(),
+        'endpoints': {
+            name: {
+                'requests': len(samples),
+                'throughput_rps': round(len(samples) / elapsed, 1),
+                'p50_ms': round(percentile(samples, 0.5), 3),
+                'p99_ms': round(percentile(samples, 0.99), 3),
+                'mean_ms': round(statistics.fmean(samples), 3),
+            }
+            for name, samples in sorted(latencies.items())
+        },
+    }
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description='Benchmarks do TinderJobs')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    candidates = sub.add_parser('candidates', help='latência por swipe vs. tamanho do histórico')
+    candidates.add_argument('--max-history', type=int, default=1000000)
+    candidates.add_argument('--unseen', type=int, default=100)
+    candidates.add_argument('--repeat', type=int, default=200)
+    candidates.set_defaults(func=bench_candidates)
+
+    seen = sub.add_parser('seen', help='bitmap de já avaliados: memória, blob e custo da exclusão')
+    seen.add_argument('--developers', type=int, default=1000000)
+    seen.add_argument('--max-history', type=int, default=100000)
+    seen.add_argument('--window', type=int, default=100)
+    seen.add_argument('--repeat', type=int, default=200)
+    seen.set_defaults(func=bench_seen)
+
+    ranking = sub.add_parser('ranking', help='tempo para ordenar candidatos por TF-IDF')
+    ranking.add_argument('--developers', type=int, default=100000)
+    ranking.add_argument('--repeat', type=int, default=50)
+    ranking.set_defaults(func=bench_ranking)
+
+    search = sub.add_parser('search', help='latência da busca booleana de desenvolvedores')
+    search.add_argument('--developers', type=int, default=500000)
+    search.add_argument('--repeat', type=int, default=100)
+    search.set_defaults(func=bench_search)
+
+    swipes = sub.add_parser('swipes', help='swipes/s com clientes concorrentes')
+    swipes.add_argument('--clients', type=int, default=64)
+    swipes.add_argument('--swipes', type=int, default=6400)
+    swipes.add_argument('--window', type=float, default=0.002)
+    swipes.add_argument('--batch', type=int, default=100)
+    swipes.set_defaults(func=bench_swipes)
+
+    load = sub.add_parser('load', help='vazão e p99 por configuração de banco e mistura leitura/escrita')
+    load.add_argument('--clients', type=int, default=32)
+    load.add_argument('--developers', type=int, default=20000)
+    load.add_argument('--duration', type=float, default=10)
+    load.add_argument('--postgres-url', help='banco PostgreSQL descartável (as tabelas são recriadas)')
+    load.set_defaults(func=bench_load)
+
+    logins = sub.add_parser('logins', help='p99 dos swipes durante uma onda de logins')
+    logins.add_argument('--developers', type=int, default=10000)
+    logins.add_argument('--swipe-clients', type=int, default=8)
+    logins.add_argument('--login-clients', type=int, default=16)
+    logins.add_argument('--workers', type=int, default=1, help='processos do pool de senhas')
+    logins.add_argument('--duration', type=float, default=10)
+    logins.set_defaults(func=bench_logins)
+
+    serving = sub.add_parser('serving', help='WSGI com threads vs. ASGI com --clients swipers simultâneos')
+    serving.add_argument('--clients', type=int, default=1000)
+    serving.add_argument('--workers', type=int, default=1, help='processos do uvicorn')
+    serving.add_argument('--duration', type=float, default=20)
+    serving.add_argument('--like-ratio', type=float, default=0.3)
+    serving.add_argument('--port', type=int, default=6101)
+    serving.set_defaults(func=bench_serving)
+
+    streams = sub.add_parser('streams', help='conexões SSE de notificação ociosas: memória, threads e atraso')
+    streams.add_argument('--streams', type=int, default=10000)
+    streams.add_argument('--events', type=int, default=200, help='matches publicados durante a medição')
+    streams.add_argument('--rate', type=float, default=50, help='eventos por segundo')
+    streams.add_argument('--workers', type=int, default=1, help='processos do uvicorn')
+    streams.add_argument('--port', type=int, default=6102)
+    streams.set_defaults(func=bench_streams)
+
+    caching = sub.add_parser('caching', help='bytes transferidos e tempo de render com/sem o cache HTTP')
+    caching.add_argument('--log', help='JSON lines {"user": "dev:12", "method": "GET", "path": "/dev/profile"}')
+    caching.add_argument('--sessions', type=int, default=2000)
+    caching.add_argument('--views', type=int, default=4, help='visitas ao perfil por sessão (média)')
+    caching.add_argument('--edit-ratio', type=float, default=0.02)
+    caching.add_argument('--seed', type=int, default=7)
+    caching.set_defaults(func=bench_caching)
+
+    archive = sub.add_parser('archive', help='arquivamento de skips com swipes concorrentes')
+    archive.add_argument('--batch', type=int, default=app.config['SKIP_ARCHIVE_BATCH'])
+    archive.add_argument('--pause', type=float, default=0.01)
+    archive.add_argument('--writers', type=int, default=4)
+    archive.add_argument('--baseline', type=float, default=5, help='segundos de swipes antes de arquivar')
+    archive.add_argument('--sample', type=int, default=200, help='usuários conferidos por lado')
+    archive.add_argument('--seed', type=int, default=11)
+    archive.set_defaults(func=bench_archive)
+
+    bulk = sub.add_parser('bulk', help='importação/exportação em lote de desenvolvedores (CSV)')
+    bulk.add_argument('--rows', type=int, default=1000000)
+    bulk.add_argument('--chunk', type=int, default=app.config['BULK_CHUNK_SIZE'])
+    bulk.add_argument('--invalid', type=float, default=0.001, help='fração de linhas sem nome')
+    bulk.add_argument('--duplicates', type=float, default=0.001, help='fração de linhas com e-mail repetido')
+    bulk.add_argument('--password', default='bench')
+    bulk.add_argument('--seed', type=int, default=5)
+    bulk.set_defaults(func=bench_bulk)
+
+    analytics = sub.add_parser('analytics', help='rollups de engajamento: backfill, delta e latência do painel')
+    analytics.add_argument('--swipes', type=int, default=20000, help='swipes novos somados pelo delta')
+    analytics.add_argument('--repeat', type=int, default=20)
+    analytics.add_argument('--seed', type=int, default=13)
+    analytics.set_defaults(func=bench_analytics)
+
+    startup = sub.add_parser('startup', help='partida a frio e prontidão/memória dos workers do serve.py')
+    startup.add_argument('--repeat', type=int, default=5)
+    startup.add_argument('--workers', type=int, default=4)
+    startup.add_argument('--port', type=int, default=8765)
+    startup.add_argument('--preload-indexes', action='store_true')
+    startup.set_defaults(func=bench_startup)
+
+    generate = sub.add_parser('generate', help='popula o banco de DATABASE_URL com dados sintéticos')
+    generate.add_argument('--developers', type=int, default=1000000)
+    generate.add_argument('--companies', type=int, default=100000)
+    generate.add_argument('--dev-swipes', type=float, default=3, help='média de swipes por desenvolvedor')
+    generate.add_argument('--company-swipes', type=float, default=20, help='média de swipes por empresa')
+    generate.add_argument('--alpha', type=float, default=1.5, help='expoente da cauda (Pareto) dos históricos')
+    generate.add_argument('--like-ratio', type=float, default=0.3)
+    generate.add_argument('--reciprocity', type=float, default=0.2, help='fração dos likes de devs retribuída')
+    generate.add_argument('--password', default='bench')
+    generate.add_argument('--seed', type=int, default=1)
+    generate.set_defaults(func=bench_generate)
+
+    e2e = sub.add_parser('e2e', help='login -> match -> skip pelo test client, resultado em JSON')
+    e2e.add_argument('--sessions', type=int, default=200)
+    e2e.add_argument('--swipes', type=int, default=20, help='swipes por sessão')
+    e2e.add_argument('--clients', type=int, default=1)
+    e2e.add_argument('--like-ratio', type=float, default=0.3)
+    e2e.add_argument('--password', default='bench')
+    e2e.add_argument('--seed', type=int, default=1)
+    e2e.add_argument('--output', help='grava o JSON também neste arquivo')
+    e2e.set_defaults(func=bench_e2e)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,90 @@
+# Leitura e escrita em streaming de CSV / NDJSON para a importação e exportação em lote:
+# um registro por vez, memória constante. Este módulo não importa o app.
+import codecs
+import csv
+import io
+import json
+from itertools import islice
+
+FORMATS = ('csv', 'ndjson')
+
+
+def guess_format(name, default='csv'):
+    # Pela extensão do arquivo ou pelo content-type
+    name = (name or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in name or 'json' in name:
+        return 'ndjson'
+    if name.endswith('.csv') or 'csv' in name:
+        return 'csv'
+    return default
+
+
+class BadFile(ValueError):
+    # Arquivo ilegível (codificação, CSV malformado) a partir da linha `line`: a leitura para ali
+    def __init__(self, line, error):
+        super().__init__(f'linha {line}: {error}')
+        self.line = line
+
+
+def text_lines(stream, encoding='utf-8-sig'):
+    # Stream binário -> linhas de texto decodificadas uma a uma, para que um byte inválido
+    # aponte a própria linha (um TextIOWrapper decodifica blocos de 8 KB e falha antes dela)
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for line in stream:
+        yield decoder.decode(line)
+    decoder.decode(b'', final=True)
+
+
+def read_records(stream, fmt):
+    # stream de texto (ou linhas) -> (número da linha, dict) ; linhas NDJSON inválidas viram
+    # ValueError no dict; erro de codificação ou de CSV vira BadFile com a linha onde parou
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        try:
+            for record in reader:
+                yield reader.line_num, record
+        except csv.Error as e:
+            raise BadFile(reader.line_num, e) from e  # line_num já conta a linha com erro
+        except UnicodeDecodeError as e:
+            raise BadFile(reader.line_num + 1, e) from e
+        return
+    line_no = 0
+    try:
+        for line_no, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                record = ValueError(f'JSON inválido: {e}')
+            if not isinstance(record, (dict, ValueError)):
+                record = ValueError('Cada linha deve ser um objeto JSON.')
+            yield line_no, record
+    except UnicodeDecodeError as e:
+        raise BadFile(line_no + 1, e) from e
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_records(rows, columns, fmt):
+    # Gera o texto em blocos (um por lote de linhas), para devolver como resposta em streaming
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for chunk in chunks(rows, 1000):
+            writer.writerows(chunk)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+        return
+    for chunk in chunks(rows, 1000):
+        yield ''.join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n' for row in chunk)
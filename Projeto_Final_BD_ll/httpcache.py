@@ -0,0 +1,192 @@
+# Cache HTTP: fragmentos de perfil renderizados, ETag/304 nas páginas de perfil,
+# URLs de arquivos estáticos com impressão digital (cache imutável no navegador) e
+# compressão gzip/brotli das respostas de texto, com os estáticos comprimidos uma vez só.
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from flask import current_app, request
+from markupsafe import Markup
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele, só gzip
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('text/html', 'text/css', 'text/plain', 'application/javascript', 'text/javascript',
+                      'application/json', 'image/svg+xml')
+
+
+class HttpCache:
+    def __init__(self):
+        self.fragments = OrderedDict()  # (tipo, id, versão) -> Markup, em ordem LRU
+        self.fingerprints = {}  # arquivo estático -> (mtime, impressão digital)
+        self.compressed = OrderedDict()  # (arquivo, impressão digital, codificação) -> bytes
+        self.lock = threading.Lock()
+        self.build_id = ''
+        self.metrics = None
+
+    def init_app(self, app):
+        app.config.setdefault('HTTP_CACHE_ENABLED', True)  # False: páginas e estáticos como antes
+        app.config.setdefault('HTTP_FRAGMENT_CACHE_SIZE', 10000)  # fragmentos na memória
+        app.config.setdefault('HTTP_COMPRESS_MIN_SIZE', 500)  # bytes; abaixo disso não compensa
+        app.config.setdefault('HTTP_COMPRESS_LEVEL', 6)
+        app.config.setdefault('HTTP_STATIC_MAX_AGE', 365 * 24 * 3600)  # estáticos com impressão digital
+        # Os ETags incluem os templates: um deploy com templates novos invalida o cache dos navegadores
+        digest = hashlib.md5()
+        for root, _, files in sorted(os.walk(os.path.join(app.root_path, app.template_folder))):
+            for name in sorted(files):
+                with open(os.path.join(root, name), 'rb') as f:
+                    digest.update(f.read())
+        self.build_id = digest.hexdigest()[:12]
+        self.metrics = app.extensions.get('metrics')
+        app.url_defaults(self.fingerprint_static)
+        app.after_request(self.after_request)
+        app.extensions['http_cache'] = self
+
+    # Fragmentos
+
+    def fragment(self, key, render):
+        # key = (tipo, id, versão da linha): editar o perfil muda a versão, então uma entrada
+        # nunca fica velha; drop() só libera a memória das versões antigas
+        if not current_app.config['HTTP_CACHE_ENABLED']:
+            return Markup(render())
+        with self.lock:
+            html = self.fragments.get(key)
+            if html is not None:
+                self.fragments.move_to_end(key)
+        if self.metrics is not None:
+            (self.metrics.fragment_cache_hits if html is not None else self.metrics.fragment_cache_misses).inc()
+        if html is None:
+            html = Markup(render())
+            with self.lock:
+                self.fragments[key] = html
+                while len(self.fragments) > current_app.config['HTTP_FRAGMENT_CACHE_SIZE']:
+                    self.fragments.popitem(last=False)
+        return html
+
+    def drop(self, kind, owner_id):
+        with self.lock:
+            for key in [key for key in self.fragments if key[:2] == (kind, owner_id)]:
+                del self.fragments[key]
+
+    # ETag / GET condicional
+
+    def etag(self, *parts):
+        return hashlib.md5(repr((self.build_id,) + parts).encode('utf-8')).hexdigest()
+
+    def not_modified(self, etag):
+        # Resposta 304 se o navegador já tem esta versão da página (antes de renderizar); senão None
+        if not current_app.config['HTTP_CACHE_ENABLED'] or not request.if_none_match.contains_weak(etag):
+            return None
+        if self.metrics is not None:
+            self.metrics.http_not_modified.inc()
+        response = current_app.response_class(status=304)
+        return self.revalidate(response, etag)
+
+    def revalidate(self, response, etag):
+        # Fraco: a mesma página com ou sem compressão tem o mesmo ETag
+        if not current_app.config['HTTP_CACHE_ENABLED']:
+            return response
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    # Estáticos
+
+    def static_fingerprint(self, filename):
+        path = os.path.join(current_app.static_folder, filename)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        with self.lock:
+            cached = self.fingerprints.get(filename)
+        if cached is None or cached[0] != mtime:
+            with open(path, 'rb') as f:
+                cached = (mtime, hashlib.md5(f.read()).hexdigest()[:10])
+            with self.lock:
+                self.fingerprints[filename] = cached
+        return cached[1]
+
+    def fingerprint_static(self, endpoint, values):
+        # url_for('static', filename=...) ganha ?v=<hash do conteúdo>: a URL muda quando o arquivo muda
+        if (endpoint == 'static' and 'filename' in values and 'v' not in values
+                and current_app.config['HTTP_CACHE_ENABLED']):
+            fingerprint = self.static_fingerprint(values['filename'])
+            if fingerprint:
+                values['v'] = fingerprint
+
+    # Compressão
+
+    def accepted_encoding(self):
+        accepted = request.accept_encodings
+        if brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=current_app.config['HTTP_COMPRESS_LEVEL'])
+        return gzip.compress(data, current_app.config['HTTP_COMPRESS_LEVEL'], mtime=0)
+
+    def static_body(self, filename, fingerprint, encoding):
+        # Estático comprimido uma vez por (arquivo, versão, codificação)
+        key = (filename, fingerprint, encoding)
+        with self.lock:
+            body = self.compressed.get(key)
+        if body is None:
+            with open(os.path.join(current_app.static_folder, filename), 'rb') as f:
+                body = self.compress(f.read(), encoding)
+            with self.lock:
+                self.compressed[key] = body
+                while len(self.compressed) > 256:
+                    self.compressed.popitem(last=False)
+        return body
+
+    def after_request(self, response):
+        if not current_app.config['HTTP_CACHE_ENABLED']:
+            return response
+        static = request.endpoint == 'static' and response.status_code in (200, 304)
+        fingerprint = None
+        if static:
+            fingerprint = self.static_fingerprint(request.view_args.get('filename', ''))
+            if fingerprint and request.args.get('v') == fingerprint:
+                response.cache_control.no_cache = None  # padrão do send_file sem SEND_FILE_MAX_AGE_DEFAULT
+                response.cache_control.public = True
+                response.cache_control.max_age = current_app.config['HTTP_STATIC_MAX_AGE']
+                response.cache_control.immutable = True
+
+        if (response.status_code != 200 or (response.is_streamed and not static)
+                or response.mimetype not in COMPRESSIBLE_TYPES or 'Content-Encoding' in response.headers):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = self.accepted_encoding()
+        if encoding is None:
+            return response
+        if static:
+            if not fingerprint:
+                return response
+            body = self.static_body(request.view_args['filename'], fingerprint, encoding)
+            size = response.content_length or 0
+            response.close()  # o arquivo aberto pelo send_file não será lido
+            response.direct_passthrough = False
+        else:
+            data = response.get_data()
+            size = len(data)
+            if size < current_app.config['HTTP_COMPRESS_MIN_SIZE']:
+                return response
+            body = self.compress(data, encoding)
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # O ETag do arquivo identifica os bytes sem compressão; fraco, continua valendo no If-None-Match
+            response.set_etag(etag, weak=True)
+        if self.metrics is not None:
+            self.metrics.http_bytes_saved.inc(max(size - len(body), 0))
+        return response
@@ -1,37 +1,236 @@
-from flask import Flask, render_template, redirect, url_for, request, flash, session
-from flask_bootstrap import Bootstrap5
+import hashlib
+import hmac
+import io
+import json
+import os
+import queue
+import statistics
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from datetime import datetime, timedelta
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import partial
+
+import click
+from flask import Blueprint, Flask, Response, current_app, make_response, render_template, redirect, url_for, request, flash, \
+    session, jsonify
 from flask_wtf import FlaskForm
 from wtforms import StringField, SubmitField, TextAreaField
 from wtforms.validators import DataRequired, Email  # Importar Email aqui
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import check_password_hash, generate_password_hash
-
-app = Flask(__name__)
-app.config['SECRET_KEY'] = '8BYkEfBA6O6donzWlSihBXox7C0sKR6b'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///devs.db'  # Banco de dados SQLite
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-Bootstrap5(app)
-
-db = SQLAlchemy(app)
+from sqlalchemy import event
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from werkzeug.local import LocalProxy
+
+from bulk import FORMATS, BadFile, chunks, guess_format, read_records, text_lines, write_records
+from httpcache import HttpCache
+from metrics import Metrics
+from notifications import NotificationsBusy, create_bus, sse_stream
+from passwords import PasswordPool, PasswordPoolBusy, is_hashed, needs_rehash
+
+# Banco de dados: SQLite por padrão; DATABASE_URL seleciona outro (ex.: postgresql://...)
+def database_uri():
+    uri = os.environ.get('DATABASE_URL', 'sqlite:///devs.db')
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+def engine_options(uri):
+    # Pool de conexões ajustável pelo ambiente; SQLite em memória usa o pool próprio do SQLAlchemy
+    if uri in ('sqlite://', 'sqlite:///:memory:'):
+        return {}
+    options = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),  # segundos
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+    }
+    if not uri.startswith('sqlite'):
+        options['pool_pre_ping'] = True  # conexões derrubadas pelo servidor
+    return options
+
+def default_config(app):
+    # Configuração padrão de cada app criado por create_app (o ambiente é lido aqui, não no import)
+    app.config['SECRET_KEY'] = '8BYkEfBA6O6donzWlSihBXox7C0sKR6b'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Baralho de swipes: candidatos pré-carregados por usuário (ver SwipeDeck); cada recarga traz
+    # os DECK_SIZE mais relevantes entre todos os ainda não avaliados (SkillIndex.top, ranking.py)
+    app.config['DECK_SIZE'] = 100
+    app.config['DECK_REFILL_AT'] = 10
+    app.config['DECK_TTL'] = 300  # segundos
+    app.config['DECK_MAX_USERS'] = 10000
+    app.config['DECK_EXHAUSTED_RETRY'] = 30  # segundos até um baralho esgotado buscar de novo
+    app.config['SEARCH_PAGE_SIZE'] = 20
+    # Segundos entre as conferências completas dos índices de busca (ver sync_skill_index); 0 desliga
+    app.config['SKILL_INDEX_RECONCILE'] = 300
+    app.config['MATCHES_PAGE_SIZE'] = 10
+    # Group commit dos swipes (ver SwipeWriter); 0 grava cada swipe na própria requisição
+    app.config['SWIPE_COMMIT_WINDOW'] = 0.002  # segundos
+    app.config['SWIPE_COMMIT_MAX_BATCH'] = 256
+    app.config['SWIPE_WRITE_TIMEOUT'] = 10  # segundos na fila antes de gravar direto na requisição
+    app.config['SWIPE_BATCH_LIMIT'] = 1000  # swipes por chamada da API em lote
+    # Bitmap de ids já avaliados por usuário (ver load_seen); SEEN_PERSIST=1 guarda o bitmap
+    # no banco quando a reconstrução precisou ler pelo menos SEEN_PERSIST_MIN swipes
+    app.config['SEEN_PERSIST'] = os.environ.get('SEEN_PERSIST', '0') == '1'
+    app.config['SEEN_PERSIST_MIN'] = 1000
+    # Senhas: hash/verificação num pool de processos próprio (ver passwords.py).
+    # PASSWORD_WORKERS=0 faz na thread da requisição; PASSWORD_MAX_PENDING limita fila + execução
+    app.config['PASSWORD_HASH_METHOD'] = 'scrypt'
+    app.config['PASSWORD_WORKERS'] = int(os.environ.get('PASSWORD_WORKERS', 2))
+    app.config['PASSWORD_MAX_PENDING'] = 32
+    app.config['PASSWORD_QUEUE_TIMEOUT'] = 10  # segundos esperando vaga antes de recusar o login
+    # Recomendações pré-calculadas por `flask precompute-decks` (top-K por usuário)
+    app.config['RECOMMENDATION_TOP_K'] = 100
+
+    # Arquivamento de skips (flask --app main:create_app archive-skips): skips mais velhos que o
+    # horizonte saem das tabelas quentes para um bitmap comprimido por usuário (SkipArchive)
+    app.config['SKIP_ARCHIVE_HORIZON_DAYS'] = 90
+    app.config['SKIP_ARCHIVE_BATCH'] = 100  # linhas por transação de escrita (~3 ms no SQLite)
+
+    # Engajamento por dono e por dia (flask --app main:create_app rollup-engagement, em cron/timer):
+    # contadores somados a partir das tabelas de swipe acima de uma marca; o painel só lê os totais prontos
+    app.config['ENGAGEMENT_ROLLUP_BATCH'] = 10000  # linhas de swipe por transação
+    app.config['ENGAGEMENT_ROLLUP_LAG'] = 60  # segundos; linhas mais novas esperam a próxima rodada
+    app.config['ENGAGEMENT_DAYS'] = 30  # dias no painel da empresa
+    app.config['ENGAGEMENT_MAX_DAYS'] = 365
+
+    # Notificações de match (SSE). NOTIFY_BUS vazio = só este processo; com vários workers use
+    # um arquivo compartilhado, ex.: NOTIFY_BUS=sqlite:////tmp/tinderjobs-bus.db
+    app.config['NOTIFY_BUS'] = os.environ.get('NOTIFY_BUS', '')
+    app.config['NOTIFY_MAX_STREAMS'] = 10000  # streams abertos por processo
+    app.config['NOTIFY_MAX_PENDING'] = 32  # eventos não lidos por stream antes do "resync"
+    app.config['NOTIFY_HEARTBEAT'] = 15  # segundos
+    app.config['NOTIFY_RETRY_MS'] = 5000  # espera do EventSource antes de reconectar
+    app.config['NOTIFY_POLL_INTERVAL'] = 0.2  # segundos (barramento SQLite)
+
+    # Importação/exportação em lote (flask import-users / export-users e /api/<dev|company>/import|export).
+    # As rotas HTTP exigem "Authorization: Bearer <BULK_API_TOKEN>"; sem token ficam desligadas
+    app.config['BULK_API_TOKEN'] = os.environ.get('BULK_API_TOKEN', '')
+    app.config['BULK_CHUNK_SIZE'] = 5000  # linhas por INSERT em lote (uma transação cada)
+    app.config['BULK_MAX_ERRORS'] = 1000  # erros por linha devolvidos na resposta HTTP
+
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri()
+    # PRAGMAs de cada conexão SQLite: WAL deixa leitores rodarem junto com o escritor dos swipes.
+    # SQLITE_TUNING=0 volta ao comportamento padrão do SQLite.
+    app.config['SQLITE_PRAGMAS'] = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'busy_timeout': 5000,  # ms
+    } if os.environ.get('SQLITE_TUNING', '1') != '0' else {}
+    # Instrumentação (metrics.py): PROFILE_SAMPLE_RATE > 0 perfila essa fração das requisições
+    # com cProfile e mantém em PROFILE_DIR os PROFILE_KEEP perfis mais lentos
+    app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    app.config['PROFILE_KEEP'] = 20
+
+# Rotas e comandos (flask upgrade-db, ...) ficam no blueprint; create_app monta um app novo
+# com ele. Importar este módulo não cria app nem abre o banco
+bp = Blueprint('main', __name__, cli_group=None)
+db = SQLAlchemy()
+# Estado de cada app (app.extensions), visto pelo app da requisição/contexto atual
+metrics = LocalProxy(lambda: current_app.extensions['metrics'])
+http_cache = LocalProxy(lambda: current_app.extensions['http_cache'])
+deck_cache = LocalProxy(lambda: current_app.extensions['deck_cache'])
+
+def configure_sqlite(flask_app, engine=None):
+    # Aplica SQLITE_PRAGMAS em toda conexão nova do engine do app (não faz nada fora do SQLite);
+    # `engine` permite configurar outro engine com o mesmo banco (ex.: o assíncrono do asgi.py)
+    pragmas = flask_app.config.get('SQLITE_PRAGMAS')
+    if engine is None:
+        with flask_app.app_context():
+            engine = db.engine
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+def create_app(config=None):
+    # Fábrica do app: um Flask novo a cada chamada, com a configuração padrão + `config`,
+    # banco, métricas, cache HTTP e as rotas do blueprint. O esquema não é tocado aqui (upgrade-db).
+    # CLI: flask --app main <comando>; produção: python serve.py (pré-carga + fork)
+    from flask_bootstrap import Bootstrap5
+
+    app = Flask(__name__)
+    default_config(app)
+    app.config.update(config or {})
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+    Bootstrap5(app)
+    db.init_app(app)
+    configure_sqlite(app)
+    # Latência por rota, SQL por requisição e renderização de templates em /metrics
+    app_metrics = Metrics()
+    app_metrics.init_app(app)
+    with app.app_context():
+        app_metrics.instrument_engine(db.engine)
+    HttpCache().init_app(app)
+    app.extensions['deck_cache'] = DeckCache(app.config['DECK_MAX_USERS'], app.config['DECK_TTL'])
+    app.extensions['skill_indexes'] = SkillIndexState()
+    app.register_blueprint(bp)
+    return app
+
+class utcnow(FunctionElement):
+    # Data/hora atual em UTC, pelo relógio do banco. As datas gravadas são comparadas com
+    # datetime.utcnow() (rollups, arquivamento, painel): CURRENT_TIMESTAMP do SQLite já é UTC,
+    # mas no PostgreSQL ele vem no fuso da sessão e a coluna TIMESTAMP guardaria a hora local
+    type = db.DateTime()
+    inherit_cache = True
+
+@compiles(utcnow)
+def compile_utcnow(element, compiler, **kw):
+    return 'CURRENT_TIMESTAMP'
+
+@compiles(utcnow, 'postgresql')
+def compile_utcnow_postgresql(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+def version_column(table):
+    # Sobe a cada UPDATE (cache HTTP) para max(version) + 1 da tabela: é uma sequência das
+    # alterações, então `version > marca` acha pelo índice os perfis editados por outro processo.
+    # Contador simples, sem trava otimista: dois workers regravando o hash legado ou um rehash
+    # junto com uma edição não dão StaleDataError
+    latest = db.select(db.func.max(db.literal_column('version')) + 1).select_from(db.table(table)).scalar_subquery()
+    return db.Column(db.Integer, nullable=False, server_default='1', index=True, onupdate=latest)
 
 # Modelo de Usuário
 class Developer(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(100), nullable=False, unique=True)
-    password = db.Column(db.String(100), nullable=False)
+    password = db.Column(db.String(255), nullable=False)  # hash do werkzeug (ou texto puro legado)
     cel = db.Column(db.String(20), nullable=False)
     habilidades = db.Column(db.Text, nullable=False)
+    version = version_column('developer')
 
 class DevSkipCompany(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     dev_id = db.Column(db.Integer, db.ForeignKey('developer.id'), nullable=False)
     company_id = db.Column(db.Integer, db.ForeignKey('company.id'), nullable=False)
+    skip_date = db.Column(db.DateTime, default=utcnow())  # NULL: anterior à coluna
+
+    # Um skip por par (dev, empresa); o índice inverso atende as buscas pelo lado da empresa
+    __table_args__ = (
+        db.Index('uq_dev_skip_company_dev_company', 'dev_id', 'company_id', unique=True),
+        db.Index('ix_dev_skip_company_company_dev', 'company_id', 'dev_id'),
+    )
 
 class CompanySkipDev(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     company_id = db.Column(db.Integer, db.ForeignKey('company.id'), nullable=False)
     dev_id = db.Column(db.Integer, db.ForeignKey('developer.id'), nullable=False)
+    skip_date = db.Column(db.DateTime, default=utcnow())
+
+    __table_args__ = (
+        db.Index('uq_company_skip_dev_company_dev', 'company_id', 'dev_id', unique=True),
+        db.Index('ix_company_skip_dev_dev_company', 'dev_id', 'company_id'),
+    )
 
 class DevForm(FlaskForm):
     name = StringField('Nome', validators=[DataRequired()])
@@ -51,9 +250,10 @@ class Company(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(100), nullable=False, unique=True)
-    password = db.Column(db.String(100), nullable=False)  # Essa linha deve estar presente
+    password = db.Column(db.String(255), nullable=False)  # Essa linha deve estar presente
     telefone = db.Column(db.String(20), nullable=False)
     descricao = db.Column(db.Text, nullable=False)
+    version = version_column('company')
 
 # Formulário de Cadastro para Empresa
 class CompanyForm(FlaskForm):
@@ -80,25 +280,551 @@ class DevEditForm(FlaskForm):
     habilidades = TextAreaField('Habilidades', validators=[DataRequired()])
     submit = SubmitField('Salvar Alterações')
 
+# Likes direcionais: quem curtiu quem
+class DevLikeCompany(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    dev_id = db.Column(db.Integer, db.ForeignKey('developer.id'), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('company.id'), nullable=False)
+    like_date = db.Column(db.DateTime, default=utcnow())
+
+    __table_args__ = (
+        db.Index('uq_dev_like_company_dev_company', 'dev_id', 'company_id', unique=True),
+        db.Index('ix_dev_like_company_company_dev', 'company_id', 'dev_id'),
+    )
+
+class CompanyLikeDev(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('company.id'), nullable=False)
+    dev_id = db.Column(db.Integer, db.ForeignKey('developer.id'), nullable=False)
+    like_date = db.Column(db.DateTime, default=utcnow())
+
+    __table_args__ = (
+        db.Index('uq_company_like_dev_company_dev', 'company_id', 'dev_id', unique=True),
+        db.Index('ix_company_like_dev_dev_company', 'dev_id', 'company_id'),
+    )
+
+# Match mútuo materializado: criado na mesma transação do like recíproco
 class Match(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     dev_id = db.Column(db.Integer, db.ForeignKey('developer.id'), nullable=False)
     company_id = db.Column(db.Integer, db.ForeignKey('company.id'), nullable=False)
-    match_date = db.Column(db.DateTime, default=db.func.current_timestamp())
+    match_date = db.Column(db.DateTime, default=utcnow())
+
+    # (dono, id) atende a listagem "meus matches" paginada por cursor
+    __table_args__ = (
+        db.Index('uq_match_dev_company', 'dev_id', 'company_id', unique=True),
+        db.Index('ix_match_dev_id', 'dev_id', 'id'),
+        db.Index('ix_match_company_id', 'company_id', 'id'),
+    )
+
+# Matches do esquema antigo, de antes dos likes direcionais: não dizem quem curtiu quem, então
+# não viram likes nem matches (upgrade_schema). Só tiram o par do baralho dos dois lados.
+class LegacyMatch(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    dev_id = db.Column(db.Integer, db.ForeignKey('developer.id'), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('company.id'), nullable=False)
+
+    __table_args__ = (
+        db.Index('uq_legacy_match_dev_company', 'dev_id', 'company_id', unique=True),
+        db.Index('ix_legacy_match_company_dev', 'company_id', 'dev_id'),
+    )
+
+# Bitmap persistido dos ids já avaliados por um dev ('dev') ou uma empresa ('company').
+# As marcas são o maior id de skip/like já incluído: o resto é lido das tabelas de swipe.
+class SeenSet(db.Model):
+    kind = db.Column(db.String(10), primary_key=True)
+    owner_id = db.Column(db.Integer, primary_key=True)
+    bitmap = db.Column(db.LargeBinary, nullable=False)
+    skip_mark = db.Column(db.Integer, nullable=False, default=0)
+    like_mark = db.Column(db.Integer, nullable=False, default=0)
+
+# Skips arquivados: um bitmap comprimido por dono com os alvos cujas linhas saíram das
+# tabelas de skip (archive-skips). Continuam contando como "já avaliados".
+class SkipArchive(db.Model):
+    kind = db.Column(db.String(10), primary_key=True)
+    owner_id = db.Column(db.Integer, primary_key=True)
+    bitmap = db.Column(db.LargeBinary, nullable=False)
+    rows = db.Column(db.Integer, nullable=False, default=0)  # linhas de skip arquivadas
+    archived_at = db.Column(db.DateTime, default=utcnow())
+
+# Top-K candidatos de cada dev ('dev') ou empresa ('company'), gerados por precompute-decks;
+# o baralho começa por eles e depois segue com a busca ao vivo
+class Recommendation(db.Model):
+    kind = db.Column(db.String(10), primary_key=True)
+    owner_id = db.Column(db.Integer, primary_key=True)
+    position = db.Column(db.Integer, primary_key=True)
+    target_id = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Float, nullable=False)
+
+# Estado do último cálculo por usuário: reexecuções só refazem quem mudou de perfil
+# (hash do texto) ou de histórico (maior id de skip/like)
+class RecommendationState(db.Model):
+    kind = db.Column(db.String(10), primary_key=True)
+    owner_id = db.Column(db.Integer, primary_key=True)
+    profile_hash = db.Column(db.String(32), nullable=False)
+    skip_mark = db.Column(db.Integer, nullable=False, default=0)
+    like_mark = db.Column(db.Integer, nullable=False, default=0)
+    computed_at = db.Column(db.DateTime, default=utcnow())
+
+# Engajamento agregado (rollup-engagement). Por dono ('dev' ou 'company') e dia, e o total
+# de cada dono; "received" é o que o outro lado fez com o dono (likes e skips recebidos)
+class EngagementDaily(db.Model):
+    kind = db.Column(db.String(10), primary_key=True)
+    owner_id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    likes_given = db.Column(db.Integer, nullable=False, default=0)
+    skips_given = db.Column(db.Integer, nullable=False, default=0)
+    likes_received = db.Column(db.Integer, nullable=False, default=0)
+    skips_received = db.Column(db.Integer, nullable=False, default=0)
+    matches = db.Column(db.Integer, nullable=False, default=0)
+
+# Inclui os swipes sem data (anteriores à coluna skip_date e os já arquivados), que não têm dia
+class EngagementTotal(db.Model):
+    kind = db.Column(db.String(10), primary_key=True)
+    owner_id = db.Column(db.Integer, primary_key=True)
+    likes_given = db.Column(db.Integer, nullable=False, default=0)
+    skips_given = db.Column(db.Integer, nullable=False, default=0)
+    likes_received = db.Column(db.Integer, nullable=False, default=0)
+    skips_received = db.Column(db.Integer, nullable=False, default=0)
+    matches = db.Column(db.Integer, nullable=False, default=0)
+
+# Maior id já somado de cada tabela de swipe (a marca d'água do rollup)
+class EngagementMark(db.Model):
+    source = db.Column(db.String(40), primary_key=True)
+    mark = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=utcnow())
+
+ENGAGEMENT_COUNTERS = ('likes_given', 'skips_given', 'likes_received', 'skips_received', 'matches')
+
+# Tabelas de swipe que recebem os índices compostos / únicos
+SWIPE_MODELS = (DevSkipCompany, CompanySkipDev, DevLikeCompany, CompanyLikeDev, Match)
+# Índices de versões anteriores do esquema, removidos pelo upgrade_schema
+OBSOLETE_INDEXES = ('ix_match_company_dev',)
+# De onde vem cada contador: (tabela, coluna de data, [(lado, coluna do dono, contador)])
+ENGAGEMENT_SOURCES = (
+    (DevLikeCompany, DevLikeCompany.like_date, [('dev', DevLikeCompany.dev_id, 'likes_given'),
+                                                ('company', DevLikeCompany.company_id, 'likes_received')]),
+    (DevSkipCompany, DevSkipCompany.skip_date, [('dev', DevSkipCompany.dev_id, 'skips_given'),
+                                                ('company', DevSkipCompany.company_id, 'skips_received')]),
+    (CompanyLikeDev, CompanyLikeDev.like_date, [('company', CompanyLikeDev.company_id, 'likes_given'),
+                                                ('dev', CompanyLikeDev.dev_id, 'likes_received')]),
+    (CompanySkipDev, CompanySkipDev.skip_date, [('company', CompanySkipDev.company_id, 'skips_given'),
+                                                ('dev', CompanySkipDev.dev_id, 'skips_received')]),
+    (Match, Match.match_date, [('dev', Match.dev_id, 'matches'), ('company', Match.company_id, 'matches')]),
+)
+# Colunas novas em tabelas existentes: (modelo, coluna, tipo no ALTER TABLE)
+ADDED_COLUMNS = (
+    (Developer, 'version', 'INTEGER NOT NULL DEFAULT 1'),
+    (Company, 'version', 'INTEGER NOT NULL DEFAULT 1'),
+    (DevSkipCompany, 'skip_date', 'TIMESTAMP'),
+    (CompanySkipDev, 'skip_date', 'TIMESTAMP'),
+)
+
+def dialect_insert(model):
+    # INSERT com ON CONFLICT do banco em uso (o dialeto do PostgreSQL só é importado se for ele)
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+def insert_ignore_statement(model):
+    return dialect_insert(model).on_conflict_do_nothing()
+
+def upsert_statement(model, columns):
+    # INSERT ... ON CONFLICT (chave primária) DO UPDATE só das colunas dadas
+    insert = dialect_insert(model)
+    keys = [column.name for column in model.__table__.primary_key]
+    return insert.on_conflict_do_update(index_elements=keys, set_={name: insert.excluded[name] for name in columns})
+
+def increment_statement(model, columns):
+    # INSERT ... ON CONFLICT (chave primária) DO UPDATE somando as colunas dadas à linha existente
+    insert = dialect_insert(model)
+    keys = [column.name for column in model.__table__.primary_key]
+    table = model.__table__
+    return insert.on_conflict_do_update(index_elements=keys,
+                                        set_={name: table.c[name] + insert.excluded[name] for name in columns})
+
+def insert_ignore(model, **values):
+    # INSERT ... ON CONFLICT DO NOTHING: swipes repetidos viram no-op em vez de check-then-insert.
+    # Retorna True se a linha foi inserida agora.
+    result = db.session.execute(insert_ignore_statement(model).values(**values))
+    return result.rowcount > 0
+
+def insert_ignore_many(model, rows):
+    # Mesmo INSERT em lote (executemany); não informa quais linhas eram novas
+    if rows:
+        db.session.execute(insert_ignore_statement(model), rows)
+
+class SwipeWriter:
+    # Write-behind com group commit: swipes de requisições concorrentes entram numa fila
+    # e uma única thread grava tudo que chegou dentro da janela SWIPE_COMMIT_WINDOW
+    # numa só transação (um fsync para o grupo inteiro em vez de um por swipe).
+    def __init__(self, flask_app):
+        self.app = flask_app
+        self.window = flask_app.config['SWIPE_COMMIT_WINDOW']
+        self.max_batch = flask_app.config['SWIPE_COMMIT_MAX_BATCH']
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name='swipe-writer', daemon=True)
+        self.thread.start()
+
+    def submit(self, write):
+        future = Future()
+        self.queue.put((write, future))
+        return future
+
+    def next_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        with self.app.app_context():
+            while True:
+                # Gravações canceladas por quem desistiu de esperar (run_swipe_write) ficam de fora
+                batch = [(write, future) for write, future in self.next_batch() if future.set_running_or_notify_cancel()]
+                try:
+                    self.write_batch(batch)
+                except Exception as e:
+                    # Falha fora das gravações (ex.: o rollback, com a conexão perdida): a thread
+                    # continua com uma sessão nova e quem ainda espera recebe o erro
+                    db.session.remove()
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+
+    def write_batch(self, batch):
+        try:
+            results = [write() for write, _ in batch]
+            db.session.commit()
+        except Exception:
+            # Um swipe inválido não derruba o grupo: refaz um por um
+            db.session.rollback()
+            self.write_one_by_one(batch)
+        else:
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def write_one_by_one(self, batch):
+        for write, future in batch:
+            try:
+                result = write()
+                db.session.commit()
+                future.set_result(result)
+            except Exception as e:
+                db.session.rollback()
+                future.set_exception(e)
+
+swipe_writer_lock = threading.Lock()
+
+def run_swipe_write(write):
+    # Executa write() numa transação e retorna o resultado. Com SWIPE_COMMIT_WINDOW > 0
+    # o commit é agrupado com o de outras requisições; a chamada só retorna depois dele.
+    if not current_app.config['SWIPE_COMMIT_WINDOW']:
+        result = write()
+        db.session.commit()
+        return result
+
+    flask_app = current_app._get_current_object()
+    with swipe_writer_lock:
+        writer = flask_app.extensions.get('swipe_writer')
+        if writer is None or not writer.thread.is_alive():  # uma thread morta é substituída
+            writer = flask_app.extensions['swipe_writer'] = SwipeWriter(flask_app)
+    # Encerra a transação de leitura desta requisição para não segurar o lock do SQLite
+    db.session.commit()
+    future = writer.submit(write)
+    try:
+        return future.result(timeout=current_app.config['SWIPE_WRITE_TIMEOUT'])
+    except FutureTimeoutError:
+        if not future.cancel():
+            raise  # o escritor já está nela: refazer aqui poderia gravar duas vezes
+    # O escritor não chegou nesta gravação (travado ou parado): grava direto, como com a janela 0
+    result = write()
+    db.session.commit()
+    return result
+
+def record_swipe(model, **values):
+    # Grava um skip e retorna True se a linha é nova
+    return run_swipe_write(partial(insert_ignore, model, **values))
+
+def lock_like_pairs(pairs):
+    # No PostgreSQL (READ COMMITTED) dois likes recíprocos simultâneos não se enxergariam;
+    # a trava por par serializa os dois. No SQLite a trava de escrita já faz isso.
+    if db.engine.dialect.name == 'postgresql':
+        for dev_id, company_id in sorted(pairs):
+            db.session.execute(db.text('SELECT pg_advisory_xact_lock(:dev_id, :company_id)'),
+                               {'dev_id': dev_id, 'company_id': company_id})
+
+def like_and_match(kind, owner_id, target_id):
+    # Grava o like de quem está logado ('dev' ou 'company') e, se o outro lado já tinha
+    # curtido, o match mútuo, tudo na mesma transação. Retorna (like novo, match novo).
+    if kind == 'dev':
+        dev_id, company_id = owner_id, target_id
+        own_like, other_like = DevLikeCompany, CompanyLikeDev
+    else:
+        dev_id, company_id = target_id, owner_id
+        own_like, other_like = CompanyLikeDev, DevLikeCompany
+
+    lock_like_pairs([(dev_id, company_id)])
+    created = insert_ignore(own_like, dev_id=dev_id, company_id=company_id)
+    reciprocal = db.session.query(other_like.id).filter_by(dev_id=dev_id, company_id=company_id).first()
+    matched = reciprocal is not None and insert_ignore(Match, dev_id=dev_id, company_id=company_id)
+    return created, matched
+
+def record_like(kind, owner_id, target_id):
+    return run_swipe_write(partial(like_and_match, kind, owner_id, target_id))
+
+notification_bus_lock = threading.Lock()
+
+def get_notification_bus():
+    # Um barramento por app, criado no primeiro uso
+    flask_app = current_app._get_current_object()
+    with notification_bus_lock:
+        bus = flask_app.extensions.get('notification_bus')
+        if bus is None:
+            config = flask_app.config
+            bus = flask_app.extensions['notification_bus'] = create_bus(
+                config['NOTIFY_BUS'], config['NOTIFY_MAX_STREAMS'], config['NOTIFY_POLL_INTERVAL'])
+    return bus
+
+def publish_match(developer, company):
+    # Avisa os dois lados; chamado depois do commit do match
+    bus = get_notification_bus()
+    at = time.time()
+    bus.publish(f'dev:{developer.id}', 'match', {'id': company.id, 'name': company.name, 'at': at})
+    bus.publish(f'company:{company.id}', 'match', {'id': developer.id, 'name': developer.name, 'at': at})
+
+def notify_matches(pairs):
+    # pairs: [(dev_id, company_id)] de matches recém-criados
+    if not pairs:
+        return
+    developers = {d.id: d for d in Developer.query.filter(Developer.id.in_({d for d, _ in pairs}))}
+    companies = {c.id: c for c in Company.query.filter(Company.id.in_({c for _, c in pairs}))}
+    for dev_id, company_id in pairs:
+        if dev_id in developers and company_id in companies:
+            publish_match(developers[dev_id], companies[company_id])
+
+def notification_response(kind, owner_id):
+    config = current_app.config
+    try:
+        subscription = get_notification_bus().subscribe(f'{kind}:{owner_id}', config['NOTIFY_MAX_PENDING'])
+    except NotificationsBusy as e:
+        return jsonify(error=str(e)), 503, {'Retry-After': '30'}
+    # O gerador não usa o request context: a conexão com o banco volta ao pool antes do stream
+    return Response(sse_stream(subscription, config['NOTIFY_HEARTBEAT'], config['NOTIFY_RETRY_MS']),
+                    mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+password_pool_lock = threading.Lock()
+
+def get_password_pool():
+    # Um pool por app, criado no primeiro uso
+    flask_app = current_app._get_current_object()
+    with password_pool_lock:
+        pool = flask_app.extensions.get('password_pool')
+        if pool is None:
+            config = flask_app.config
+            pool = flask_app.extensions['password_pool'] = PasswordPool(
+                config['PASSWORD_WORKERS'], config['PASSWORD_MAX_PENDING'], config['PASSWORD_QUEUE_TIMEOUT'],
+                config['PASSWORD_HASH_METHOD'], metrics=flask_app.extensions.get('metrics'))
+    return pool
+
+def hash_password(password):
+    return get_password_pool().hash(password)
+
+def check_login(user, password):
+    # Confere a senha e, se estava em texto puro (ou com outro método), grava o hash novo
+    pool = get_password_pool()
+    if user is None or not pool.verify(user.password, password):
+        return False
+    if needs_rehash(user.password, current_app.config['PASSWORD_HASH_METHOD']):
+        user.password = pool.hash(password)
+        db.session.commit()
+    return True
+
+def upgrade_schema():
+    # Migração dos bancos criados antes dos índices (ex.: instance/devs.db):
+    # remove pares duplicados mantendo o registro mais antigo e cria os índices que faltam.
+    # create_all não altera tabelas existentes, então isso roda depois dele.
+    for model, name, ddl in ADDED_COLUMNS:
+        columns = {column['name'] for column in db.inspect(db.engine).get_columns(model.__tablename__)}
+        if name not in columns:
+            db.session.execute(db.text(f'ALTER TABLE {model.__tablename__} ADD COLUMN {name} {ddl}'))
+            db.session.commit()
+    for model in (Developer, Company):
+        for index in model.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
+    for model in SWIPE_MODELS:
+        table = model.__table__
+        for index in table.indexes:
+            if index.unique:
+                columns = [column.name for column in index.columns]
+                keep = db.select(db.func.min(table.c.id)).group_by(*[table.c[name] for name in columns])
+                db.session.execute(db.delete(table).where(table.c.id.notin_(keep)))
+        db.session.commit()
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+    for name in OBSOLETE_INDEXES:
+        db.session.execute(db.text(f'DROP INDEX IF EXISTS {name}'))
+    # Hashes de senha não cabem em VARCHAR(100); o SQLite não impõe tamanho, o PostgreSQL sim
+    if db.engine.dialect.name == 'postgresql':
+        for table in ('developer', 'company'):
+            db.session.execute(db.text(f'ALTER TABLE {table} ALTER COLUMN password TYPE VARCHAR(255)'))
+
+    # Matches antigos eram likes de um lado só, sem dizer qual: virar likes dos dois lados
+    # inventaria matches mútuos. Saem de match para legacy_match, que só os mantém como
+    # "já avaliados" pelos dois lados (como no esquema antigo). Sem likes, match só tem linhas antigas.
+    if db.session.query(DevLikeCompany.id).first() is None and db.session.query(CompanyLikeDev.id).first() is None:
+        legacy = db.select(Match.dev_id, Match.company_id).where(db.true())
+        db.session.execute(insert_ignore_statement(LegacyMatch).from_select(['dev_id', 'company_id'], legacy))
+        db.session.execute(db.delete(Match))
+    db.session.commit()
 
-def check_if_match_exists(dev_id, company_id):
-    print(f"Checking match for Developer ID: {dev_id}, Company ID: {company_id}")
-    match = Match.query.filter_by(dev_id=dev_id, company_id=company_id).first()
-    print(f"Match found: {match}")
-    return match is not None
+# Índices TF-IDF de Developer.habilidades e Company.descricao, carregados sob demanda
+# (o ranking.py traz numpy/scipy, importados só aqui); um par por app
+class SkillIndexState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.indexes = None  # (devs, empresas)
+        self.marks = {}  # modelo -> (maior id, maior version) já indexados
+        self.versions = {}  # modelo -> {id: version indexada}
+        self.reconciled_at = None  # time.monotonic() da última conferência completa
+
+def sync_skill_index(state, index, model, text_column, reconcile=False):
+    # Lê só os perfis novos (id acima da marca) ou editados (version acima da marca), pelos
+    # índices: cadastros e edições de outros workers e do import-users aparecem na próxima busca.
+    # As marcas sozinhas não bastam no PostgreSQL: as transações terminam fora de ordem (um id
+    # ou version abaixo da marca pode aparecer depois dela) e duas edições simultâneas podem
+    # ter a mesma version. reconcile compara o (id, version) de todos os perfis com o que foi
+    # indexado e relê o texto só dos diferentes
+    id_mark, version_mark = state.marks.get(model, (0, 0))
+    versions = state.versions.setdefault(model, {})
+    if reconcile:
+        stale = [doc_id for doc_id, version in db.session.query(model.id, model.version).yield_per(10000)
+                 if versions.get(doc_id) != version]
+        for chunk in chunks(stale, 1000):
+            for doc_id, text, version in db.session.query(model.id, text_column, model.version).filter(model.id.in_(chunk)):
+                index.update(doc_id, text)
+                versions[doc_id] = version
+    rows = db.session.query(model.id, text_column, model.version).filter(
+        db.or_(model.id > id_mark, model.version > version_mark)).yield_per(10000)
+    for doc_id, text, version in rows:
+        index.update(doc_id, text)
+        versions[doc_id] = version
+        id_mark, version_mark = max(id_mark, doc_id), max(version_mark, version)
+    state.marks[model] = (id_mark, version_mark)
+
+def get_skill_indexes():
+    state = current_app.extensions['skill_indexes']
+    # A conexão sai do pool antes da trava: quem espera por ela não pode estar segurando a única
+    # conexão que o dono da trava aguarda (com o pool esgotado, todos parariam até o pool_timeout)
+    db.session.connection()
+    with state.lock:
+        if state.indexes is None:
+            from ranking import SkillIndex
+
+            state.indexes = SkillIndex(), SkillIndex()
+            state.reconciled_at = time.monotonic()  # a primeira carga já lê tudo
+        every = current_app.config['SKILL_INDEX_RECONCILE']
+        reconcile = every > 0 and time.monotonic() - state.reconciled_at >= every
+        if reconcile:
+            state.reconciled_at = time.monotonic()
+        sync_skill_index(state, state.indexes[0], Developer, Developer.habilidades, reconcile)
+        sync_skill_index(state, state.indexes[1], Company, Company.descricao, reconcile)
+    return state.indexes
+
+def seen_sources(kind):
+    # (tabela, coluna do dono, coluna do alvo) de tudo que conta como "já avaliado"
+    if kind == 'dev':
+        return [(DevSkipCompany, DevSkipCompany.dev_id, DevSkipCompany.company_id),
+                (DevLikeCompany, DevLikeCompany.dev_id, DevLikeCompany.company_id)]
+    return [(CompanySkipDev, CompanySkipDev.company_id, CompanySkipDev.dev_id),
+            (CompanyLikeDev, CompanyLikeDev.company_id, CompanyLikeDev.dev_id)]
+
+def legacy_source(kind):
+    # Os matches antigos (legacy_match) contam como avaliados pelos dois lados
+    if kind == 'dev':
+        return LegacyMatch, LegacyMatch.dev_id, LegacyMatch.company_id
+    return LegacyMatch, LegacyMatch.company_id, LegacyMatch.dev_id
+
+def load_archived(kind, owner_id):
+    # Alvos dos skips já arquivados (bitmap vazio se o dono não tem arquivo)
+    from seen import Bitmap
+
+    archived = db.session.get(SkipArchive, (kind, owner_id))
+    return Bitmap.from_bytes(archived.bitmap) if archived else Bitmap()
+
+def load_seen(kind, owner_id):
+    # Bitmap dos ids já avaliados (skips + likes). Lê só a coluna do alvo pelo índice do dono;
+    # com SEEN_PERSIST parte do blob salvo e lê apenas os swipes mais novos que as marcas dele.
+    import numpy as np
+    from seen import Bitmap
+
+    persist = current_app.config['SEEN_PERSIST']
+    stored = db.session.get(SeenSet, (kind, owner_id)) if persist else None
+    seen = Bitmap.from_bytes(stored.bitmap) if stored else Bitmap()
+    seen.update(load_archived(kind, owner_id))
+    _, legacy_owner, legacy_target = legacy_source(kind)
+    seen.add([row[0] for row in db.session.query(legacy_target).filter(legacy_owner == owner_id)])
+    marks = [stored.skip_mark, stored.like_mark] if stored else [0, 0]
+
+    read = 0
+    for i, (model, owner_column, target_column) in enumerate(seen_sources(kind)):
+        rows = db.session.query(target_column, model.id).filter(owner_column == owner_id, model.id > marks[i]).all()
+        if rows:
+            rows = np.array([tuple(row) for row in rows], dtype=np.int64)  # Row -> tupla: bem mais rápido
+            seen.add(rows[:, 0])
+            marks[i] = int(rows[:, 1].max())
+            read += len(rows)
+
+    if persist and read >= current_app.config['SEEN_PERSIST_MIN']:
+        db.session.merge(SeenSet(kind=kind, owner_id=owner_id, bitmap=seen.to_bytes(),
+                                 skip_mark=marks[0], like_mark=marks[1]))
+        db.session.commit()
+    return seen
+
+def unswiped_ids(kind, owner_id, ids):
+    # Confere no banco (anti-join limitado a um IN) quais dos ids o dono ainda não avaliou:
+    # pega os swipes gravados por outro processo, que o bitmap `seen` deste não viu
+    if kind == 'dev':
+        query, model = candidate_companies_query(owner_id), Company
+    else:
+        query, model = candidate_devs_query(owner_id), Developer
+    return {row[0] for row in query.filter(model.id.in_(ids))} if ids else set()
+
+def recommended_ids(kind, owner_id):
+    rows = db.session.query(Recommendation.target_id).filter_by(kind=kind, owner_id=owner_id).order_by(Recommendation.position)
+    return [row[0] for row in rows]
+
+def list_matches(kind, owner_id, before_id=None, per_page=10):
+    # "Meus matches": lê só a tabela Match pelo índice (dono, id), do mais recente ao mais
+    # antigo, com cursor por id. Retorna ([(match, outro lado)], cursor da próxima página ou None)
+    if kind == 'dev':
+        other, owner_column, other_column = Company, Match.dev_id, Match.company_id
+    else:
+        other, owner_column, other_column = Developer, Match.company_id, Match.dev_id
+
+    query = db.session.query(Match, other).join(other, other.id == other_column).filter(owner_column == owner_id)
+    if before_id:
+        query = query.filter(Match.id < before_id)
+    rows = query.order_by(Match.id.desc()).limit(per_page + 1).all()
+    next_before = rows[per_page - 1][0].id if len(rows) > per_page else None
+    return rows[:per_page], next_before
 
 ##########################################################################
 
-@app.route("/")
+@bp.route("/")
 def home():
     return render_template("index.html")
 
-@app.route("/dev/login", methods=["GET", "POST"])
+@bp.route("/dev/login", methods=["GET", "POST"])
 def dev_login():
     form = DevLoginForm()
 
@@ -111,12 +837,17 @@ def dev_login():
             developer = Developer.query.filter_by(email=email).first()
 
             # Verificar se o desenvolvedor foi encontrado e se a senha está correta
-            if developer and developer.password == password:
+            try:
+                valid = check_login(developer, password)
+            except PasswordPoolBusy as e:
+                flash(str(e), 'danger')
+                return render_template("dev_login.html", form=form), 503
+            if valid:
                 # Armazena o ID do desenvolvedor na sessão
                 session['developer_id'] = developer.id
 
                 # Redireciona para o perfil
-                return redirect(url_for('dev_profile'))
+                return redirect(url_for('main.dev_profile'))
             else:
                 # Exibe uma mensagem de erro se as credenciais forem inválidas
                 flash('Credenciais inválidas. Tente novamente.', 'danger')
@@ -128,12 +859,12 @@ def dev_login():
     return render_template("dev_login.html", form=form)
 
 
-@app.route("/dev/profile")
+@bp.route("/dev/profile")
 def dev_profile():
     # Verifica se o desenvolvedor está logado (se o ID está na sessão)
     if 'developer_id' not in session:
         flash('Por favor, faça login primeiro.', 'warning')
-        return redirect(url_for('dev_login'))
+        return redirect(url_for('main.dev_login'))
 
     # Obtém o ID do desenvolvedor armazenado na sessão
     developer_id = session['developer_id']
@@ -144,7 +875,19 @@ def dev_profile():
     # Se o desenvolvedor não for encontrado
     if developer is None:
         flash('Desenvolvedor não encontrado.', 'danger')
-        return redirect(url_for('dev_login'))
+        return redirect(url_for('main.dev_login'))
+
+    # Matches mútuos, com o contato da empresa
+    matches, next_before = list_matches('dev', developer_id, request.args.get('before', type=int),
+                                        current_app.config['MATCHES_PAGE_SIZE'])
+
+    # A página só muda com o perfil, os matches da página ou o perfil de quem deu match:
+    # se o navegador já tem essa versão, responde 304 sem renderizar
+    etag = http_cache.etag('dev_profile', developer.id, developer.version, next_before,
+                           [(match.id, company.id, company.version) for match, company in matches])
+    not_modified = http_cache.not_modified(etag)
+    if not_modified is not None:
+        return not_modified
 
     # Prepara os dados do desenvolvedor para enviar ao template
     developer_info = {
@@ -153,15 +896,22 @@ def dev_profile():
         "cel": developer.cel,
         "habilidades": developer.habilidades
     }
+    profile_html = http_cache.fragment(('dev', developer.id, developer.version),
+                                       lambda: render_template("dev_profile_info.html", developer=developer_info))
+    matches_info = [
+        {"name": company.name, "email": company.email, "telefone": company.telefone, "match_date": match.match_date}
+        for match, company in matches
+    ]
 
     # Renderiza o template passando as informações do desenvolvedor
-    return render_template("dev_profile.html", developer=developer_info)
+    return http_cache.revalidate(make_response(render_template(
+        "dev_profile.html", profile_html=profile_html, matches=matches_info, next_before=next_before)), etag)
 
-@app.route("/dev/edit_profile", methods=["GET", "POST"])
+@bp.route("/dev/edit_profile", methods=["GET", "POST"])
 def dev_edit_profile():
     if 'developer_id' not in session:
         flash('Por favor, faça login primeiro.', 'warning')
-        return redirect(url_for('dev_login'))
+        return redirect(url_for('main.dev_login'))
 
     dev_id = session['developer_id']
     developer = Developer.query.get_or_404(dev_id)
@@ -170,18 +920,22 @@ def dev_edit_profile():
     if form.validate_on_submit():
         developer.name = form.name.data
         developer.habilidades = form.habilidades.data
+        # Recomendações antigas foram calculadas com o perfil anterior: volta à busca ao vivo
+        Recommendation.query.filter_by(kind='dev', owner_id=developer.id).delete()
         db.session.commit()
+        deck_cache.drop('dev', developer.id)  # Reordena o baralho pelas novas habilidades
+        http_cache.drop('dev', developer.id)
         flash('Perfil do desenvolvedor atualizado com sucesso!', 'success')
-        return redirect(url_for('dev_profile'))
+        return redirect(url_for('main.dev_profile'))
 
     return render_template("dev_edit_profile.html", form=form)
 
 
-@app.route("/company/edit_profile", methods=["GET", "POST"])
+@bp.route("/company/edit_profile", methods=["GET", "POST"])
 def company_edit_profile():
     if 'company_id' not in session:
         flash('Por favor, faça login primeiro.', 'warning')
-        return redirect(url_for('company_login'))
+        return redirect(url_for('main.company_login'))
 
     company_id = session['company_id']
     company = Company.query.get_or_404(company_id)
@@ -190,38 +944,45 @@ def company_edit_profile():
     if form.validate_on_submit():
         company.name = form.name.data
         company.descricao = form.descricao.data
+        Recommendation.query.filter_by(kind='company', owner_id=company.id).delete()
         db.session.commit()
+        deck_cache.drop('company', company.id)
+        http_cache.drop('company', company.id)
         flash('Perfil da empresa atualizado com sucesso!', 'success')
-        return redirect(url_for('company_profile'))
+        return redirect(url_for('main.company_profile'))
 
     return render_template("company_edit_profile.html", form=form)
 
-@app.route("/dev/register", methods=["GET", "POST"])
+@bp.route("/dev/register", methods=["GET", "POST"])
 def dev_register():
     form = DevForm()
 
     if form.validate_on_submit():
         # Verificar se o email já existe
         existing_dev_email = Developer.query.filter_by(email=form.email.data).first()
-        existing_dev_pass = Developer.query.filter_by(password=form.password.data).first()
-        
-        if existing_dev_email and existing_dev_pass:
+        if existing_dev_email:
             flash('Esse email já está registrado. Por favor, use outro.', 'danger')
-            return redirect(url_for('dev_register'))
+            return redirect(url_for('main.dev_register'))
+
+        try:
+            password = hash_password(form.password.data)
+        except PasswordPoolBusy as e:
+            flash(str(e), 'danger')
+            return render_template("dev_register.html", form=form), 503
 
         try:
             # Criar novo desenvolvedor e salvar no banco de dados
             new_dev = Developer(
                 name=form.name.data,
                 email=form.email.data,
-                password=form.password.data,
+                password=password,
                 cel=form.cel.data,
                 habilidades=form.habilidades.data
             )
             db.session.add(new_dev)
             db.session.commit()
             flash('Desenvolvedor registrado com sucesso!', 'success')
-            return redirect(url_for('home'))
+            return redirect(url_for('main.home'))
         
         except Exception as e:
             # Tratar erros de banco de dados e fazer rollback em caso de falha
@@ -231,7 +992,7 @@ def dev_register():
     return render_template("dev_register.html", form=form)
 
 # Rota para registrar empresas
-@app.route("/company/register", methods=["GET", "POST"])
+@bp.route("/company/register", methods=["GET", "POST"])
 def company_register():
     form = CompanyForm()
     if form.validate_on_submit():
@@ -239,24 +1000,30 @@ def company_register():
         existing_company = Company.query.filter_by(email=form.email.data).first()
         if existing_company:
             flash('Esse e-mail já está registrado. Por favor, use outro.', 'danger')
-            return redirect(url_for('company_register'))
+            return redirect(url_for('main.company_register'))
+
+        try:
+            password = hash_password(form.password.data)
+        except PasswordPoolBusy as e:
+            flash(str(e), 'danger')
+            return render_template("company_register.html", form=form), 503
 
         # Criar nova empresa e salvar no banco de dados
         new_company = Company(
             name=form.name.data,
             email=form.email.data,
-            password=form.password.data,  # Hash da senha
+            password=password,  # Hash da senha
             telefone=form.telefone.data,
             descricao=form.descricao.data
         )
         db.session.add(new_company)
         db.session.commit()  # Salvar no banco
         flash('Empresa registrada com sucesso!', 'success')
-        return redirect(url_for('home'))
+        return redirect(url_for('main.home'))
     return render_template("company_register.html", form=form)
 
 # Rota para login de empresas
-@app.route("/company/login", methods=["GET", "POST"])
+@bp.route("/company/login", methods=["GET", "POST"])
 def company_login():
     form = CompanyLoginForm()
     if request.method == "POST":
@@ -266,26 +1033,31 @@ def company_login():
             password = form.password.data
 
             company = Company.query.filter_by(email=email).first()
-            if company and company.password == password:  # Verifique se a senha está correta
+            try:
+                valid = check_login(company, password)
+            except PasswordPoolBusy as e:
+                flash(str(e), 'danger')
+                return render_template("company_login.html", form=form), 503
+            if valid:  # Verifique se a senha está correta
                 # Armazena o ID da empresa na sessão
                 session['company_id'] = company.id
 
                 # Redireciona para o perfil da empresa
                 flash(f'Bem-vindo, {company.name}!', 'success')
-                return redirect(url_for('company_profile'))
+                return redirect(url_for('main.company_profile'))
             else:
                 # Login falhou
                 print("Erros de validação:", form.errors)
                 flash('E-mail ou senha inválidos. Tente novamente.', 'danger')
-                return redirect(url_for('company_login'))
+                return redirect(url_for('main.company_login'))
     return render_template("company_login.html", form=form)
 
-@app.route("/company/profile")
+@bp.route("/company/profile")
 def company_profile():
     # Verifica se a empresa está logada (você pode usar sessão semelhante ao que fez para desenvolvedores)
     if 'company_id' not in session:
         flash('Por favor, faça login primeiro.', 'warning')
-        return redirect(url_for('company_login'))
+        return redirect(url_for('main.company_login'))
 
     # Obtém o ID da empresa armazenado na sessão
     company_id = session['company_id']
@@ -296,7 +1068,17 @@ def company_profile():
     # Se a empresa não for encontrada
     if company is None:
         flash('Empresa não encontrada.', 'danger')
-        return redirect(url_for('company_login'))
+        return redirect(url_for('main.company_login'))
+
+    # Matches mútuos, com o contato do desenvolvedor
+    matches, next_before = list_matches('company', company_id, request.args.get('before', type=int),
+                                        current_app.config['MATCHES_PAGE_SIZE'])
+
+    etag = http_cache.etag('company_profile', company.id, company.version, next_before,
+                           [(match.id, dev.id, dev.version) for match, dev in matches])
+    not_modified = http_cache.not_modified(etag)
+    if not_modified is not None:
+        return not_modified
 
     # Prepara os dados da empresa para enviar ao template
     company_info = {
@@ -305,108 +1087,292 @@ def company_profile():
         "telefone": company.telefone,
         "descricao": company.descricao
     }
+    profile_html = http_cache.fragment(('company', company.id, company.version),
+                                       lambda: render_template("company_profile_info.html", company=company_info))
+    matches_info = [
+        {"name": dev.name, "email": dev.email, "cel": dev.cel, "match_date": match.match_date}
+        for match, dev in matches
+    ]
 
     # Renderiza o template passando as informações da empresa
-    return render_template("company_profile.html", company=company_info)
+    return http_cache.revalidate(make_response(render_template(
+        "company_profile.html", profile_html=profile_html, matches=matches_info, next_before=next_before)), etag)
 
-@app.route("/dev/logout")
+@bp.route("/dev/logout")
 def dev_logout():
     session.pop('developer_id', None)  # Remove o ID do desenvolvedor da sessão
     flash('Você foi desconectado.', 'success')
-    return redirect(url_for('dev_login'))
+    return redirect(url_for('main.dev_login'))
 
-@app.route("/company/logout")
+@bp.route("/company/logout")
 def company_logout():
     session.pop('company_id', None)  # Remove o ID da empresa da sessão
     flash('Você foi desconectado.', 'success')
-    return redirect(url_for('company_login'))
+    return redirect(url_for('main.company_login'))
 
 ##########################################################################
 
-def get_evaluated_company_ids(dev_id):
-    evaluated_matches = Match.query.filter_by(dev_id=dev_id).all()
-    # Certifique-se de que a função não está chamando a si mesma aqui
-    evaluated_company_ids = [match.company_id for match in evaluated_matches]
-    return evaluated_company_ids
-
-def get_next_empresa_for_dev(dev_id):
-    # Obtém todas as empresas que não foram avaliadas pelo desenvolvedor
-    evaluated_company_ids = get_evaluated_company_ids(dev_id)  # Implemente esta função conforme necessário
-
-    # Busca a próxima empresa que o desenvolvedor ainda não avaliou
-    next_company = Company.query.filter(Company.id.notin_(evaluated_company_ids)).first()
-
-    return next_company
-
-def get_next_dev_for_company(company_id):
-    # Obtém os IDs dos desenvolvedores que a empresa já pulou
-    skipped_dev_ids = get_skipped_dev_ids(company_id)
-    
-    # Obtém os IDs dos desenvolvedores que já têm um match com a empresa
-    matched_dev_ids = Match.query.filter_by(company_id=company_id).with_entities(Match.dev_id).all()
-    matched_dev_ids = [dev_id[0] for dev_id in matched_dev_ids]  # Extrai apenas os IDs
-
-    # Retorna o próximo desenvolvedor que a empresa ainda não avaliou
-    return Developer.query.filter(
-        ~Developer.id.in_(skipped_dev_ids), 
-        ~Developer.id.in_(matched_dev_ids)
-    ).first()
-
-
-
-def get_skipped_company_ids(dev_id):
-    # Retorna uma lista de IDs de empresas que o desenvolvedor passou
-    skipped = DevSkipCompany.query.filter_by(dev_id=dev_id).all()
-    return [s.company_id for s in skipped]
-
-def get_skipped_dev_ids(company_id):
-    # Retorna uma lista de IDs de desenvolvedores que a empresa passou
-    skipped = CompanySkipDev.query.filter_by(company_id=company_id).all()
-    return [s.dev_id for s in skipped]
-
-@app.route("/dev/skip/<int:company_id>", methods=["GET"])
+def candidate_companies_query(dev_id, after_id=0):
+    # Anti-join: empresas sem skip nem like (nem match antigo) do desenvolvedor, resolvido inteiro no banco
+    # (sem trazer o histórico para o Python nem montar listas gigantes de NOT IN).
+    # O cursor é por chave (id > after_id), então a ordem é estável entre chamadas.
+    skipped = db.session.query(DevSkipCompany.id).filter(
+        DevSkipCompany.dev_id == dev_id,
+        DevSkipCompany.company_id == Company.id
+    ).exists()
+    liked = db.session.query(DevLikeCompany.id).filter(
+        DevLikeCompany.dev_id == dev_id,
+        DevLikeCompany.company_id == Company.id
+    ).exists()
+    legacy = db.session.query(LegacyMatch.id).filter(
+        LegacyMatch.dev_id == dev_id,
+        LegacyMatch.company_id == Company.id
+    ).exists()
+
+    return db.session.query(Company.id).filter(
+        Company.id > after_id,
+        ~skipped,
+        ~liked,
+        ~legacy
+    ).order_by(Company.id)
+
+def candidate_devs_query(company_id, after_id=0):
+    # Mesmo anti-join do lado da empresa: CompanySkipDev + CompanyLikeDev + LegacyMatch
+    skipped = db.session.query(CompanySkipDev.id).filter(
+        CompanySkipDev.company_id == company_id,
+        CompanySkipDev.dev_id == Developer.id
+    ).exists()
+    liked = db.session.query(CompanyLikeDev.id).filter(
+        CompanyLikeDev.company_id == company_id,
+        CompanyLikeDev.dev_id == Developer.id
+    ).exists()
+    legacy = db.session.query(LegacyMatch.id).filter(
+        LegacyMatch.company_id == company_id,
+        LegacyMatch.dev_id == Developer.id
+    ).exists()
+
+    return db.session.query(Developer.id).filter(
+        Developer.id > after_id,
+        ~skipped,
+        ~liked,
+        ~legacy
+    ).order_by(Developer.id)
+
+class SwipeDeck:
+    # Baralho de swipes: próximos ids candidatos de um dev ('dev') ou empresa ('company'),
+    # os mais relevantes primeiro. Cada swipe é um pop; quando sobra pouco, o reabastecimento
+    # roda em segundo plano e traz os próximos mais relevantes entre todos os não avaliados.
+    # O bitmap `seen` (ids já avaliados) é montado na primeira busca e atualizado a cada swipe.
+    def __init__(self, kind, owner_id):
+        self.kind = kind
+        self.owner_id = owner_id
+        self.ids = deque()
+        self.seen = None
+        self.recommended = False  # a lista pré-calculada (Recommendation) já foi lida
+        self.exhausted_at = None  # time.monotonic() da busca que veio incompleta (sem mais candidatos)
+        self.refilling = False
+        self.cond = threading.Condition()
+
+    def seen_ids(self):
+        if self.seen is None:
+            seen = load_seen(self.kind, self.owner_id)
+            with self.cond:
+                if self.seen is None:
+                    self.seen = seen
+        return self.seen
+
+    def fetch(self, limit, queued):
+        # Os `limit` candidatos mais relevantes entre todos os não avaliados (um score sobre o
+        # índice inteiro, sem os ids de `seen`), fora os que já estão na fila, conferidos no banco.
+        # Retorna (ids do mais ao menos relevante, o índice tinha menos que `limit`)
+        dev_index, company_index = get_skill_indexes()
+        if self.kind == 'dev':
+            index = company_index
+            text = db.session.query(Developer.habilidades).filter_by(id=self.owner_id).scalar()
+        else:
+            index = dev_index
+            text = db.session.query(Company.descricao).filter_by(id=self.owner_id).scalar()
+        queued, found = set(queued), []
+        while len(found) < limit:
+            missing = limit - len(found)
+            best, _ = index.top(text, missing + len(queued), exclude=self.seen_ids())
+            ids = [i for i in best.tolist() if i not in queued][:missing]
+            unseen = unswiped_ids(self.kind, self.owner_id, ids)
+            with self.cond:
+                self.seen.add([i for i in ids if i not in unseen])  # saem das próximas rodadas
+            found.extend(i for i in ids if i in unseen)
+            queued.update(ids)
+            if len(ids) < missing:
+                return found, True
+        return found, False
+
+    def refill(self):
+        with self.cond:
+            missing = current_app.config['DECK_SIZE'] - len(self.ids)
+            if self.refilling or self.is_exhausted() or missing <= 0:
+                return
+            self.refilling = True
+            queued = set(self.ids)
+
+        ranked, live, exhausted = [], True, False
+        try:
+            # Primeira carga: recomendações pré-calculadas ainda não avaliadas, se houver
+            if not self.recommended:
+                self.recommended = True
+                ranked = recommended_ids(self.kind, self.owner_id)
+                if ranked:
+                    ranked = [i for i, seen in zip(ranked, self.seen_ids().contains(ranked)) if not seen]
+                live = not ranked
+            if live:
+                ranked, exhausted = self.fetch(missing, queued)
+        finally:
+            with self.cond:
+                # Ids já na fila não se repetem; o que foi avaliado enquanto a busca rodava fica de fora
+                queued = set(self.ids)
+                if ranked and self.seen is not None:
+                    ranked = [i for i, seen in zip(ranked, self.seen.contains(ranked)) if not seen]
+                self.ids.extend(i for i in ranked if i not in queued)
+                if live:
+                    self.exhausted_at = time.monotonic() if exhausted else None
+                self.refilling = False
+                self.cond.notify_all()
+
+    def peek(self):
+        # Candidato atual (ou None se acabou); só vai ao banco se o baralho estiver vazio
+        with self.cond:
+            while self.refilling:
+                self.cond.wait()
+            if self.ids or self.is_exhausted():
+                return self.ids[0] if self.ids else None
+        self.refill()
+        with self.cond:
+            return self.ids[0] if self.ids else None
+
+    def discard(self, target_id):
+        # Remove o candidato avaliado (normalmente o topo: O(1)) e agenda o reabastecimento
+        with self.cond:
+            if self.ids and self.ids[0] == target_id:
+                self.ids.popleft()
+            elif target_id in self.ids:
+                self.ids.remove(target_id)
+            if self.seen is not None:
+                self.seen.add([target_id])
+            low = len(self.ids) <= current_app.config['DECK_REFILL_AT'] and not self.is_exhausted() and not self.refilling
+        if low:
+            deck_refill_executor.submit(refill_in_background, current_app._get_current_object(), self)
+
+    def is_exhausted(self):
+        # O fim do baralho vale por DECK_EXHAUSTED_RETRY segundos; depois a busca roda de novo. Os
+        # cadastros do outro lado feitos desde então, em qualquer worker ou pelo import-users,
+        # chegam pelo índice de busca, que lê do banco (get_skill_indexes)
+        if self.exhausted_at is None:
+            return False
+        return time.monotonic() - self.exhausted_at < current_app.config['DECK_EXHAUSTED_RETRY']
+
+
+class DeckCache:
+    # LRU limitado em tamanho, com TTL por baralho
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.decks = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, kind, owner_id):
+        key = (kind, owner_id)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.decks.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self.decks.move_to_end(key)
+                return entry[1]
+            deck = SwipeDeck(kind, owner_id)
+            self.decks[key] = (now, deck)
+            self.decks.move_to_end(key)
+            while len(self.decks) > self.max_size:
+                self.decks.popitem(last=False)
+            return deck
+
+    def drop(self, kind, owner_id):
+        with self.lock:
+            self.decks.pop((kind, owner_id), None)
+
+    def clear(self):
+        with self.lock:
+            self.decks.clear()
+
+
+def refill_in_background(flask_app, deck):
+    with flask_app.app_context():
+        deck.refill()
+
+deck_refill_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='deck-refill')
+
+def already_swiped_statement(kind, owner_id, target_id):
+    # Um EXISTS por tabela de skip/like/match antigo, pelos índices (dono, alvo), numa consulta só.
+    # Só monta o SELECT: o asgi.py executa o mesmo na sessão assíncrona
+    checks = [db.select(model.id).where(owner_column == owner_id, target_column == target_id).exists()
+              for model, owner_column, target_column in seen_sources(kind) + [legacy_source(kind)]]
+    return db.select(db.or_(*checks))
+
+def already_swiped(kind, owner_id, target_id):
+    return db.session.scalar(already_swiped_statement(kind, owner_id, target_id))
+
+def current_from_deck(deck, model):
+    # Carrega o candidato do topo; ids que sumiram do banco ou que já foram avaliados por
+    # outro worker (o baralho só vê os swipes do próprio processo) são descartados
+    while True:
+        candidate_id = deck.peek()
+        if candidate_id is None:
+            return None
+        candidate = db.session.get(model, candidate_id)
+        if candidate is not None and not already_swiped(deck.kind, deck.owner_id, candidate_id):
+            return candidate
+        deck.discard(candidate_id)
+
+@bp.route("/dev/skip/<int:company_id>", methods=["GET"])
 def dev_skip(company_id):
     # Verifica se o dev está logado
     if 'developer_id' not in session:
         flash('Por favor, faça login primeiro.', 'warning')
-        return redirect(url_for('dev_login'))
+        return redirect(url_for('main.dev_login'))
 
     # Obtém o ID do dev a partir da sessão
     dev_id = session['developer_id']
+    deck = deck_cache.get('dev', dev_id)
 
-    # Registrar o skip da empresa
-    skip = DevSkipCompany(dev_id=dev_id, company_id=company_id)
-    db.session.add(skip)
-    db.session.commit()
+    # Registrar o skip da empresa (idempotente: pular de novo não duplica a linha)
+    record_swipe(DevSkipCompany, dev_id=dev_id, company_id=company_id)
+    deck.discard(company_id)
 
     # Busca a próxima empresa
-    next_empresa = get_next_empresa_for_dev(dev_id)
+    next_empresa = current_from_deck(deck, Company)
 
     if next_empresa:
         # Se houver uma próxima empresa, renderiza a página de match
-        return render_template("dev_match.html", empresa=next_empresa)
+        return render_template("dev_match.html", company=next_empresa)
     else:
         # Caso contrário, exibe uma mensagem informando que não há mais empresas
         flash('Nenhuma nova empresa disponível no momento.', 'info')
-        return redirect(url_for('dev_profile'))
+        return redirect(url_for('main.dev_profile'))
     
-@app.route("/company/skip/<int:dev_id>", methods=["GET"])
+@bp.route("/company/skip/<int:dev_id>", methods=["GET"])
 def company_skip(dev_id):
     # Verifica se a empresa está logada
     if 'company_id' not in session:
         flash('Por favor, faça login primeiro.', 'warning')
-        return redirect(url_for('company_login'))
+        return redirect(url_for('main.company_login'))
 
     # Obtém o ID da empresa a partir da sessão
     company_id = session['company_id']
+    deck = deck_cache.get('company', company_id)
 
     # Registrar o skip do desenvolvedor
-    skip = CompanySkipDev(company_id=company_id, dev_id=dev_id)
-    db.session.add(skip)
-    db.session.commit()
+    record_swipe(CompanySkipDev, company_id=company_id, dev_id=dev_id)
+    deck.discard(dev_id)
 
     # Busca o próximo desenvolvedor
-    next_dev = get_next_dev_for_company(company_id)
+    next_dev = current_from_deck(deck, Developer)
 
     if next_dev:
         # Se houver um próximo desenvolvedor, renderiza a página de match
@@ -414,110 +1380,814 @@ def company_skip(dev_id):
     else:
         # Caso contrário, exibe uma mensagem informando que não há mais desenvolvedores
         flash('Nenhum novo desenvolvedor disponível no momento.', 'info')
-        return redirect(url_for('company_profile'))
+        return redirect(url_for('main.company_profile'))
     
-@app.route("/company/match", methods=["GET", "POST"])
+@bp.route("/company/match", methods=["GET", "POST"])
 def company_match():
     # Verifica se a empresa está logada
     if 'company_id' not in session:
         flash('Por favor, faça login primeiro.', 'warning')
-        return redirect(url_for('company_login'))
+        return redirect(url_for('main.company_login'))
 
     # Obtém o ID da empresa armazenado na sessão
     company_id = session['company_id']
+    deck = deck_cache.get('company', company_id)
 
-    # Busca o próximo desenvolvedor que a empresa ainda não avaliou
-    next_dev = get_next_dev_for_company(company_id)
+    # Desenvolvedor atual = topo do baralho da empresa
+    next_dev = current_from_deck(deck, Developer)
     
     if request.method == "POST":
-        print(f"Next Developer: {next_dev}")
         if next_dev:  # Se o desenvolvedor estiver disponível
             if 'skip' in request.form:  # Se a empresa decidiu pular o desenvolvedor
-                print(f"Skipped Developer: {next_dev.name}")
                 
                 # Registra que a empresa pulou o desenvolvedor
-                # Você pode criar um registro ou lógica adicional aqui se necessário
+                record_swipe(CompanySkipDev, company_id=company_id, dev_id=next_dev.id)
+                deck.discard(next_dev.id)
 
                 # Busca o próximo desenvolvedor
-                next_dev = get_next_dev_for_company(company_id)
+                next_dev = current_from_deck(deck, Developer)
                 return render_template("company_match.html", dev=next_dev)
                 
             elif 'match' in request.form:  # Se a empresa decidiu dar match
-                print(f"Request Form: {request.form}")  # Debug
                 
-                if not check_if_match_exists(next_dev.id, company_id):  # Verifica se o match já existe
-                    new_match = Match(dev_id=next_dev.id, company_id=company_id)
-                    db.session.add(new_match)
-                    db.session.commit()
+                # Like da empresa; vira match se o desenvolvedor já tinha curtido a empresa
+                created, matched = record_like('company', company_id, next_dev.id)
+                deck.discard(next_dev.id)
+                if matched:
+                    notify_matches([(next_dev.id, company_id)])
                     flash(f'Match com o desenvolvedor {next_dev.name} realizado com sucesso!', 'success')
-                    print(f"Match created for Developer ID: {next_dev.id}, Company ID: {company_id}")  # Debug
+                elif created:
+                    flash(f'Você curtiu o desenvolvedor {next_dev.name}. O match acontece quando a curtida for recíproca.', 'success')
                 else:
-                    flash(f'Você já deu match com o desenvolvedor {next_dev.name}.', 'info')
+                    flash(f'Você já curtiu o desenvolvedor {next_dev.name}.', 'info')
                 
                 # Busca o próximo desenvolvedor após tentar dar match
-                next_dev = get_next_dev_for_company(company_id)
-                print(f"Next Developer after match: {next_dev}")  # Debug
+                next_dev = current_from_deck(deck, Developer)
 
                 # Verifica se há um próximo desenvolvedor
                 if next_dev:
                     return render_template("company_match.html", dev=next_dev)
                 else:
                     flash('Nenhum novo desenvolvedor disponível no momento.', 'info')
-                    return redirect(url_for('company_profile'))  # Redireciona para o perfil da empresa
+                    return redirect(url_for('main.company_profile'))  # Redireciona para o perfil da empresa
 
     # Renderiza a página de match com o desenvolvedor atual, se não for um POST
     return render_template("company_match.html", dev=next_dev)
 
 
 
-@app.route("/dev/match", methods=["GET", "POST"])
+@bp.route("/dev/match", methods=["GET", "POST"])
 def dev_match():
     # Verifica se o desenvolvedor está logado
-    print("Aqui 1")
     if 'developer_id' not in session:
-        print("Aqui 2")
         flash('Por favor, faça login primeiro.', 'warning')
-        return redirect(url_for('dev_login'))
+        return redirect(url_for('main.dev_login'))
 
     # Obtém o ID do desenvolvedor armazenado na sessão
     dev_id = session['developer_id']
+    deck = deck_cache.get('dev', dev_id)
 
-    # Busca a próxima empresa que o desenvolvedor ainda não avaliou
-    next_company = get_next_empresa_for_dev(dev_id)
+    # Empresa atual = topo do baralho do desenvolvedor
+    next_company = current_from_deck(deck, Company)
 
     # Verifique se há uma empresa disponível
     if not next_company:
-        print("Aqui 3")
         flash('Nenhuma nova empresa disponível ou houve um erro na busca.', 'warning')
-        return redirect(url_for('dev_profile'))
+        return redirect(url_for('main.dev_profile'))
 
     # Lógica de POST para match ou skip
     if request.method == "POST":
-        print("Aqui 4")
         if next_company:  # Se uma empresa estiver disponível
-            print("Aqui 5")
             if 'skip' in request.form:
                 return dev_skip(next_company.id)
             elif 'match' in request.form:
-                print("Aqui 6")
-                if not check_if_match_exists(dev_id, next_company.id):
-                    print("Aqui 7")
-                    new_match = Match(dev_id=dev_id, company_id=next_company.id)
-                    db.session.add(new_match)
-                    db.session.commit()
+                created, matched = record_like('dev', dev_id, next_company.id)
+                deck.discard(next_company.id)
+                if matched:
+                    notify_matches([(dev_id, next_company.id)])
                     flash(f'Match com a empresa {next_company.name} realizado com sucesso!', 'success')
+                elif created:
+                    flash(f'Você curtiu a empresa {next_company.name}. O match acontece quando a curtida for recíproca.', 'success')
                 else:
-                    flash(f'Você já deu match com a empresa {next_company.name}.', 'info')
-                next_company = get_next_empresa_for_dev(dev_id)
+                    flash(f'Você já curtiu a empresa {next_company.name}.', 'info')
+                next_company = current_from_deck(deck, Company)
 
     # Renderiza a página dev_match com os dados da empresa
     return render_template("dev_match.html", company=next_company)
 
 
 
-with app.app_context():
+def parse_swipe_batch(payload):
+    # {"swipes": [{"action": "skip" | "match", "target_id": 12}, ...]} -> (skips, likes)
+    swipes = payload.get('swipes') if isinstance(payload, dict) else None
+    if not isinstance(swipes, list) or not swipes:
+        raise ValueError('Envie uma lista "swipes" não vazia.')
+    if len(swipes) > current_app.config['SWIPE_BATCH_LIMIT']:
+        raise ValueError(f'No máximo {current_app.config["SWIPE_BATCH_LIMIT"]} swipes por chamada.')
+
+    skips, matches = set(), set()
+    for swipe in swipes:
+        target_id = swipe.get('target_id') if isinstance(swipe, dict) else None
+        action = swipe.get('action') if isinstance(swipe, dict) else None
+        if not isinstance(target_id, int) or isinstance(target_id, bool) or action not in ('skip', 'match'):
+            raise ValueError(f'Swipe inválido: {swipe}')
+        (skips if action == 'skip' else matches).add(target_id)
+    return sorted(skips), sorted(matches)
+
+def apply_swipe_batch(kind, owner_id, payload):
+    # Aplica o lote inteiro numa transação, com INSERTs em lote por tabela; os likes
+    # recíprocos viram matches com um único INSERT ... SELECT
+    skips, likes = parse_swipe_batch(payload)
+    pairs = [(owner_id, i) if kind == 'dev' else (i, owner_id) for i in likes]
+    lock_like_pairs(pairs)
+    if kind == 'dev':
+        insert_ignore_many(DevSkipCompany, [{'dev_id': owner_id, 'company_id': i} for i in skips])
+        insert_ignore_many(DevLikeCompany, [{'dev_id': d, 'company_id': c} for d, c in pairs])
+        reciprocal = db.select(CompanyLikeDev.dev_id, CompanyLikeDev.company_id).where(
+            CompanyLikeDev.dev_id == owner_id, CompanyLikeDev.company_id.in_(likes))
+    else:
+        insert_ignore_many(CompanySkipDev, [{'company_id': owner_id, 'dev_id': i} for i in skips])
+        insert_ignore_many(CompanyLikeDev, [{'dev_id': d, 'company_id': c} for d, c in pairs])
+        reciprocal = db.select(DevLikeCompany.dev_id, DevLikeCompany.company_id).where(
+            DevLikeCompany.company_id == owner_id, DevLikeCompany.dev_id.in_(likes))
+
+    new_matches = []
+    if likes:
+        # RETURNING traz só as linhas realmente inseridas (os conflitos ficam de fora)
+        new_matches = db.session.execute(insert_ignore_statement(Match).from_select(['dev_id', 'company_id'], reciprocal)
+                                         .returning(Match.dev_id, Match.company_id)).all()
+    db.session.commit()
+    notify_matches(new_matches)
+
+    deck = deck_cache.get(kind, owner_id)
+    for target_id in skips + likes:
+        deck.discard(target_id)
+    return {'skips': len(skips), 'likes': len(likes), 'matches': len(new_matches)}
+
+@bp.route("/api/dev/swipes", methods=["POST"])
+def dev_swipes_api():
+    if 'developer_id' not in session:
+        return jsonify(error='Por favor, faça login primeiro.'), 401
+    try:
+        return jsonify(apply_swipe_batch('dev', session['developer_id'], request.get_json(silent=True)))
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+@bp.route("/api/company/swipes", methods=["POST"])
+def company_swipes_api():
+    if 'company_id' not in session:
+        return jsonify(error='Por favor, faça login primeiro.'), 401
+    try:
+        return jsonify(apply_swipe_batch('company', session['company_id'], request.get_json(silent=True)))
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+@bp.route("/dev/notifications")
+def dev_notifications():
+    if 'developer_id' not in session:
+        return jsonify(error='Por favor, faça login primeiro.'), 401
+    return notification_response('dev', session['developer_id'])
+
+@bp.route("/company/notifications")
+def company_notifications():
+    if 'company_id' not in session:
+        return jsonify(error='Por favor, faça login primeiro.'), 401
+    return notification_response('company', session['company_id'])
+
+def search_developers(company_id, query, after_id=0, per_page=20):
+    # Busca booleana/prefixo sobre Developer.habilidades (índice invertido em memória),
+    # sem os devs que a empresa já pulou ou deu match. Paginação por cursor de id:
+    # devolve (desenvolvedores, próximo cursor ou None).
+    import numpy as np
+
+    dev_index, _ = get_skill_indexes()
+    matching = dev_index.search(query)
+    # Tira antes os já avaliados pelo bitmap da empresa; o banco confere o restante
+    matching = matching[~deck_cache.get('company', company_id).seen_ids().contains(matching)]
+    start = int(np.searchsorted(matching, after_id, side='right'))
+
+    found, more = [], False
+    while start < len(matching) and len(found) < per_page:
+        # A exclusão é feita no banco, em blocos pequenos (anti-join + IN limitado)
+        chunk = matching[start:start + per_page * 4].tolist()
+        start += len(chunk)
+        rows = candidate_devs_query(company_id).filter(Developer.id.in_(chunk)).all()
+        room = per_page - len(found)
+        more = len(rows) > room
+        found.extend(row[0] for row in rows[:room])
+    more = more or (len(found) == per_page and start < len(matching))
+
+    developers = Developer.query.filter(Developer.id.in_(found)).order_by(Developer.id).all() if found else []
+    return developers, (found[-1] if more else None)
+
+@bp.route("/company/search")
+def company_search():
+    if 'company_id' not in session:
+        flash('Por favor, faça login primeiro.', 'warning')
+        return redirect(url_for('main.company_login'))
+
+    company_id = session['company_id']
+    query = request.args.get('q', '').strip()
+    after_id = request.args.get('after', 0, type=int)
+
+    developers, next_after, error = [], None, None
+    if query:
+        try:
+            developers, next_after = search_developers(company_id, query, after_id, current_app.config['SEARCH_PAGE_SIZE'])
+        except ValueError as e:
+            error = f'Busca inválida: {str(e)}'
+
+    return render_template("company_search.html", query=query, developers=developers,
+                           next_after=next_after, error=error)
+
+
+
+def swipe_path_queries():
+    # Consultas executadas a cada swipe/login; os ids são arbitrários, só o plano importa
+    return {
+        'candidatos_empresa': candidate_companies_query(1).limit(1).statement,
+        'candidatos_dev': candidate_devs_query(1).limit(1).statement,
+        'likes_do_dev': DevLikeCompany.query.filter_by(dev_id=1).statement,
+        'likes_da_empresa': CompanyLikeDev.query.filter_by(company_id=1).statement,
+        'like_reciproco_dev': DevLikeCompany.query.filter_by(dev_id=1, company_id=1).statement,
+        'like_reciproco_empresa': CompanyLikeDev.query.filter_by(dev_id=1, company_id=1).statement,
+        'matches_do_dev': Match.query.filter_by(dev_id=1).filter(Match.id < 100).order_by(Match.id.desc()).limit(11).statement,
+        'matches_da_empresa': Match.query.filter_by(company_id=1).filter(Match.id < 100).order_by(Match.id.desc()).limit(11).statement,
+        'skips_do_dev': DevSkipCompany.query.filter_by(dev_id=1).statement,
+        'skips_da_empresa': CompanySkipDev.query.filter_by(company_id=1).statement,
+        'matches_antigos_dev': LegacyMatch.query.filter_by(dev_id=1).statement,
+        'matches_antigos_empresa': LegacyMatch.query.filter_by(company_id=1).statement,
+        'recomendacoes': Recommendation.query.filter_by(kind='dev', owner_id=1).order_by(Recommendation.position).statement,
+        'login_dev': Developer.query.filter_by(email='x').statement,
+        'login_empresa': Company.query.filter_by(email='x').statement,
+    }
+
+def find_query_plan_scans():
+    # Roda EXPLAIN QUERY PLAN em cada consulta do caminho de swipe e devolve
+    # {nome: [passos]} das que caíram num SCAN (varredura da tabela inteira)
+    scans = {}
+    for name, statement in swipe_path_queries().items():
+        sql = str(statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+        plan = db.session.execute(db.text('EXPLAIN QUERY PLAN ' + sql)).all()
+        steps = [row[-1] for row in plan if row[-1].startswith('SCAN')]
+        if steps:
+            scans[name] = steps
+    return scans
+
+@bp.cli.command('upgrade-db')
+def upgrade_db_command():
+    # flask --app main:create_app upgrade-db: cria as tabelas e migra o esquema. Roda uma vez
+    # por deploy, antes de subir os workers (importar o app não toca mais no esquema)
     db.create_all()
+    upgrade_schema()
+    click.echo('Esquema atualizado.')
+
+@bp.cli.command('check-query-plans')
+def check_query_plans_command():
+    # Regressão de índices: falha (exit 1) se alguma consulta de swipe fizer SCAN
+    if db.engine.dialect.name != 'sqlite':
+        click.echo('check-query-plans usa EXPLAIN QUERY PLAN e só roda no SQLite.')
+        raise SystemExit(1)
+    scans = find_query_plan_scans()
+    for name, steps in scans.items():
+        click.echo(f'{name}: {"; ".join(steps)}')
+    if scans:
+        raise SystemExit(1)
+    click.echo('Nenhum SCAN nas consultas de swipe.')
+
+def archive_skips_batch(kind, cutoff, batch_size):
+    # Move até batch_size skips (os mais antigos, em ordem de id) anteriores a cutoff para o
+    # SkipArchive. Tudo é lido e calculado antes; a transação de escrita só troca os blobs
+    # dos donos do lote e apaga as linhas pelo id. Retorna (linhas arquivadas, ms com a escrita).
+    # Um arquivador por vez: os blobs são lidos e regravados sem trava.
+    from seen import Bitmap
+
+    model, owner_column, target_column = seen_sources(kind)[0]
+    counted = engagement_mark(model)  # só o que o rollup de engajamento já somou
+    # A linha de maior id fica: sem AUTOINCREMENT o SQLite dá ao próximo skip max(id) + 1, e uma
+    # tabela esvaziada voltaria ao id 1, abaixo das marcas (EngagementMark, SeenSet, RecommendationState)
+    newest = db.session.query(db.func.max(model.id)).scalar() or 0
+    rows = db.session.query(model.id, owner_column, target_column, model.skip_date).order_by(model.id).limit(batch_size).all()
+    old = []
+    for row in rows:
+        if row[3] is not None and row[3] >= cutoff or row[0] > counted or row[0] >= newest:
+            break  # ids crescem com o tempo: daqui em diante é tudo mais novo
+        old.append(row)
+    if not old:
+        db.session.commit()
+        return 0, 0.0
+
+    targets = defaultdict(list)
+    for _, owner_id, target_id, _ in old:
+        targets[owner_id].append(target_id)
+    stored = {archive.owner_id: archive for archive in
+              SkipArchive.query.filter(SkipArchive.kind == kind, SkipArchive.owner_id.in_(list(targets)))}
+    archives = []
+    for owner_id, target_ids in targets.items():
+        archive = stored.get(owner_id)
+        bitmap = Bitmap.from_bytes(archive.bitmap) if archive else Bitmap()
+        bitmap.add(target_ids)
+        archives.append({'kind': kind, 'owner_id': owner_id, 'bitmap': bitmap.to_bytes(),
+                         'rows': (archive.rows if archive else 0) + len(target_ids), 'archived_at': datetime.utcnow()})
+    db.session.commit()  # encerra a leitura
+
+    start = time.perf_counter()
+    db.session.execute(upsert_statement(SkipArchive, ['bitmap', 'rows', 'archived_at']), archives)
+    db.session.execute(db.delete(model).where(model.id.in_([row[0] for row in old])))
+    db.session.commit()
+    return len(old), (time.perf_counter() - start) * 1000
+
+def archive_skips(kind, cutoff, batch_size, pause=0.0, max_batches=0):
+    # Lotes até acabar o que é anterior a cutoff, com uma pausa entre eles para os swipes
+    # gravarem. Retorna (linhas arquivadas, [ms de escrita por lote])
+    archived, lock_ms = 0, []
+    while not max_batches or len(lock_ms) < max_batches:
+        moved, elapsed = archive_skips_batch(kind, cutoff, batch_size)
+        if not moved:
+            break
+        archived += moved
+        lock_ms.append(elapsed)
+        if moved < batch_size:
+            break
+        time.sleep(pause)
+    return archived, lock_ms
+
+@bp.cli.command('archive-skips')
+@click.option('--horizon-days', type=float, help='Padrão: SKIP_ARCHIVE_HORIZON_DAYS.')
+@click.option('--batch', type=int, help='Linhas por lote (padrão: SKIP_ARCHIVE_BATCH).')
+@click.option('--pause', type=float, default=0.05, help='Segundos entre lotes.')
+@click.option('--max-batches', type=int, default=0, help='Para depois de N lotes (0 = até acabar).')
+def archive_skips_command(horizon_days, batch, pause, max_batches):
+    # flask --app main:create_app archive-skips: roda com o app no ar (cron/timer); skips sem data
+    # (gravados antes da coluna skip_date existir) são arquivados primeiro
+    horizon_days = current_app.config['SKIP_ARCHIVE_HORIZON_DAYS'] if horizon_days is None else horizon_days
+    cutoff = datetime.utcnow() - timedelta(days=horizon_days)
+    rollup_engagement(current_app.config['ENGAGEMENT_ROLLUP_BATCH'])  # arquiva só skips já contados
+    for kind in ('dev', 'company'):
+        start = time.perf_counter()
+        archived, lock_ms = archive_skips(kind, cutoff, batch or current_app.config['SKIP_ARCHIVE_BATCH'], pause, max_batches)
+        worst = f', escrita por lote: mediana {statistics.median(lock_ms):.1f} ms, máx. {max(lock_ms):.1f} ms' if lock_ms else ''
+        click.echo(f'{kind}: {archived} skips arquivados em {len(lock_ms)} lotes, '
+                   f'{time.perf_counter() - start:.1f} s{worst}')
+
+def engagement_mark(model):
+    state = db.session.get(EngagementMark, model.__tablename__)
+    return state.mark if state is not None else 0
+
+def add_engagement(daily, totals):
+    # daily: {(lado, dono, dia): {contador: n}}, totals: {(lado, dono): {contador: n}}
+    for model, counts in ((EngagementDaily, daily), (EngagementTotal, totals)):
+        keys = [column.name for column in model.__table__.primary_key]
+        rows = [{**dict(zip(keys, key)), **dict.fromkeys(ENGAGEMENT_COUNTERS, 0), **values} for key, values in counts.items()]
+        for chunk in chunks(rows, 5000):
+            db.session.execute(increment_statement(model, ENGAGEMENT_COUNTERS), chunk)
+
+def rollup_engagement_batch(model, date_column, targets, cutoff, batch_size):
+    # Soma nos rollups até batch_size linhas de model acima da marca, parando na primeira
+    # gravada depois de cutoff: no PostgreSQL, um id menor pode ser de uma transação que
+    # ainda não terminou. Contadores e marca mudam na mesma transação, então cada linha
+    # entra uma vez só. Retorna quantas linhas foram somadas.
+    mark = engagement_mark(model)
+    rows = db.session.query(model.id, date_column, *[owner_column for _, owner_column, _ in targets]) \
+        .filter(model.id > mark).order_by(model.id).limit(batch_size).all()
+    daily = defaultdict(lambda: defaultdict(int))
+    totals = defaultdict(lambda: defaultdict(int))
+    upper, counted = mark, 0
+    for row_id, date, *owners in rows:
+        if date is not None and date >= cutoff:
+            break
+        for (kind, _, counter), owner_id in zip(targets, owners):
+            totals[kind, owner_id][counter] += 1
+            if date is not None:  # sem data (skips anteriores à coluna skip_date): só no total
+                daily[kind, owner_id, date.date()][counter] += 1
+        upper, counted = row_id, counted + 1
+    if not counted:
+        db.session.commit()
+        return 0
+    add_engagement(daily, totals)
+    db.session.execute(upsert_statement(EngagementMark, ['mark', 'updated_at']),
+                       {'source': model.__tablename__, 'mark': upper, 'updated_at': datetime.utcnow()})
+    db.session.commit()
+    return counted
+
+def rollup_engagement(batch_size, max_batches=0):
+    # Delta desde a última rodada, tabela por tabela. Retorna {tabela: linhas somadas}.
+    # Um rollup por vez (as marcas são lidas e regravadas sem trava).
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['ENGAGEMENT_ROLLUP_LAG'])
+    added = {}
+    for model, date_column, targets in ENGAGEMENT_SOURCES:
+        added[model.__tablename__] = batches = 0
+        while not max_batches or batches < max_batches:
+            rows = rollup_engagement_batch(model, date_column, targets, cutoff, batch_size)
+            added[model.__tablename__] += rows
+            batches += 1
+            if rows < batch_size:
+                break
+        # Tabela sem nada novo: a marca continua, mas o painel sabe que ela foi conferida agora
+        db.session.execute(upsert_statement(EngagementMark, ['updated_at']),
+                           {'source': model.__tablename__, 'mark': engagement_mark(model), 'updated_at': datetime.utcnow()})
+        db.session.commit()
+    return added
+
+def backfill_engagement(batch_size):
+    # Refaz os rollups do zero: apaga tudo, conta os skips arquivados (sem data, só nos totais)
+    # e soma as tabelas de swipe desde o id 0. O painel fica incompleto até terminar.
+    from seen import Bitmap
+
+    for model in (EngagementDaily, EngagementTotal, EngagementMark):
+        db.session.execute(db.delete(model))
+    totals = defaultdict(lambda: defaultdict(int))
+    for archive in SkipArchive.query.yield_per(1000):
+        other = 'company' if archive.kind == 'dev' else 'dev'
+        totals[archive.kind, archive.owner_id]['skips_given'] += archive.rows
+        for target_id in Bitmap.from_bytes(archive.bitmap).ids().tolist():
+            totals[other, target_id]['skips_received'] += 1
+    add_engagement({}, totals)
+    db.session.commit()
+    return rollup_engagement(batch_size)
+
+@bp.cli.command('rollup-engagement')
+@click.option('--batch', type=int, help='Linhas por transação (padrão: ENGAGEMENT_ROLLUP_BATCH).')
+@click.option('--backfill', is_flag=True, help='Apaga os rollups e recalcula todo o histórico.')
+def rollup_engagement_command(batch, backfill):
+    # flask --app main:create_app rollup-engagement: em cron/timer, com o app no ar (ex.: a cada minuto).
+    # --backfill uma vez nos bancos que já tinham swipes
+    start = time.perf_counter()
+    batch = batch or current_app.config['ENGAGEMENT_ROLLUP_BATCH']
+    added = backfill_engagement(batch) if backfill else rollup_engagement(batch)
+    for source, rows in added.items():
+        click.echo(f'{source}: {rows} linhas somadas')
+    click.echo(f'{time.perf_counter() - start:.1f} s')
+
+def engagement_summary(kind, owner_id, days):
+    # Totais + os últimos `days` dias do dono: lê no máximo 1 + days linhas pela chave primária,
+    # não importa o tamanho do histórico de swipes
+    today = datetime.utcnow().date()
+    since = today - timedelta(days=days - 1)
+    total = db.session.get(EngagementTotal, (kind, owner_id))
+    rows = {row.day: row for row in EngagementDaily.query.filter(
+        EngagementDaily.kind == kind, EngagementDaily.owner_id == owner_id, EngagementDaily.day >= since)}
+
+    def counters(row):
+        values = {name: getattr(row, name) if row is not None else 0 for name in ENGAGEMENT_COUNTERS}
+        received = values['likes_received'] + values['skips_received']
+        values['skip_rate'] = round(values['skips_received'] / received, 4) if received else None
+        return values
+
+    daily = []
+    for offset in range(days):
+        day = since + timedelta(days=offset)
+        daily.append(dict(day=day.isoformat(), **counters(rows.get(day))))
+    return {'totals': counters(total), 'daily': daily}
+
+def engagement_updated_at():
+    # Até quando os rollups estão completos: a tabela conferida há mais tempo
+    return db.session.query(db.func.min(EngagementMark.updated_at)).scalar()
+
+@bp.route("/company/analytics")
+def company_analytics():
+    if 'company_id' not in session:
+        return jsonify(error='Por favor, faça login primeiro.'), 401
+    company_id = session['company_id']
+    days = min(max(request.args.get('days', current_app.config['ENGAGEMENT_DAYS'], type=int), 1),
+               current_app.config['ENGAGEMENT_MAX_DAYS'])
+    updated_at = engagement_updated_at()
+    # Só muda quando o rollup roda (ou vira o dia)
+    etag = http_cache.etag('company_analytics', company_id, days, updated_at, datetime.utcnow().date())
+    not_modified = http_cache.not_modified(etag)
+    if not_modified is not None:
+        return not_modified
+    summary = engagement_summary('company', company_id, days)
+    summary['updated_at'] = updated_at.isoformat() if updated_at else None
+    return http_cache.revalidate(jsonify(summary), etag)
+
+def profile_hash(text):
+    return hashlib.md5((text or '').encode('utf-8')).hexdigest()
+
+def swipe_marks(kind):
+    # {dono: [maior id de skip, maior id de like]} de um lado inteiro, por agregação no banco
+    marks = {}
+    for i, (model, owner_column, _) in enumerate(seen_sources(kind)):
+        for owner_id, mark in db.session.query(owner_column, db.func.max(model.id)).group_by(owner_column):
+            marks.setdefault(owner_id, [0, 0])[i] = mark
+    return marks
+
+def changed_owners(kind, full=False):
+    # Usuários a recalcular: perfil ou histórico diferente do último cálculo (todos com full).
+    # Retorna [(id, texto, hash do texto, skip_mark, like_mark)]
+    model, text_column = (Developer, Developer.habilidades) if kind == 'dev' else (Company, Company.descricao)
+    states = {}
+    if not full:
+        rows = db.session.query(RecommendationState.owner_id, RecommendationState.profile_hash,
+                                RecommendationState.skip_mark, RecommendationState.like_mark).filter_by(kind=kind)
+        states = {owner_id: tuple(state) for owner_id, *state in rows}
+    marks = swipe_marks(kind)
+    changed = []
+    for owner_id, text in db.session.query(model.id, text_column).yield_per(10000):
+        current = (profile_hash(text), *marks.get(owner_id, (0, 0)))
+        if states.get(owner_id) != current:
+            changed.append((owner_id, text) + current)
+    return changed
+
+precompute_app = None  # app do comando, herdado pelos filhos do pool (fork) ou criado neles
+precompute_error = None  # falha ao preparar o processo filho, devolvida por cada tarefa
+
+def precompute_context():
+    # fork: os filhos herdam o app e a matriz TF-IDF já pronta. É pedido explicitamente (o padrão
+    # muda entre versões do Python e sistemas); onde não há fork (Windows), spawn
+    import multiprocessing
+
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+
+def init_precompute_worker(config):
+    # Processo filho do pool. Uma exceção aqui faria o Pool recriar o processo sem parar e o
+    # comando esperar para sempre: ela fica guardada e as tarefas a devolvem ao pai
+    global precompute_app, precompute_error
+    try:
+        if precompute_app is None:  # spawn: sem a memória do pai, monta o app com a mesma configuração
+            precompute_app = create_app(config)
+        with precompute_app.app_context():
+            db.engine.dispose(close=False)  # as conexões herdadas no fork são do pai
+    except Exception as e:
+        precompute_error = f'{type(e).__name__}: {e}'
+
+def compute_recommendations(kind, owners, top_k):
+    # Top-K ainda não avaliados de cada usuário do bloco (linhas para a tabela recommendation)
+    dev_index, company_index = get_skill_indexes()
+    index = company_index if kind == 'dev' else dev_index
+    rows = []
+    for owner_id, text, _, _, _ in owners:
+        ids, scores = index.top(text, top_k, exclude=load_seen(kind, owner_id))
+        rows.extend({'kind': kind, 'owner_id': owner_id, 'position': position, 'target_id': target_id, 'score': score}
+                    for position, (target_id, score) in enumerate(zip(ids.tolist(), scores.tolist())))
+    return rows
+
+def precompute_shard(task):
+    # Roda no processo filho do pool
+    if precompute_error is not None:
+        raise RuntimeError(f'processo do pool não iniciou: {precompute_error}')
+    kind, owners, top_k = task
+    with precompute_app.app_context():
+        return kind, owners, compute_recommendations(kind, owners, top_k)
+
+def save_recommendations(kind, owners, rows):
+    # Troca as recomendações e o estado dos usuários do bloco numa transação, com INSERTs em lote
+    owner_ids = [owner[0] for owner in owners]
+    for model in (Recommendation, RecommendationState):
+        db.session.execute(db.delete(model).where(model.kind == kind, model.owner_id.in_(owner_ids)))
+    # Insert do Core (executemany direto), bem mais barato que o bulk insert do ORM
+    if rows:
+        db.session.execute(Recommendation.__table__.insert(), rows)
+    db.session.execute(RecommendationState.__table__.insert(), [
+        {'kind': kind, 'owner_id': owner_id, 'profile_hash': text_hash, 'skip_mark': skip_mark, 'like_mark': like_mark}
+        for owner_id, _, text_hash, skip_mark, like_mark in owners
+    ])
+    db.session.commit()
 
-if __name__ == '__main__':
+@bp.cli.command('precompute-decks')
+@click.option('--kind', type=click.Choice(['dev', 'company', 'all']), default='all')
+@click.option('--top-k', type=int, help='Padrão: RECOMMENDATION_TOP_K.')
+@click.option('--workers', type=int, help='Processos do pool (padrão: número de CPUs).')
+@click.option('--chunk', type=int, default=200, help='Usuários por tarefa.')
+@click.option('--full', is_flag=True, help='Recalcula todos, não só quem mudou.')
+@click.option('--timeout', type=float, default=600, help='Segundos sem nenhum bloco pronto antes de desistir.')
+def precompute_decks_command(kind, top_k, workers, chunk, full, timeout):
+    # flask --app main:create_app precompute-decks: top-K candidatos ainda não avaliados de cada usuário,
+    # calculados num pool de processos e gravados em lote na tabela recommendation.
+    # Um erro num bloco interrompe o comando (os blocos já gravados ficam)
+    import multiprocessing
+    global precompute_app
+
+    precompute_app = current_app._get_current_object()
+    context = precompute_context()
+    top_k = top_k or current_app.config['RECOMMENDATION_TOP_K']
+    for index in get_skill_indexes():
+        with index.lock:
+            index.prepare()  # matriz pronta antes do fork: os filhos compartilham a mesma cópia
+    for current in (['dev', 'company'] if kind == 'all' else [kind]):
+        start = time.perf_counter()
+        owners = changed_owners(current, full)
+        db.session.commit()  # encerra a leitura antes de abrir o pool
+        tasks = [(current, owners[i:i + chunk], top_k) for i in range(0, len(owners), chunk)]
+        written = 0
+        if tasks:
+            with context.Pool(workers, initializer=init_precompute_worker, initargs=(dict(current_app.config),)) as pool:
+                results = pool.imap_unordered(precompute_shard, tasks)
+                for _ in tasks:
+                    # Um processo morto (ex.: sem memória) perde o bloco sem erro: sem o timeout, esperaria para sempre
+                    try:
+                        shard_kind, shard, rows = results.next(timeout)
+                    except multiprocessing.TimeoutError:
+                        raise click.ClickException(f'{current}: nenhum bloco terminou em {timeout:g} s; '
+                                                   f'{written} recomendações já gravadas.')
+                    save_recommendations(shard_kind, shard, rows)
+                    written += len(rows)
+        click.echo(f'{current}: {len(owners)} usuários recalculados, {written} recomendações '
+                   f'em {time.perf_counter() - start:.1f} s')
+
+# Importação/exportação em lote: (modelo, formulário de cadastro, colunas do arquivo)
+BULK_KINDS = {
+    'dev': (Developer, DevForm, ('name', 'email', 'password', 'cel', 'habilidades')),
+    'company': (Company, CompanyForm, ('name', 'email', 'password', 'telefone', 'descricao')),
+}
+
+def bulk_validator(kind):
+    # Um formulário reaproveitado em todas as linhas: as mesmas regras do cadastro (sem CSRF),
+    # mais o tamanho das colunas. validate(dict) -> (valores, None) ou (None, mensagem)
+    model, form_class, columns = BULK_KINDS[kind]
+    form = form_class(formdata=None, meta={'csrf': False})
+    fields = [(form[name], model.__table__.c[name].type.length) for name in columns]
+
+    def validate(record):
+        values, errors = {}, []
+        for field, length in fields:
+            value = record.get(field.name)
+            field.process_formdata(['' if value is None else str(value)])
+            if not field.validate(form):
+                errors.append(f'{field.name}: {" ".join(field.errors)}')
+            elif length and field.name != 'password' and len(field.data) > length:
+                errors.append(f'{field.name}: no máximo {length} caracteres.')
+            values[field.name] = field.data
+        if errors:
+            return None, '; '.join(errors)
+        return values, None
+    return validate
+
+def new_import_summary():
+    return {'rows': 0, 'imported': 0, 'rejected': 0}
+
+def import_records(kind, records, chunk_size, reject, summary=None):
+    # records: (linha, dict) de read_records; reject(linha, e-mail, mensagem) recebe cada linha recusada.
+    # Cada bloco vira um INSERT ... ON CONFLICT DO NOTHING em lote: o índice único de e-mail
+    # descarta os já cadastrados e o RETURNING diz quais entraram. Memória: um bloco por vez.
+    # summary (de new_import_summary) é atualizado bloco a bloco: se a leitura falhar no meio
+    # (BadFile), o chamador ainda sabe quantas linhas dos blocos anteriores já foram gravadas
+    model = BULK_KINDS[kind][0]
+    table = model.__table__
+    statement = insert_ignore_statement(table).returning(table.c.id, table.c.email)
+    validate = bulk_validator(kind)
+    summary = new_import_summary() if summary is None else summary
+    for chunk in chunks(records, chunk_size):
+        rows, lines, emails = [], [], set()
+        for line, record in chunk:
+            summary['rows'] += 1
+            if isinstance(record, ValueError):
+                values, error = None, str(record)
+            else:
+                values, error = validate(record)
+            if error is None and values['email'] in emails:
+                error = 'e-mail repetido no arquivo.'
+            if error is not None:
+                summary['rejected'] += 1
+                reject(line, record.get('email') if isinstance(record, dict) else None, error)
+                continue
+            emails.add(values['email'])
+            rows.append(values)
+            lines.append(line)
+        if not rows:
+            continue
+
+        # Senhas já com hash (ex.: vindas do export-users) entram como estão; as em texto puro
+        # passam pelo pool de senhas, e o scrypt passa a ser o custo dominante da importação
+        plain = [i for i, row in enumerate(rows) if not is_hashed(row['password'])]
+        if plain:
+            for i, password in zip(plain, get_password_pool().hash_many([rows[i]['password'] for i in plain])):
+                rows[i]['password'] = password
+
+        inserted = {email: row_id for row_id, email in db.session.execute(statement, rows)}
+        db.session.commit()
+        summary['imported'] += len(inserted)
+        for line, row in zip(lines, rows):
+            if row['email'] not in inserted:
+                summary['rejected'] += 1
+                reject(line, row['email'], 'e-mail já cadastrado.')
+    return summary
+
+def export_rows(engine, kind, chunk_size):
+    # Linhas (id, colunas do arquivo) em ordem de id por um cursor no servidor (stream_results):
+    # o PostgreSQL manda chunk_size linhas por vez; no SQLite o cursor já lê sob demanda.
+    # Conexão própria, fora da sessão: a resposta HTTP continua depois do fim da requisição
+    model, _, columns = BULK_KINDS[kind]
+    table = model.__table__
+    query = db.select(table.c.id, *[table.c[name] for name in columns]).order_by(table.c.id)
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+        for partition in result.partitions():
+            yield from partition
+
+def bulk_columns(kind):
+    return ('id',) + BULK_KINDS[kind][2]
+
+def bulk_api_allowed():
+    token = current_app.config['BULK_API_TOKEN']
+    given = request.headers.get('Authorization', '')
+    return bool(token) and hmac.compare_digest(given.encode('utf-8'), f'Bearer {token}'.encode('utf-8'))
+
+@bp.route("/api/<any(dev, company):kind>/import", methods=["POST"])
+def bulk_import_api(kind):
+    # Corpo em CSV (text/csv) ou NDJSON (application/x-ndjson), lido em streaming
+    if not bulk_api_allowed():
+        return jsonify(error='Acesso negado.'), 403
+    fmt = request.args.get('format') or guess_format(request.mimetype)
+    if fmt not in FORMATS:
+        return jsonify(error=f'Formato desconhecido: {fmt}'), 400
+    errors = []
+    max_errors = current_app.config['BULK_MAX_ERRORS']
+
+    def reject(line, email, message):
+        if len(errors) < max_errors:
+            errors.append({'line': line, 'email': email, 'error': message})
+
+    summary = new_import_summary()
+    try:
+        import_records(kind, read_records(text_lines(request.stream), fmt), current_app.config['BULK_CHUNK_SIZE'],
+                       reject, summary)
+    except BadFile as e:
+        # Os blocos anteriores ao erro já foram gravados: o cliente corrige o arquivo e reenvia
+        # (os e-mails já importados voltam como "já cadastrado"); o bloco do erro não entrou
+        db.session.rollback()
+        return jsonify(error=f'Arquivo inválido: {e}', line=e.line, errors=errors, **summary), 400
+    except PasswordPoolBusy as e:
+        db.session.rollback()
+        return jsonify(error=str(e), errors=errors, **summary), 503
+    summary['errors'] = errors  # as primeiras BULK_MAX_ERRORS; o total está em "rejected"
+    return jsonify(summary)
+
+@bp.route("/api/<any(dev, company):kind>/export")
+def bulk_export_api(kind):
+    if not bulk_api_allowed():
+        return jsonify(error='Acesso negado.'), 403
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS:
+        return jsonify(error=f'Formato desconhecido: {fmt}'), 400
+    rows = export_rows(db.engine, kind, current_app.config['BULK_CHUNK_SIZE'])
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    filename = f'{"developers" if kind == "dev" else "companies"}.{fmt}'
+    return Response(write_records(rows, bulk_columns(kind), fmt), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+def open_file(path, mode):
+    # '-' = stdin/stdout. Leitura em binário, para text_lines decodificar linha a linha (aceita o
+    # BOM das planilhas e um erro de codificação aponta a linha); escrita com newline='' como o csv pede
+    if mode == 'r':
+        return sys.stdin.buffer if path == '-' else open(path, 'rb')
+    if path == '-':
+        return io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='')
+    return open(path, mode, encoding='utf-8', newline='')
+
+@bp.cli.command('import-users')
+@click.argument('kind', type=click.Choice(['dev', 'company']))
+@click.argument('source')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Padrão: pela extensão do arquivo (csv).')
+@click.option('--errors', 'errors_path', help='Grava as linhas recusadas em NDJSON (padrão: stderr).')
+@click.option('--chunk', type=int, help='Linhas por lote (padrão: BULK_CHUNK_SIZE).')
+def import_users_command(kind, source, fmt, errors_path, chunk):
+    # flask --app main:create_app import-users dev devs.csv: colunas name,email,password,cel,habilidades
+    # (company: name,email,password,telefone,descricao); '-' lê da entrada padrão
+    fmt = fmt or guess_format(source)
+    errors = open_file(errors_path, 'w') if errors_path else None
+
+    def reject(line, email, message):
+        if errors is not None:
+            errors.write(json.dumps({'line': line, 'email': email, 'error': message}, ensure_ascii=False) + '\n')
+        else:
+            click.echo(f'linha {line} ({email}): {message}', err=True)
+
+    start = time.perf_counter()
+    summary, failure = new_import_summary(), None
+    try:
+        with open_file(source, 'r') as stream:
+            import_records(kind, read_records(text_lines(stream), fmt), chunk or current_app.config['BULK_CHUNK_SIZE'], reject, summary)
+    except BadFile as e:
+        db.session.rollback()
+        failure = e
+    if errors is not None:
+        errors.close()
+    elapsed = time.perf_counter() - start
+    click.echo(f'{kind}: {summary["rows"]} linhas, {summary["imported"]} importadas, {summary["rejected"]} recusadas '
+               f'em {elapsed:.1f} s ({summary["rows"] / max(elapsed, 1e-9):.0f} linhas/s)', err=True)
+    if failure is not None:
+        raise click.ClickException(f'arquivo inválido, importação interrompida: {failure}')
+
+@bp.cli.command('export-users')
+@click.argument('kind', type=click.Choice(['dev', 'company']))
+@click.argument('destination')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Padrão: pela extensão do arquivo (csv).')
+def export_users_command(kind, destination, fmt):
+    # flask --app main:create_app export-users company - --format ndjson: '-' escreve na saída padrão.
+    # As senhas saem com hash e o import-users as aceita como estão
+    fmt = fmt or guess_format(destination)
+    start = time.perf_counter()
+    with open_file(destination, 'w') as out:
+        for text in write_records(export_rows(db.engine, kind, current_app.config['BULK_CHUNK_SIZE']), bulk_columns(kind), fmt):
+            out.write(text)
+    click.echo(f'{kind}: exportado em {time.perf_counter() - start:.1f} s', err=True)
 
+if __name__ == '__main__':
+    # Desenvolvimento: cria/migra o esquema e sobe o servidor de debug
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
     app.run(debug=True, port=6001)
\ No newline at end of file
@@ -0,0 +1,240 @@
+# Instrumentação por requisição: latência por rota, consultas SQL (quantidade e tempo)
+# e tempo de renderização de templates, expostos em /metrics no formato texto do Prometheus.
+# Opcionalmente amostra requisições com cProfile e guarda os perfis das mais lentas.
+import cProfile
+import heapq
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+
+from flask import Response, before_render_template, current_app, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.series = defaultdict(lambda: [[0] * len(buckets), 0, 0.0])  # buckets, count, sum
+        self.lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self.lock:
+            counts, _, _ = series = self.series[label_values]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            items = sorted(self.series.items())
+        for label_values, (counts, count, total) in items:
+            labels = ','.join(f'{k}="{escape(v)}"' for k, v in zip(self.labels, label_values))
+            prefix = labels + ',' if labels else ''
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f'{self.name}_count{{{labels}}} {count}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def render(self):
+        return [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter', f'{self.name} {self.value}']
+
+
+class Gauge:
+    # Valor atual e pico desde o início do processo
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def add(self, amount):
+        with self.lock:
+            self.value += amount
+            self.peak = max(self.peak, self.value)
+
+    def render(self):
+        return [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} gauge', f'{self.name} {self.value}',
+                f'# HELP {self.name}_peak Pico de {self.name}.', f'# TYPE {self.name}_peak gauge',
+                f'{self.name}_peak {self.peak}']
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    def __init__(self):
+        self.request_seconds = Histogram(
+            'tinderjobs_request_duration_seconds', 'Latência das requisições por rota.',
+            ('endpoint', 'method', 'status'), SECONDS_BUCKETS)
+        self.request_queries = Histogram(
+            'tinderjobs_request_sql_queries', 'Consultas SQL executadas por requisição.',
+            ('endpoint',), QUERY_COUNT_BUCKETS)
+        self.request_sql_seconds = Histogram(
+            'tinderjobs_request_sql_seconds', 'Tempo gasto em SQL por requisição.',
+            ('endpoint',), SECONDS_BUCKETS)
+        self.template_seconds = Histogram(
+            'tinderjobs_template_render_seconds', 'Tempo de renderização por template.',
+            ('template',), SECONDS_BUCKETS)
+        self.password_queue_seconds = Histogram(
+            'tinderjobs_password_queue_seconds', 'Espera na fila do pool de senhas.',
+            ('operation',), SECONDS_BUCKETS)
+        self.password_work_seconds = Histogram(
+            'tinderjobs_password_work_seconds', 'Tempo de CPU do hash/verificação de senha.',
+            ('operation',), SECONDS_BUCKETS)
+        self.sql_queries = Counter(
+            'tinderjobs_sql_queries_total', 'Consultas SQL, incluindo as de threads em segundo plano.')
+        self.sql_seconds = Counter(
+            'tinderjobs_sql_seconds_total', 'Tempo total em SQL, incluindo threads em segundo plano.')
+        self.db_connections = Gauge(
+            'tinderjobs_db_connections_in_use', 'Conexões do pool do banco em uso neste processo.')
+        self.fragment_cache_hits = Counter(
+            'tinderjobs_fragment_cache_hits_total', 'Fragmentos de perfil servidos do cache.')
+        self.fragment_cache_misses = Counter(
+            'tinderjobs_fragment_cache_misses_total', 'Fragmentos de perfil renderizados.')
+        self.http_not_modified = Counter(
+            'tinderjobs_http_not_modified_total', 'Páginas respondidas com 304 sem renderizar.')
+        self.http_bytes_saved = Counter(
+            'tinderjobs_http_compression_saved_bytes_total', 'Bytes economizados pela compressão.')
+        self.collectors = [self.request_seconds, self.request_queries, self.request_sql_seconds,
+                           self.template_seconds, self.password_queue_seconds, self.password_work_seconds,
+                           self.sql_queries, self.sql_seconds, self.db_connections, self.fragment_cache_hits,
+                           self.fragment_cache_misses, self.http_not_modified, self.http_bytes_saved]
+        self.profiles = []  # heap (duração, arquivo) das requisições mais lentas amostradas
+        self.profiles_lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('PROFILE_SAMPLE_RATE', 0.0)  # fração de requisições perfiladas
+        app.config.setdefault('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+        app.config.setdefault('PROFILE_KEEP', 20)  # quantos perfis (os mais lentos) manter
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.teardown_request(self.teardown_request)
+        before_render_template.connect(self.before_render, app)
+        template_rendered.connect(self.after_render, app)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+        app.extensions['metrics'] = self
+
+    def instrument_engine(self, engine):
+        event.listen(engine, 'before_cursor_execute', self.before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self.after_cursor_execute)
+        event.listen(engine, 'checkout', lambda *args: self.db_connections.add(1))
+        event.listen(engine, 'checkin', lambda *args: self.db_connections.add(-1))
+
+    # Requisições
+
+    def before_request(self):
+        g.metrics_start = time.perf_counter()
+        g.sql_count = 0
+        g.sql_seconds = 0.0
+        g.render_starts = []
+        g.profiler = None
+        if random.random() < current_app.config['PROFILE_SAMPLE_RATE']:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                return  # outro perfil já ativo nesta thread/processo
+            g.profiler = profiler
+
+    def after_request(self, response):
+        g.metrics_status = response.status_code
+        return response
+
+    def teardown_request(self, exc):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        endpoint = request.endpoint or 'sem_rota'
+        status = g.get('metrics_status', 500)
+        self.request_seconds.observe(elapsed, endpoint, request.method, str(status))
+        self.request_queries.observe(g.get('sql_count', 0), endpoint)
+        self.request_sql_seconds.observe(g.get('sql_seconds', 0.0), endpoint)
+
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            self.keep_profile(profiler, elapsed, endpoint)
+
+    def keep_profile(self, profiler, elapsed, endpoint):
+        directory = current_app.config['PROFILE_DIR']
+        keep = current_app.config['PROFILE_KEEP']
+        with self.profiles_lock:
+            if len(self.profiles) >= keep and elapsed <= self.profiles[0][0]:
+                return
+            os.makedirs(directory, exist_ok=True)
+            name = re.sub(r'[^\w.-]', '_', endpoint)
+            path = os.path.join(directory, f'{elapsed * 1000:09.1f}ms_{name}_{time.time_ns()}.prof')
+            profiler.dump_stats(path)
+            heapq.heappush(self.profiles, (elapsed, path))
+            while len(self.profiles) > keep:
+                _, fastest = heapq.heappop(self.profiles)
+                try:
+                    os.remove(fastest)
+                except OSError:
+                    pass
+
+    # Templates
+
+    def before_render(self, sender, template, context, **extra):
+        if has_request_context() and 'render_starts' in g:
+            g.render_starts.append(time.perf_counter())
+
+    def after_render(self, sender, template, context, **extra):
+        if has_request_context() and g.get('render_starts'):
+            self.template_seconds.observe(time.perf_counter() - g.render_starts.pop(), template.name or 'string')
+
+    # SQL
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_starts', []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('query_starts')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        self.sql_queries.inc()
+        self.sql_seconds.inc(elapsed)
+        if has_request_context() and 'sql_count' in g:
+            g.sql_count += 1
+            g.sql_seconds += elapsed
+
+    # Exposição
+
+    def render(self):
+        lines = []
+        for collector in self.collectors:
+            lines.extend(collector.render())
+        return '\n'.join(lines) + '\n'
+
+    def metrics_view(self):
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
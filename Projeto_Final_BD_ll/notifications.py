@@ -0,0 +1,237 @@
+# Notificações em tempo real (Server-Sent Events) sobre um barramento pub/sub.
+# Cada stream aberto é uma Subscription num canal ("dev:12", "company:3"); publicar num canal
+# entrega o evento a todos os streams dele. LocalBus entrega só dentro do processo; SQLiteBus
+# usa um arquivo SQLite compartilhado para levar os eventos a todos os processos/workers.
+# Contrapressão: cada stream guarda no máximo max_pending eventos; um cliente que não lê a
+# tempo recebe "resync" e é desconectado (o EventSource reconecta e a página recarrega a lista).
+# Este módulo não importa o app.
+import asyncio
+import itertools
+import json
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+
+
+class NotificationsBusy(Exception):
+    pass
+
+
+class Subscription:
+    __slots__ = ('bus', 'channel', 'max_pending', 'events', 'overflowed', 'closed', 'lock',
+                 'ready', 'loop', 'async_ready')
+
+    def __init__(self, bus, channel, max_pending):
+        self.bus = bus
+        self.channel = channel
+        self.max_pending = max_pending
+        self.events = deque()
+        self.overflowed = False
+        self.closed = False
+        self.lock = threading.Lock()
+        # Primitivas de espera criadas só quando alguém espera: um stream ocioso custa pouco
+        self.ready = None  # threading.Event (servidor WSGI)
+        self.loop = self.async_ready = None  # asyncio.Event no loop do stream (servidor ASGI)
+
+    def push(self, event):
+        with self.lock:
+            if self.closed or self.overflowed:
+                return
+            if len(self.events) >= self.max_pending:
+                self.overflowed = True
+                self.events.clear()
+            else:
+                self.events.append(event)
+            ready, loop, async_ready = self.ready, self.loop, self.async_ready
+        if ready is not None:
+            ready.set()
+        if loop is not None:
+            loop.call_soon_threadsafe(async_ready.set)
+
+    def drain(self):
+        # (eventos pendentes, estourou o limite?)
+        with self.lock:
+            events = list(self.events)
+            self.events.clear()
+            if self.ready is not None:
+                self.ready.clear()
+            if self.async_ready is not None:
+                self.async_ready.clear()
+            return events, self.overflowed
+
+    def wait(self, timeout):
+        with self.lock:
+            if self.events or self.overflowed:
+                return True
+            if self.ready is None:
+                self.ready = threading.Event()
+            ready = self.ready
+        return ready.wait(timeout)
+
+    async def wait_async(self, timeout):
+        with self.lock:
+            if self.events or self.overflowed:
+                return True
+            if self.async_ready is None:
+                self.loop = asyncio.get_running_loop()
+                self.async_ready = asyncio.Event()
+            async_ready = self.async_ready
+        # Timer em vez de asyncio.wait_for, que no 3.11 pode engolir o cancelamento quando o
+        # evento chega junto (e o stream de um cliente desconectado ficaria aberto)
+        timer = self.loop.call_later(timeout, async_ready.set)
+        try:
+            await async_ready.wait()
+        finally:
+            timer.cancel()
+        return bool(self.events or self.overflowed)
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        self.bus.unsubscribe(self)
+
+
+class LocalBus:
+    # Entrega em memória, só para os streams deste processo
+    def __init__(self, max_streams):
+        self.max_streams = max_streams
+        self.channels = defaultdict(set)
+        self.count = 0
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+
+    def subscribe(self, channel, max_pending):
+        subscription = Subscription(self, channel, max_pending)
+        with self.lock:
+            if self.count >= self.max_streams:
+                raise NotificationsBusy('Muitas conexões de notificação abertas. Tente novamente.')
+            self.channels[channel].add(subscription)
+            self.count += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.channels.get(subscription.channel)
+            if subscribers and subscription in subscribers:
+                subscribers.remove(subscription)
+                self.count -= 1
+                if not subscribers:
+                    del self.channels[subscription.channel]
+
+    def deliver(self, event_id, channel, name, data):
+        with self.lock:
+            subscribers = list(self.channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.push((event_id, name, data))
+
+    def publish(self, channel, name, data):
+        self.deliver(next(self.ids), channel, name, json.dumps(data))
+
+    def close(self):
+        pass
+
+
+class SQLiteBus(LocalBus):
+    # Fan-out entre processos: publish grava numa tabela de um arquivo SQLite (WAL) e uma
+    # thread por processo lê as linhas novas a cada poll_interval e entrega localmente.
+    # Serve para vários workers numa mesma máquina; com várias máquinas, troque por um broker.
+    def __init__(self, path, max_streams, poll_interval=0.2, retention=60):
+        super().__init__(max_streams)
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention  # segundos que um evento fica na tabela
+        self.connection = self.connect()
+        self.connection.execute('CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                                'channel TEXT NOT NULL, name TEXT NOT NULL, data TEXT NOT NULL, created REAL NOT NULL)')
+        self.write_lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.poller = None
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def subscribe(self, channel, max_pending):
+        subscription = super().subscribe(channel, max_pending)
+        with self.lock:
+            if self.poller is None:
+                self.poller = threading.Thread(target=self.poll, name='notification-poller', daemon=True)
+                self.poller.start()
+        return subscription
+
+    def publish(self, channel, name, data):
+        with self.write_lock:
+            self.connection.execute('INSERT INTO events (channel, name, data, created) VALUES (?, ?, ?, ?)',
+                                    (channel, name, json.dumps(data), time.time()))
+
+    def poll(self):
+        connection = self.connect()
+        last_id = connection.execute('SELECT COALESCE(MAX(id), 0) FROM events').fetchone()[0]
+        next_prune = 0
+        while not self.stopped.wait(self.poll_interval):
+            rows = connection.execute('SELECT id, channel, name, data FROM events WHERE id > ? ORDER BY id',
+                                      (last_id,)).fetchall()
+            for event_id, channel, name, data in rows:
+                self.deliver(event_id, channel, name, data)
+                last_id = event_id
+            if time.monotonic() >= next_prune:
+                connection.execute('DELETE FROM events WHERE created < ?', (time.time() - self.retention,))
+                next_prune = time.monotonic() + self.retention
+        connection.close()
+
+    def close(self):
+        self.stopped.set()
+
+
+def create_bus(url, max_streams, poll_interval):
+    # '' ou 'local' -> LocalBus; 'sqlite:///caminho/arquivo.db' -> SQLiteBus
+    if not url or url == 'local':
+        return LocalBus(max_streams)
+    if url.startswith('sqlite:///'):
+        return SQLiteBus(url[len('sqlite:///'):], max_streams, poll_interval)
+    raise ValueError(f'Barramento de notificações desconhecido: {url}')
+
+
+def format_event(event_id, name, data):
+    return f'id: {event_id}\nevent: {name}\ndata: {data}\n\n'
+
+
+def next_chunk(subscription):
+    # (texto SSE do que chegou desde a última espera, encerrar o stream?)
+    events, overflowed = subscription.drain()
+    if overflowed:
+        return format_event(0, 'resync', '{}'), True
+    if events:
+        return ''.join(format_event(*event) for event in events), False
+    return ': ping\n\n', False  # heartbeat: mantém a conexão viva em proxies e detecta cliente que saiu
+
+
+def sse_stream(subscription, heartbeat, retry_ms):
+    try:
+        yield f'retry: {retry_ms}\n\n'
+        while True:
+            subscription.wait(heartbeat)
+            chunk, last = next_chunk(subscription)
+            yield chunk
+            if last:
+                return
+    finally:
+        subscription.close()
+
+
+async def sse_stream_async(subscription, heartbeat, retry_ms):
+    try:
+        yield f'retry: {retry_ms}\n\n'
+        while True:
+            await subscription.wait_async(heartbeat)
+            chunk, last = next_chunk(subscription)
+            yield chunk
+            if last:
+                return
+    finally:
+        subscription.close()
@@ -0,0 +1,103 @@
+# Hash e verificação de senhas fora da thread da requisição.
+# scrypt/pbkdf2 custam dezenas de ms de CPU; um pool de processos próprio, com limite de
+# tarefas simultâneas, impede que uma onda de logins tome a CPU do tráfego de swipes.
+# Este módulo não importa o app: é o que os processos do pool carregam.
+import hmac
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+HASH_METHODS = ('scrypt', 'pbkdf2')
+# spawn onde não há forkserver (Windows, macOS antigo)
+POOL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+class PasswordPoolBusy(Exception):
+    pass
+
+
+def is_hashed(stored):
+    # Hash do werkzeug: "método:parâmetros$sal$hash"; o resto é senha legada em texto puro
+    parts = (stored or '').split('$')
+    return len(parts) == 3 and parts[0].split(':')[0] in HASH_METHODS
+
+
+def needs_rehash(stored, method):
+    return not is_hashed(stored) or stored.split('$')[0].split(':')[0] != method.split(':')[0]
+
+
+def timed_call(fn, *args):
+    # Roda no processo do pool; os horários (relógio de parede) dão o tempo de fila
+    started = time.time()
+    result = fn(*args)
+    return result, started, time.time()
+
+
+class PasswordPool:
+    def __init__(self, workers, max_pending, queue_timeout, method, metrics=None):
+        self.method = method
+        self.queue_timeout = queue_timeout
+        self.metrics = metrics
+        self.workers = workers
+        self.slots = threading.BoundedSemaphore(max_pending)  # tarefas na fila + em execução
+        self.executor = None
+        if workers:
+            # forkserver: os processos do pool saem de um servidor limpo, não de um fork do app,
+            # que já tem threads (gravação de swipes, recarga de baralhos) e locks possivelmente presos.
+            # Como no spawn, o script principal é reimportado: ele precisa do `if __name__ == '__main__'`
+            context = multiprocessing.get_context(POOL_START_METHOD)
+            self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+    def run(self, operation, fn, *args):
+        if self.executor is None:  # workers=0: na própria thread (comportamento antigo)
+            start = time.time()
+            result, started, finished = timed_call(fn, *args)
+        else:
+            if not self.slots.acquire(timeout=self.queue_timeout):
+                raise PasswordPoolBusy('Muitos logins ao mesmo tempo. Tente novamente.')
+            try:
+                start = time.time()
+                result, started, finished = self.executor.submit(timed_call, fn, *args).result()
+            finally:
+                self.slots.release()
+        if self.metrics is not None:
+            self.metrics.password_queue_seconds.observe(max(started - start, 0.0), operation)
+            self.metrics.password_work_seconds.observe(finished - started, operation)
+        return result
+
+    def hash(self, password):
+        return self.run('hash', generate_password_hash, password, self.method)
+
+    def hash_many(self, passwords):
+        # Lote da importação em massa, em fatias de no máximo `workers` hashes, cada uma com sua
+        # vaga: a fila do pool nunca tem mais que uma fatia na frente, então um login que chega
+        # no meio da importação espera no máximo um hash, não o bloco inteiro
+        if self.executor is None:
+            return [generate_password_hash(password, self.method) for password in passwords]
+        hashes = []
+        start = time.time()
+        for first in range(0, len(passwords), self.workers):
+            if not self.slots.acquire(timeout=self.queue_timeout):
+                raise PasswordPoolBusy('Pool de senhas ocupado. Tente novamente.')
+            try:
+                hashes.extend(self.executor.map(generate_password_hash, passwords[first:first + self.workers],
+                                                repeat(self.method)))
+            finally:
+                self.slots.release()
+        if self.metrics is not None:
+            self.metrics.password_work_seconds.observe(time.time() - start, 'hash_many')
+        return hashes
+
+    def verify(self, stored, password):
+        # Senha legada em texto puro: comparação em tempo constante, sem passar pelo pool
+        if not is_hashed(stored):
+            return hmac.compare_digest((stored or '').encode('utf-8'), (password or '').encode('utf-8'))
+        return self.run('verify', check_password_hash, stored, password)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,308 @@
+# Ranking de candidatos por habilidades (TF-IDF esparso)
+# Developer.habilidades e Company.descricao viram vetores de termos; um lote inteiro
+# de candidatos é pontuado com um único produto matriz-vetor.
+import bisect
+import math
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+import scipy.sparse as sp
+
+# Palavras, incluindo nomes como c++, c#, node.js
+TOKEN_RE = re.compile(r'\w[\w+#]*(?:\.\w+)*')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+QUERY_TOKEN_RE = re.compile(r'\(|\)|[^\s()]+')
+# Tetos da busca: o parser e o evaluate são recursivos (um nível por termo encadeado,
+# parêntese ou NOT), então uma busca enorme estouraria a pilha em vez de ser recusada
+MAX_QUERY_TOKENS = 200
+MAX_QUERY_TERMS = 50
+MAX_QUERY_DEPTH = 20
+
+
+def parse_query(query):
+    # Busca booleana no estilo "python AND (postgres OR mysql) NOT php", com prefixo "pyth*".
+    # Termos lado a lado valem como AND. Devolve uma árvore de tuplas:
+    # ('term', t), ('prefix', p), ('and', a, b), ('or', a, b), ('not', a)
+    tokens = QUERY_TOKEN_RE.findall(query or '')
+    if len(tokens) > MAX_QUERY_TOKENS:
+        raise ValueError(f'Busca longa demais (máximo de {MAX_QUERY_TOKENS} termos e operadores).')
+    pos, leaf_count, depth = 0, 0, 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else None
+
+    def take():
+        nonlocal pos
+        pos += 1
+        return tokens[pos - 1]
+
+    def nested(parse):
+        nonlocal depth
+        depth += 1
+        if depth > MAX_QUERY_DEPTH:
+            raise ValueError(f'Busca aninhada demais (máximo de {MAX_QUERY_DEPTH} níveis).')
+        node = parse()
+        depth -= 1
+        return node
+
+    def leaves(count):
+        nonlocal leaf_count
+        leaf_count += count
+        if leaf_count > MAX_QUERY_TERMS:
+            raise ValueError(f'Busca com termos demais (máximo de {MAX_QUERY_TERMS}).')
+
+    def parse_or():
+        node = parse_and()
+        while peek() == 'OR':
+            take()
+            node = ('or', node, parse_and())
+        return node
+
+    def parse_and():
+        node = parse_not()
+        while peek() not in (None, 'OR', ')'):
+            if peek() == 'AND':
+                take()
+            node = ('and', node, parse_not())
+        return node
+
+    def parse_not():
+        if peek() == 'NOT':
+            take()
+            return ('not', nested(parse_not))
+        return parse_atom()
+
+    def parse_atom():
+        token = peek()
+        if token is None or token in ('AND', 'OR', ')'):
+            raise ValueError('Busca incompleta.')
+        take()
+        if token == '(':
+            node = nested(parse_or)
+            if peek() != ')':
+                raise ValueError('Parêntese sem fechamento.')
+            take()
+            return node
+        if token.endswith('*'):
+            terms = tokenize(token[:-1])
+            if len(terms) != 1:
+                raise ValueError(f'Prefixo inválido: {token}')
+            leaves(1)
+            return ('prefix', terms[0])
+        terms = tokenize(token)
+        if not terms:
+            raise ValueError(f'Termo inválido: {token}')
+        leaves(len(terms))
+        node = ('term', terms[0])
+        for term in terms[1:]:
+            node = ('and', node, ('term', term))
+        return node
+
+    if not tokens:
+        raise ValueError('Busca vazia.')
+    tree = parse_or()
+    if peek() is not None:
+        raise ValueError('Parêntese sem abertura.')
+    return tree
+
+
+class SkillIndex:
+    # Matriz esparsa (linha = documento, coluna = termo) com TF sublinear.
+    # O IDF só é aplicado na hora de pontuar, então editar um perfil não obriga a
+    # recalcular a matriz: as alterações ficam pendentes e entram no próximo score.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.vocab = {}
+        self.df = np.zeros(1024)  # frequência de documento por termo (com folga)
+        self.docs = {}  # id -> (colunas, pesos)
+        self.pending = {}  # id -> (colunas, pesos) ainda fora da matriz
+        self.row_of = {}  # id -> linha da matriz
+        self.ids = []  # linha -> id
+        self.matrix = sp.csr_matrix((0, 0))
+        self.sorted_ids = np.zeros(0, dtype=np.int64)
+        self.sorted_rows = np.zeros(0, dtype=np.int64)
+        self.ids_array = np.zeros(0, dtype=np.int64)
+        self.rows_in_id_order = True
+        self.norms = None
+        self.postings = None  # transposta (CSC): coluna = termo, linhas = documentos
+        self.sorted_terms = None
+
+    def __len__(self):
+        return len(self.docs)
+
+    def vectorize(self, text, grow):
+        cols, weights = [], []
+        for term, count in Counter(tokenize(text)).items():
+            col = self.vocab.get(term)
+            if col is None:
+                if not grow:
+                    continue
+                col = self.vocab[term] = len(self.vocab)
+                self.sorted_terms = None
+                if col >= len(self.df):
+                    self.df = np.concatenate([self.df, np.zeros(len(self.df))])
+            cols.append(col)
+            weights.append(1.0 + math.log(count))
+        return np.array(cols, dtype=np.int64), np.array(weights)
+
+    def update(self, doc_id, text):
+        with self.lock:
+            old = self.docs.get(doc_id)
+            if old is not None:
+                self.df[old[0]] -= 1
+            doc = self.vectorize(text, grow=True)
+            self.df[doc[0]] += 1
+            self.docs[doc_id] = doc
+            self.pending[doc_id] = doc
+
+    def load(self, rows):
+        # rows: iterável de (id, texto)
+        for doc_id, text in rows:
+            self.update(doc_id, text)
+
+    def apply_pending(self):
+        # Troca só as linhas alteradas: custo O(nnz), sem reconstruir a matriz do zero
+        if not self.pending:
+            return
+        n_old = len(self.ids)
+        for doc_id in self.pending:
+            if doc_id not in self.row_of:
+                self.row_of[doc_id] = len(self.ids)
+                self.ids.append(doc_id)
+        n, width = len(self.ids), len(self.vocab)
+
+        old = self.matrix
+        indptr = np.concatenate([old.indptr, np.full(n - n_old, old.indptr[-1])])
+        base = sp.csr_matrix((old.data.copy(), old.indices, indptr), shape=(n, width))
+
+        rows, cols, data = [], [], []
+        for doc_id, (doc_cols, weights) in self.pending.items():
+            row = self.row_of[doc_id]
+            if row < n_old:
+                base.data[base.indptr[row]:base.indptr[row + 1]] = 0
+            rows.append(np.full(len(doc_cols), row, dtype=np.int64))
+            cols.append(doc_cols)
+            data.append(weights)
+        changes = sp.csr_matrix(
+            (np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(n, width)
+        )
+
+        self.matrix = (base + changes).tocsr()
+        self.matrix.eliminate_zeros()
+        self.pending.clear()
+
+        if n > n_old:
+            self.ids_array = np.array(self.ids, dtype=np.int64)
+            self.sorted_rows = np.argsort(self.ids_array, kind='stable')
+            self.sorted_ids = self.ids_array[self.sorted_rows]
+            self.rows_in_id_order = bool(np.all(np.diff(self.ids_array) > 0))
+        self.norms = None
+        self.postings = None
+
+    def idf(self):
+        df = self.df[:len(self.vocab)]
+        return np.log((1 + len(self.docs)) / (1 + df)) + 1
+
+    def prepare(self):
+        # Aplica as alterações pendentes e calcula as normas (chamar com o lock).
+        # Também serve para deixar o índice pronto antes de um fork (cópia compartilhada).
+        self.apply_pending()
+        if self.norms is None and len(self.ids):
+            self.norms = np.sqrt(self.matrix.multiply(self.matrix) @ (self.idf() ** 2))
+            self.norms[self.norms == 0] = 1
+
+    def score_rows(self, text):
+        # Cosseno TF-IDF do texto contra todas as linhas da matriz (chamar com o lock, após prepare)
+        idf_sq = self.idf() ** 2
+        cols, weights = self.vectorize(text, grow=False)
+        if not len(cols):
+            return np.zeros(len(self.ids))
+        query = np.zeros(len(self.vocab))
+        query[cols] = weights * idf_sq[cols]
+        all_scores = (self.matrix @ query) / self.norms
+        all_scores /= math.sqrt(np.sum(weights ** 2 * idf_sq[cols]))
+        return all_scores
+
+    def score(self, text, candidate_ids):
+        # Similaridade de cosseno TF-IDF entre o texto e cada candidato (0 se desconhecido)
+        candidate_ids = np.asarray(candidate_ids, dtype=np.int64)
+        scores = np.zeros(len(candidate_ids))
+        with self.lock:
+            self.prepare()
+            if not len(self.ids) or not len(candidate_ids):
+                return scores
+            all_scores = self.score_rows(text)
+            pos = np.minimum(np.searchsorted(self.sorted_ids, candidate_ids), len(self.sorted_ids) - 1)
+            found = self.sorted_ids[pos] == candidate_ids
+            scores[found] = all_scores[self.sorted_rows[pos[found]]]
+        return scores
+
+    def top(self, text, k, exclude=None):
+        # Os k documentos mais relevantes para o texto entre todos os indexados (empate: menor id).
+        # exclude: objeto com contains(ids) -> máscara booleana (ex.: seen.Bitmap) dos ids a ignorar.
+        # Retorna (ids, scores) do mais ao menos relevante.
+        with self.lock:
+            self.prepare()
+            if not len(self.ids) or k <= 0:
+                return np.zeros(0, dtype=np.int64), np.zeros(0)
+            ids, scores = self.ids_array, self.score_rows(text)
+        if exclude is not None:
+            keep = ~exclude.contains(ids)
+            ids, scores = ids[keep], scores[keep]
+        if k < len(ids):
+            best = np.argpartition(-scores, k - 1)[:k]
+            ids, scores = ids[best], scores[best]
+        order = np.lexsort((ids, -scores))
+        return ids[order], scores[order]
+
+    def rank(self, text, candidate_ids):
+        # Candidatos do mais ao menos relevante; empates mantêm a ordem recebida
+        candidate_ids = np.asarray(candidate_ids, dtype=np.int64)
+        scores = self.score(text, candidate_ids)
+        return candidate_ids[np.argsort(-scores, kind='stable')].tolist()
+
+    def search(self, query):
+        # Ids (ordenados) dos documentos que satisfazem a busca booleana.
+        # Listas de postagem = colunas da matriz transposta, refeita só depois de alterações;
+        # AND/OR/NOT viram operações vetorizadas sobre máscaras de linhas.
+        tree = parse_query(query)
+        with self.lock:
+            self.apply_pending()
+            if self.postings is None:
+                self.postings = self.matrix.tocsc()
+            if self.sorted_terms is None:
+                self.sorted_terms = sorted(self.vocab)
+            ids = self.ids_array[self.evaluate(tree)]
+        # Linhas são criadas na ordem dos ids na maioria dos casos; só ordena se preciso
+        return ids if self.rows_in_id_order else np.sort(ids)
+
+    def posting(self, col):
+        return self.postings.indices[self.postings.indptr[col]:self.postings.indptr[col + 1]]
+
+    def evaluate(self, node):
+        kind = node[0]
+        if kind == 'and':
+            return self.evaluate(node[1]) & self.evaluate(node[2])
+        if kind == 'or':
+            return self.evaluate(node[1]) | self.evaluate(node[2])
+        if kind == 'not':
+            return ~self.evaluate(node[1])
+
+        mask = np.zeros(len(self.ids), dtype=bool)
+        if kind == 'term':
+            cols = [self.vocab[node[1]]] if node[1] in self.vocab else []
+        else:
+            start = bisect.bisect_left(self.sorted_terms, node[1])
+            end = bisect.bisect_left(self.sorted_terms, node[1] + '\U0010ffff', start)
+            cols = [self.vocab[term] for term in self.sorted_terms[start:end]]
+        for col in cols:
+            mask[self.posting(col)] = True
+        return mask
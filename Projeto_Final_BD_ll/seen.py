@@ -0,0 +1,146 @@
+# Conjuntos de ids em bitmap comprimido (no estilo roaring), usados para "já avaliados" e
+# skips arquivados. Os ids são divididos em blocos de 65536; cada bloco guarda um array
+# ordenado de uint16 (2 bytes por id) enquanto tem até ARRAY_MAX ids, e 8 KB de bits depois.
+# Um histórico esparso ocupa ~2 bytes por swipe, não (maior id) / 8.
+# A exclusão de candidatos é um contains() vetorizado sobre os ids do índice (SkillIndex.top),
+# sem trazer o histórico de swipes do banco a cada consulta.
+import zlib
+
+import numpy as np
+
+CHUNK_IDS = 1 << 16  # ids por bloco (chave = id >> 16)
+BITSET_BYTES = CHUNK_IDS >> 3
+ARRAY_MAX = 4096  # acima disso o array (2 bytes por id) passaria dos 8 KB do bloco de bits
+MAGIC = b'RB1'  # blobs antigos (bits densos) são zlib puro e começam com 0x78
+
+
+def bits_of(values):
+    # Bloco de bits com as posições (0..65535) dadas
+    flags = np.zeros(CHUNK_IDS, dtype=bool)
+    flags[values] = True
+    return np.packbits(flags, bitorder='little')
+
+
+def values_of(chunk):
+    # Posições (int64, em ordem) presentes no bloco
+    if chunk.dtype == np.uint16:
+        return chunk.astype(np.int64)
+    return np.flatnonzero(np.unpackbits(chunk, bitorder='little'))
+
+
+def make_chunk(values):
+    # values: posições ordenadas e sem repetição
+    if len(values) <= ARRAY_MAX:
+        return np.asarray(values, dtype=np.uint16)
+    return bits_of(values)
+
+
+def chunk_contains(chunk, values):
+    if chunk.dtype == np.uint16:
+        pos = np.minimum(np.searchsorted(chunk, values), len(chunk) - 1)
+        return chunk[pos] == values
+    return ((chunk[values >> 3] >> (values & 7)) & 1).astype(bool)
+
+
+class Bitmap:
+    def __init__(self):
+        self.chunks = {}  # chave -> array uint16 ordenado ou bloco de bits (uint8[8192])
+
+    def add(self, ids):
+        ids = np.sort(np.asarray(ids, dtype=np.int64).ravel())
+        if not len(ids):
+            return
+        ids = ids[np.concatenate(([True], ids[1:] != ids[:-1]))]  # sem repetições
+        for part in np.split(ids, np.flatnonzero(np.diff(ids >> 16)) + 1):
+            self.add_chunk(int(part[0] >> 16), part & 0xFFFF)
+
+    def add_chunk(self, key, values):
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            self.chunks[key] = make_chunk(values)
+        elif chunk.dtype == np.uint16:
+            self.chunks[key] = make_chunk(np.union1d(chunk.astype(np.int64), values))
+        else:
+            chunk |= bits_of(values)
+
+    def update(self, other):
+        # União no lugar (self |= other)
+        for key, theirs in other.chunks.items():
+            chunk = self.chunks.get(key)
+            if chunk is not None and chunk.dtype == np.uint8 and theirs.dtype == np.uint8:
+                chunk |= theirs
+            else:
+                self.add_chunk(key, values_of(theirs))
+
+    def ids(self):
+        parts = [values_of(self.chunks[key]) + (key << 16) for key in sorted(self.chunks)]
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    def contains(self, ids):
+        # Máscara booleana: quais ids estão no conjunto
+        ids = np.asarray(ids, dtype=np.int64)
+        found = np.zeros(len(ids), dtype=bool)
+        if not len(ids) or not self.chunks:
+            return found
+        keys = ids >> 16
+        if len(ids) > 1 and not (keys[1:] >= keys[:-1]).all():
+            order = np.argsort(keys, kind='stable')
+            found[order] = self.contains(ids[order])
+            return found
+        # Ids em ordem: cada bloco é um trecho contíguo
+        bounds = (np.flatnonzero(np.diff(keys)) + 1).tolist()
+        for start, end in zip([0] + bounds, bounds + [len(ids)]):
+            chunk = self.chunks.get(int(keys[start]))
+            if chunk is not None:
+                found[start:end] = chunk_contains(chunk, ids[start:end] & 0xFFFF)
+        return found
+
+    def __contains__(self, doc_id):
+        return bool(self.contains([doc_id])[0])
+
+    def __len__(self):
+        return sum(len(chunk) if chunk.dtype == np.uint16 else int(np.unpackbits(chunk).sum())
+                   for chunk in self.chunks.values())
+
+    @property
+    def nbytes(self):
+        return sum(chunk.nbytes for chunk in self.chunks.values())
+
+    def to_bytes(self):
+        # Blob comprimido: (chave, nº de ids do array ou 0 para bits) por bloco e os dados; os
+        # arrays guardam a diferença entre ids consecutivos, números pequenos que o zlib comprime
+        keys = sorted(self.chunks)
+        header = np.zeros((len(keys), 2), dtype='<u4')
+        data = []
+        for i, key in enumerate(keys):
+            chunk = self.chunks[key]
+            if chunk.dtype == np.uint16:
+                header[i] = key, len(chunk)
+                data.append(np.diff(chunk, prepend=np.uint16(0)).astype('<u2').tobytes())
+            else:
+                header[i] = key, 0
+                data.append(chunk.tobytes())
+        payload = np.array([len(keys)], dtype='<u4').tobytes() + header.tobytes() + b''.join(data)
+        return MAGIC + zlib.compress(payload, 6)
+
+    @classmethod
+    def from_bytes(cls, blob):
+        bitmap = cls()
+        if not blob.startswith(MAGIC):
+            # Formato antigo: 1 bit por id, do id 0 até o maior
+            bits = np.frombuffer(zlib.decompress(blob), dtype=np.uint8)
+            bitmap.add(np.flatnonzero(np.unpackbits(bits, bitorder='little')))
+            return bitmap
+        payload = zlib.decompress(blob[len(MAGIC):])
+        count = int(np.frombuffer(payload, dtype='<u4', count=1)[0])
+        header = np.frombuffer(payload, dtype='<u4', count=count * 2, offset=4).reshape(count, 2)
+        offset = 4 + header.nbytes
+        for key, size in header.tolist():
+            if size:
+                deltas = np.frombuffer(payload, dtype='<u2', count=size, offset=offset)
+                bitmap.chunks[key] = np.cumsum(deltas, dtype=np.uint16)
+                offset += size * 2
+            else:
+                bitmap.chunks[key] = np.frombuffer(payload, dtype=np.uint8, count=BITSET_BYTES, offset=offset).copy()
+                offset += BITSET_BYTES
+        return bitmap
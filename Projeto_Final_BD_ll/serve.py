@@ -0,0 +1,118 @@
+# Servidor de produção com pré-carga: o processo mestre importa o app e os módulos pesados
+# (numpy/scipy), compila os templates e abre o socket uma vez só; os workers são criados com
+# fork e herdam tudo já carregado (páginas compartilhadas por copy-on-write), então ficam
+# prontos sem importar nada. Um worker que morre é substituído por outro fork do mestre.
+# O esquema não é tocado aqui: rode `flask --app main:create_app upgrade-db` antes.
+# Uso: DATABASE_URL=sqlite:////caminho/devs.db python serve.py --workers 4 --port 8000
+# (com gunicorn, o equivalente é `gunicorn --preload -w 4 'main:create_app()'`)
+import argparse
+import gc
+import os
+import signal
+import socket
+import time
+
+
+def log(message):
+    # Uma escrita só por linha: os workers dividem o stderr e as linhas não se misturam
+    os.write(2, (message + '\n').encode())
+
+
+def preload(indexes=False):
+    # Tudo que os workers usariam e que vale carregar uma vez, antes do fork
+    import main
+    import ranking  # numpy + scipy, importados sob demanda pelo main
+    import seen
+
+    app = main.create_app()
+    for name in app.jinja_env.list_templates(extensions=['html']):
+        app.jinja_env.get_template(name)
+    with app.app_context():
+        if indexes:
+            for index in main.get_skill_indexes():
+                with index.lock:
+                    index.prepare()
+        main.db.engine.dispose()  # nenhuma conexão aberta atravessa o fork
+    # Objetos pré-carregados saem da coleta de lixo: o GC dos workers não suja as páginas herdadas
+    gc.freeze()
+    return app
+
+
+def run_worker(app, listener, forked_at, access_log):
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class Handler(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_request(self, *args, **kwargs):
+            if access_log:
+                super().log_request(*args, **kwargs)
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    host, port = listener.getsockname()[:2]
+    server = make_server(host, port, app, threaded=True, request_handler=Handler, fd=listener.fileno())
+    log(f'worker {os.getpid()} pronto em {(time.perf_counter() - forked_at) * 1000:.1f} ms')
+    server.serve_forever()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description='TinderJobs com pré-carga e workers por fork')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--backlog', type=int, default=1024)
+    parser.add_argument('--preload-indexes', action='store_true',
+                        help='carrega os índices TF-IDF no mestre (uma cópia para todos os workers)')
+    parser.add_argument('--access-log', action='store_true')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    app = preload(args.preload_indexes)
+    listener = socket.create_server((args.host, args.port), backlog=args.backlog)
+    log(f'mestre {os.getpid()}: app carregado em {(time.perf_counter() - start) * 1000:.0f} ms, '
+        f'http://{args.host}:{args.port}, {args.workers} workers')
+
+    workers = {}  # pid -> instante do fork
+    stopping = False
+
+    def spawn():
+        forked_at = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(app, listener, forked_at, args.access_log)
+            finally:
+                os._exit(1)
+        workers[pid] = forked_at
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(args.workers):
+        spawn()
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        forked_at = workers.pop(pid, None)
+        if stopping or forked_at is None:
+            continue
+        log(f'worker {pid} saiu (status {status}); criando outro')
+        if time.perf_counter() - forked_at < 1:
+            time.sleep(1)  # worker que morre ao subir: não entra em laço de fork
+        spawn()
+    listener.close()
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,68 @@
+// Painel de engajamento da empresa: totais e últimos dias, lidos de data-analytics-url (JSON)
+(function () {
+    var box = document.querySelector('[data-analytics-url]');
+    if (!box || !window.fetch) {
+        return;
+    }
+
+    function percent(rate) {
+        return rate === null ? '-' : (rate * 100).toFixed(1) + '%';
+    }
+
+    function cell(row, text) {
+        var td = document.createElement('td');
+        td.textContent = text;
+        row.appendChild(td);
+    }
+
+    function render(data) {
+        var totals = data.totals;
+        box.textContent = '';
+        var summary = document.createElement('p');
+        summary.textContent = 'Devs que curtiram: ' + totals.likes_received +
+            ' | Taxa de skip: ' + percent(totals.skip_rate) + ' | Matches: ' + totals.matches;
+        box.appendChild(summary);
+
+        var table = document.createElement('table');
+        table.className = 'table table-sm';
+        var head = table.createTHead().insertRow();
+        ['Dia', 'Curtidas recebidas', 'Skips recebidos', 'Taxa de skip', 'Matches'].forEach(function (title) {
+            var th = document.createElement('th');
+            th.textContent = title;
+            head.appendChild(th);
+        });
+        var body = table.createTBody();
+        data.daily.slice().reverse().forEach(function (day) {
+            if (!day.likes_received && !day.skips_received && !day.matches) {
+                return;
+            }
+            var row = body.insertRow();
+            cell(row, day.day);
+            cell(row, day.likes_received);
+            cell(row, day.skips_received);
+            cell(row, percent(day.skip_rate));
+            cell(row, day.matches);
+        });
+        if (body.rows.length) {
+            box.appendChild(table);
+        }
+        if (data.updated_at) {
+            var updated = document.createElement('small');
+            updated.className = 'text-muted';
+            updated.textContent = 'Atualizado em ' + data.updated_at.replace('T', ' ').slice(0, 16) + ' (UTC)';
+            box.appendChild(updated);
+        }
+    }
+
+    fetch(box.dataset.analyticsUrl, {credentials: 'same-origin'})
+        .then(function (response) {
+            if (!response.ok) {
+                throw new Error(response.status);
+            }
+            return response.json();
+        })
+        .then(render)
+        .catch(function () {
+            box.textContent = 'Não foi possível carregar o engajamento.';
+        });
+})();
@@ -0,0 +1,30 @@
+// Avisos de match em tempo real: escuta o stream SSE indicado em data-notifications-url
+(function () {
+    var box = document.querySelector('[data-notifications-url]');
+    if (!box || !window.EventSource) {
+        return;
+    }
+    var source = new EventSource(box.dataset.notificationsUrl);
+
+    function show(text, reload) {
+        var alert = document.createElement('div');
+        alert.className = 'alert alert-success';
+        alert.textContent = text + ' ';
+        if (reload) {
+            var link = document.createElement('a');
+            link.href = window.location.pathname;
+            link.textContent = 'Atualizar matches';
+            alert.appendChild(link);
+        }
+        box.prepend(alert);
+    }
+
+    source.addEventListener('match', function (event) {
+        var data = JSON.parse(event.data);
+        show('Novo match com ' + data.name + '!', true);
+    });
+    // O servidor descartou avisos porque esta aba não acompanhou; a lista precisa ser recarregada
+    source.addEventListener('resync', function () {
+        show('Você tem novos matches.', true);
+    });
+})();
@@ -0,0 +1,23 @@
+import pytest
+
+import main
+from main import db
+
+
+@pytest.fixture
+def app(tmp_path):
+    # Um app novo por teste (create_app é uma fábrica de verdade), com o esquema do upgrade-db
+    # num banco SQLite temporário; senhas com hash na própria thread, sem pool de processos
+    app = main.create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "devs.db"}',
+                           'WTF_CSRF_ENABLED': False, 'PASSWORD_WORKERS': 0})
+    with app.app_context():
+        db.create_all()
+        main.upgrade_schema()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,25 @@
+import main
+from main import db
+
+
+def test_each_call_builds_a_new_app(app, tmp_path):
+    other = main.create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "other.db"}', 'DECK_SIZE': 7})
+    assert other is not app
+    assert other.config['DECK_SIZE'] == 7 and app.config['DECK_SIZE'] == 100
+    assert other.extensions['deck_cache'] is not app.extensions['deck_cache']
+    with other.app_context():
+        assert str(db.engine.url).endswith('other.db')
+        db.engine.dispose()
+
+
+def test_routes_answer_on_a_fresh_app(client):
+    assert client.get('/').status_code == 200
+    response = client.get('/dev/match')
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/dev/login')
+
+
+def test_commands_are_top_level(app):
+    result = app.test_cli_runner().invoke(args=['upgrade-db'])
+    assert result.exit_code == 0, result.output
+    assert 'Esquema atualizado.' in result.output
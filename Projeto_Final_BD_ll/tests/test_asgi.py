@@ -0,0 +1,46 @@
+# Modo ASGI (asgi.py): só roda com as dependências opcionais instaladas (asgiref, aiosqlite)
+import asyncio
+import sys
+import time
+
+import pytest
+
+pytest.importorskip('asgiref')
+pytest.importorskip('aiosqlite')
+
+import main
+from main import db, Company, Developer, DevSkipCompany
+
+
+@pytest.fixture
+def asgi(app, monkeypatch):
+    # O asgi.py cria o próprio app no import, com o banco do DATABASE_URL: o mesmo do teste
+    monkeypatch.setenv('DATABASE_URL', str(db.engine.url))
+    monkeypatch.delitem(sys.modules, 'asgi', raising=False)
+    import asgi
+
+    yield asgi
+    asyncio.run(asgi.async_engine.dispose())
+    monkeypatch.delitem(sys.modules, 'asgi')
+
+
+def test_deck_drops_candidates_swiped_in_another_worker(app, asgi):
+    dev = Developer(name='Dev', email='dev@x.com', password='x', cel='1', habilidades='python')
+    swiped = Company(name='Pulada', email='a@x.com', password='x', telefone='1', descricao='python')
+    fresh = Company(name='Nova', email='b@x.com', password='x', telefone='1', descricao='python')
+    db.session.add_all([dev, swiped, fresh])
+    db.session.commit()
+    # O skip foi gravado por outro processo: o baralho deste ainda tem a empresa na fila
+    db.session.add(DevSkipCompany(dev_id=dev.id, company_id=swiped.id))
+    db.session.commit()
+    deck = main.SwipeDeck('dev', dev.id)
+    deck.ids.extend([swiped.id, fresh.id])
+    deck.exhausted_at = time.monotonic()
+
+    async def current():
+        async with asgi.async_session() as adb:
+            return await asgi.current_from_deck(adb, deck, Company)
+
+    assert main.already_swiped('dev', dev.id, swiped.id)
+    assert asyncio.run(current()).id == fresh.id
+    assert list(deck.ids) == [fresh.id]
@@ -0,0 +1,46 @@
+# Importação em massa pela API: linhas recusadas com o motivo, senhas com hash e, se o arquivo
+# quebrar no meio, os blocos anteriores gravados e contados na resposta
+import json
+
+import pytest
+
+from main import Developer
+from passwords import is_hashed
+
+HEADER = 'name,email,password,cel,habilidades\n'
+
+
+@pytest.fixture
+def api(app, client):
+    app.config.update(BULK_API_TOKEN='segredo', BULK_CHUNK_SIZE=2)
+    return lambda body, mimetype='text/csv': client.post(
+        '/api/dev/import', data=body, content_type=mimetype, headers={'Authorization': 'Bearer segredo'})
+
+
+def test_import_requires_token(client):
+    assert client.post('/api/dev/import', data=HEADER, content_type='text/csv').status_code == 403
+
+
+def test_import_reports_rejected_lines(api):
+    body = (HEADER + 'Ana,ana@x.com,senha1,1,python\n'
+            ',bia@x.com,senha2,2,java\n'
+            'Ana 2,ana@x.com,senha3,3,go\n'
+            'Caio,caio@x.com,senha4,4,rust\n')
+    response = api(body)
+    assert response.status_code == 200
+    summary = response.get_json()
+    assert (summary['rows'], summary['imported'], summary['rejected']) == (4, 2, 2)
+    assert [(error['line'], error['email']) for error in summary['errors']] == [(3, 'bia@x.com'), (4, 'ana@x.com')]
+    ana = Developer.query.filter_by(email='ana@x.com').one()
+    assert ana.name == 'Ana' and is_hashed(ana.password)
+
+
+def test_bad_file_keeps_previous_chunks(api):
+    lines = [json.dumps({'name': f'Dev {i}', 'email': f'dev{i}@x.com', 'password': 's',
+                         'cel': '1', 'habilidades': 'python'}) for i in range(3)]
+    body = ('\n'.join(lines) + '\n').encode() + b'\xff\n'
+    response = api(body, 'application/x-ndjson')
+    assert response.status_code == 400
+    result = response.get_json()
+    assert result['line'] == 4 and result['imported'] == 2
+    assert Developer.query.count() == 2
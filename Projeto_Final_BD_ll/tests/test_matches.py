@@ -0,0 +1,57 @@
+# Likes direcionais e match mútuo materializado (like_and_match / list_matches)
+import main
+from main import db, Company, Developer, Match
+
+
+def add_users(devs, companies):
+    dev_rows = [Developer(name=f'Dev {i}', email=f'dev{i}@x.com', password='x', cel='1', habilidades='python')
+                for i in range(devs)]
+    company_rows = [Company(name=f'Empresa {i}', email=f'e{i}@x.com', password='x', telefone='1', descricao='python')
+                    for i in range(companies)]
+    db.session.add_all(dev_rows + company_rows)
+    db.session.commit()
+    return [dev.id for dev in dev_rows], [company.id for company in company_rows]
+
+
+def like(kind, owner_id, target_id):
+    result = main.like_and_match(kind, owner_id, target_id)
+    db.session.commit()
+    return result
+
+
+def test_match_only_when_both_sides_like(app):
+    (dev_id,), (company_id, other_id) = add_users(1, 2)
+    assert like('dev', dev_id, company_id) == (True, False)
+    assert like('dev', dev_id, company_id) == (False, False)  # like repetido
+    assert like('company', other_id, dev_id) == (True, False)  # o dev não curtiu esta empresa
+    assert Match.query.count() == 0
+
+    assert like('company', company_id, dev_id) == (True, True)
+    assert [(m.dev_id, m.company_id) for m in Match.query] == [(dev_id, company_id)]
+    assert like('company', company_id, dev_id) == (False, False)
+    assert Match.query.count() == 1
+
+
+def test_list_matches_pages_by_cursor(app):
+    (dev_id,), company_ids = add_users(1, 5)
+    for company_id in company_ids:
+        like('company', company_id, dev_id)
+        like('dev', dev_id, company_id)
+
+    page, before = main.list_matches('dev', dev_id, per_page=2)
+    seen = [company.id for _, company in page]
+    while before is not None:
+        page, before = main.list_matches('dev', dev_id, before, per_page=2)
+        seen.extend(company.id for _, company in page)
+    assert seen == company_ids[::-1]  # do mais recente ao mais antigo, sem repetir
+    rows, _ = main.list_matches('company', company_ids[0])
+    assert [dev.id for _, dev in rows] == [dev_id]
+
+
+def test_profile_lists_matches(app, client):
+    (dev_id,), (company_id,) = add_users(1, 1)
+    like('dev', dev_id, company_id)
+    like('company', company_id, dev_id)
+    with client.session_transaction() as session:
+        session['developer_id'] = dev_id
+    assert 'Empresa 0' in client.get('/dev/profile').get_data(as_text=True)
@@ -0,0 +1,47 @@
+# Pool de senhas: a importação em massa não pode segurar os logins atrás do lote inteiro
+import threading
+import time
+
+from werkzeug.security import check_password_hash
+
+from passwords import PasswordPool, is_hashed
+
+
+def test_hash_many_in_the_calling_thread():
+    pool = PasswordPool(0, 1, 1, 'pbkdf2:sha256:1000')
+    hashes = pool.hash_many(['a', 'b'])
+    assert all(is_hashed(h) for h in hashes)
+    assert check_password_hash(hashes[0], 'a') and check_password_hash(hashes[1], 'b')
+
+
+def test_hash_many_frees_its_slot_between_slices():
+    # Uma vaga só no pool: cada fatia devolve a sua, então o lote inteiro passa e a vaga sobra no fim
+    pool = PasswordPool(2, 1, 1, 'pbkdf2:sha256:1000')
+    try:
+        passwords = [str(i) for i in range(5)]
+        hashes = pool.hash_many(passwords)
+        assert [check_password_hash(h, p) for h, p in zip(hashes, passwords)] == [True] * 5
+        assert pool.slots.acquire(blocking=False)
+    finally:
+        pool.shutdown()
+
+
+def test_login_does_not_wait_for_the_whole_import():
+    pool = PasswordPool(1, 4, 10, 'scrypt')
+    finished = {}
+
+    def run_import():
+        pool.hash_many(['x'] * 8)
+        finished['import'] = time.monotonic()
+
+    try:
+        pool.hash('aquecimento')  # o processo do pool já de pé
+        thread = threading.Thread(target=run_import)
+        thread.start()
+        time.sleep(0.2)  # a importação já está no pool
+        pool.hash('login')
+        finished['login'] = time.monotonic()
+        thread.join()
+    finally:
+        pool.shutdown()
+    assert finished['login'] < finished['import']
@@ -0,0 +1,55 @@
+# precompute-decks: grava o top-K de quem mudou e, se um processo do pool falhar ou travar,
+# o comando termina com erro em vez de esperar para sempre
+import time
+
+import pytest
+
+import main
+from main import db, Company, Developer, Recommendation
+
+
+@pytest.fixture
+def users(app):
+    db.session.add_all([Developer(name=f'Dev {i}', email=f'dev{i}@x.com', password='x', cel='1',
+                                  habilidades=f'python flask sql {i}') for i in range(3)])
+    db.session.add_all([Company(name=f'Empresa {i}', email=f'empresa{i}@x.com', password='x', telefone='1',
+                                descricao=f'python django {i}') for i in range(2)])
+    db.session.commit()
+
+
+def precompute(app, *args):
+    return app.test_cli_runner().invoke(args=['precompute-decks', '--workers', '1', *args])
+
+
+def test_precompute_writes_recommendations(app, users):
+    result = precompute(app)
+    assert result.exit_code == 0, result.output
+    assert Recommendation.query.filter_by(kind='dev').count() == 3 * 2
+    assert Recommendation.query.filter_by(kind='company').count() == 2 * 3
+
+
+def test_error_in_a_shard_stops_the_command(app, users, monkeypatch):
+    def broken(kind, owners, top_k):
+        raise ValueError('bloco quebrado')
+
+    monkeypatch.setattr(main, 'compute_recommendations', broken)
+    result = precompute(app, '--kind', 'dev')
+    assert isinstance(result.exception, ValueError)
+
+
+def test_stuck_worker_times_out(app, users, monkeypatch):
+    monkeypatch.setattr(main, 'compute_recommendations', lambda kind, owners, top_k: time.sleep(30))
+    start = time.monotonic()
+    result = precompute(app, '--kind', 'dev', '--timeout', '0.5')
+    assert result.exit_code == 1
+    assert 'nenhum bloco terminou em 0.5 s' in result.output
+    assert time.monotonic() - start < 10
+
+
+def test_worker_setup_error_is_reported_by_the_tasks(monkeypatch):
+    # Sem fork o filho monta o próprio app; se falhar, as tarefas devolvem o erro ao pai
+    monkeypatch.setattr(main, 'precompute_app', None)
+    monkeypatch.setattr(main, 'precompute_error', None)
+    main.init_precompute_worker({'SQLALCHEMY_DATABASE_URI': 'banco-invalido'})
+    with pytest.raises(RuntimeError, match='processo do pool não iniciou'):
+        main.precompute_shard(('dev', [], 10))
@@ -0,0 +1,27 @@
+# Regressão de índices (o mesmo que flask --app main:create_app check-query-plans): num banco
+# SQLite novo, criado como no upgrade-db, nenhuma consulta do caminho de swipe pode varrer uma
+# tabela de swipe inteira. O texto do EXPLAIN muda entre versões do SQLite ("SCAN TABLE x" nas
+# antigas, "SCAN x" nas novas), então o teste só olha a tabela varrida
+import re
+
+import main
+
+SWIPE_TABLES = {model.__tablename__ for model in main.SWIPE_MODELS + (main.LegacyMatch,)}
+SCAN_RE = re.compile(r'SCAN (?:TABLE )?(\w+)')
+
+
+def scanned_tables():
+    return {name: {SCAN_RE.match(step).group(1) for step in steps}
+            for name, steps in main.find_query_plan_scans().items()}
+
+
+def test_swipe_queries_never_scan_swipe_tables(app):
+    scanned = {name: tables & SWIPE_TABLES for name, tables in scanned_tables().items()}
+    assert {name: tables for name, tables in scanned.items() if tables} == {}
+
+
+def test_scan_is_reported(app, monkeypatch):
+    # Sem índice em skip_date: garante que o teste acima não passa por não enxergar a varredura
+    query = main.DevSkipCompany.query.filter_by(skip_date=None).statement
+    monkeypatch.setattr(main, 'swipe_path_queries', lambda: {'skips_sem_data': query})
+    assert scanned_tables() == {'skips_sem_data': {'dev_skip_company'}}
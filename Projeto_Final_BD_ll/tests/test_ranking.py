@@ -0,0 +1,53 @@
+# Busca booleana (ranking.parse_query / SkillIndex.search) e seus limites
+import pytest
+
+from ranking import MAX_QUERY_DEPTH, MAX_QUERY_TERMS, SkillIndex, parse_query
+
+
+def test_parse_precedence_and_implicit_and():
+    assert parse_query('python AND (postgres OR mysql) NOT php') == (
+        'and', ('and', ('term', 'python'), ('or', ('term', 'postgres'), ('term', 'mysql'))), ('not', ('term', 'php')))
+    assert parse_query('flask pyth*') == ('and', ('term', 'flask'), ('prefix', 'pyth'))
+
+
+@pytest.mark.parametrize('query, message', [
+    ('', 'vazia'),
+    ('python AND', 'incompleta'),
+    ('(python', 'sem fechamento'),
+    ('python)', 'sem abertura'),
+    ('a-b*', 'Prefixo inválido'),
+])
+def test_parse_errors(query, message):
+    with pytest.raises(ValueError, match=message):
+        parse_query(query)
+
+
+def test_query_limits_raise_value_error():
+    # Antes viravam RecursionError (erro 500) no parser ou no evaluate
+    with pytest.raises(ValueError, match='longa demais'):
+        parse_query(' '.join(['python'] * 1500))
+    with pytest.raises(ValueError, match='termos demais'):
+        parse_query(','.join(['python'] * 1500))
+    with pytest.raises(ValueError, match='aninhada demais'):
+        parse_query('(' * 50 + 'python' + ')' * 50)
+    with pytest.raises(ValueError, match='aninhada demais'):
+        parse_query('NOT ' * 150 + 'python')
+    parse_query(' '.join(['python'] * MAX_QUERY_TERMS))
+    parse_query('(' * MAX_QUERY_DEPTH + 'python' + ')' * MAX_QUERY_DEPTH)
+
+
+def test_search():
+    index = SkillIndex()
+    index.load([(1, 'python flask postgres'), (2, 'python django mysql'), (3, 'java spring mysql'), (4, 'php mysql')])
+    assert index.search('python').tolist() == [1, 2]
+    assert index.search('mysql NOT php').tolist() == [2, 3]
+    assert index.search('(postgres OR java) AND NOT django').tolist() == [1, 3]
+    assert index.search('dja*').tolist() == [2]
+
+
+def test_company_search_rejects_huge_queries(app, client):
+    with client.session_transaction() as session:
+        session['company_id'] = 1
+    response = client.get('/company/search', query_string={'q': ','.join(['python'] * 1500)})
+    assert response.status_code == 200
+    assert 'Busca inválida' in response.get_data(as_text=True)
@@ -0,0 +1,33 @@
+# Índices de busca por processo (get_skill_indexes): perfis gravados por outros processos entram
+# pela marca (id, version) e, o que ela perde, pela conferência completa periódica
+from main import db, Developer
+import main
+
+
+def set_developer(sql):
+    db.session.execute(db.text(sql))
+    db.session.commit()
+
+
+def test_reconcile_catches_rows_committed_out_of_order(app):
+    db.session.add_all([Developer(id=i, name=f'Dev {i}', email=f'dev{i}@x.com', password='x', cel='1',
+                                  habilidades='python') for i in (1, 2, 5)])
+    db.session.commit()
+    dev_index, _ = main.get_skill_indexes()
+
+    # Transação que terminou depois de outra com id maior: o id fica abaixo da marca
+    set_developer("INSERT INTO developer (id, name, email, password, cel, habilidades, version) "
+                  "VALUES (3, 'Dev 3', 'dev3@x.com', 'x', '1', 'cobol', 1)")
+    # Duas edições simultâneas com a mesma version: a que termina depois fica na marca, não acima
+    set_developer("UPDATE developer SET habilidades = 'haskell', version = 2 WHERE id = 1")
+    main.get_skill_indexes()
+    set_developer("UPDATE developer SET habilidades = 'erlang', version = 2 WHERE id = 2")
+    main.get_skill_indexes()
+    assert dev_index.search('haskell').tolist() == [1]
+    assert dev_index.search('cobol').tolist() == [] and dev_index.search('erlang').tolist() == []
+
+    app.extensions['skill_indexes'].reconciled_at -= app.config['SKILL_INDEX_RECONCILE']
+    main.get_skill_indexes()
+    assert dev_index.search('cobol').tolist() == [3]
+    assert dev_index.search('erlang').tolist() == [2]
+    assert dev_index.search('python').tolist() == [5]
@@ -0,0 +1,61 @@
+# seen.Bitmap: conjuntos de ids em blocos de 65536 (array uint16 até ARRAY_MAX ids, bits depois)
+import zlib
+
+import numpy as np
+import pytest
+
+from seen import ARRAY_MAX, Bitmap
+
+
+def bitmap(ids):
+    result = Bitmap()
+    result.add(ids)
+    return result
+
+
+def test_add_and_contains_across_chunks():
+    ids = [5, 3, 3, 70000, 1 << 20]
+    seen = bitmap(ids)
+    assert seen.ids().tolist() == [3, 5, 70000, 1 << 20]
+    assert len(seen) == 4
+    assert seen.contains([70000, 4, 3, 1 << 20, 65536]).tolist() == [True, False, True, True, False]
+    assert 5 in seen and 6 not in seen
+    assert not Bitmap().contains([1, 2]).any()
+
+
+def test_chunk_turns_into_bits_when_dense():
+    dense = np.arange(0, 2 * (ARRAY_MAX + 1), 2)
+    seen = bitmap(dense[:ARRAY_MAX])
+    assert seen.chunks[0].dtype == np.uint16
+    seen.add(dense[ARRAY_MAX:])
+    assert seen.chunks[0].dtype == np.uint8
+    assert seen.nbytes == 8192
+    assert seen.ids().tolist() == dense.tolist()
+    assert not seen.contains(dense + 1).any()
+
+
+def test_update_is_a_union():
+    dense = bitmap(range(0, 10000))  # bits
+    sparse = bitmap([3, 20000, 70000])  # array
+    dense.update(sparse)
+    assert len(dense) == 10002
+    other = bitmap(range(5000, 15000))
+    other.update(bitmap(range(0, 5000)))
+    assert other.ids().tolist() == list(range(15000))
+
+
+@pytest.mark.parametrize('ids', [[], [1, 2, 65535, 65536], list(range(0, 200000, 3)), [7, *range(70000, 80000)]])
+def test_blob_round_trip(ids):
+    seen = bitmap(ids)
+    restored = Bitmap.from_bytes(seen.to_bytes())
+    assert restored.ids().tolist() == sorted(set(ids))
+    assert {key: chunk.dtype for key, chunk in restored.chunks.items()} == \
+        {key: chunk.dtype for key, chunk in seen.chunks.items()}
+
+
+def test_reads_legacy_dense_blob():
+    # Formato anterior: zlib dos bits de 0 até o maior id
+    flags = np.zeros(100001, dtype=bool)
+    flags[[1, 64, 100000]] = True
+    blob = zlib.compress(np.packbits(flags, bitorder='little').tobytes())
+    assert Bitmap.from_bytes(blob).ids().tolist() == [1, 64, 100000]
@@ -0,0 +1,26 @@
+# Baralho de swipes (SwipeDeck): um baralho esgotado volta a buscar sozinho, então cadastros
+# feitos em outro worker (que não vê a memória deste) aparecem depois de DECK_EXHAUSTED_RETRY
+import main
+from main import db, Company, Developer, DevSkipCompany
+
+
+def test_exhausted_deck_finds_profiles_registered_elsewhere(app):
+    dev = Developer(name='Dev', email='dev@x.com', password='x', cel='1', habilidades='python')
+    first = Company(name='Primeira', email='a@x.com', password='x', telefone='1', descricao='python')
+    db.session.add_all([dev, first])
+    db.session.commit()
+
+    deck = main.SwipeDeck('dev', dev.id)
+    assert main.current_from_deck(deck, Company).id == first.id
+    main.record_swipe(DevSkipCompany, dev_id=dev.id, company_id=first.id)
+    deck.discard(first.id)
+    assert main.current_from_deck(deck, Company) is None
+
+    # Cadastro gravado por outro processo: nada avisa este baralho
+    db.session.execute(db.text("INSERT INTO company (name, email, password, telefone, descricao) "
+                               "VALUES ('Nova', 'b@x.com', 'x', '1', 'python')"))
+    db.session.commit()
+    assert deck.peek() is None  # ainda dentro do intervalo
+
+    deck.exhausted_at -= app.config['DECK_EXHAUSTED_RETRY']
+    assert main.current_from_deck(deck, Company).name == 'Nova'
@@ -0,0 +1,77 @@
+# Group commit dos swipes (SwipeWriter): uma falha na thread de gravação não pode deixar as
+# requisições esperando para sempre
+import threading
+
+import pytest
+
+import main
+from main import db, Company, Developer, DevSkipCompany
+
+
+@pytest.fixture
+def pair(app):
+    app.config.update(SWIPE_COMMIT_WINDOW=0.005, SWIPE_WRITE_TIMEOUT=5)
+    dev = Developer(name='Dev', email='dev@x.com', password='x', cel='1', habilidades='python')
+    companies = [Company(name=f'Empresa {i}', email=f'e{i}@x.com', password='x', telefone='1', descricao='python')
+                 for i in range(3)]
+    db.session.add_all([dev, *companies])
+    db.session.commit()
+    return dev.id, [company.id for company in companies]
+
+
+def skip(dev_id, company_id):
+    return main.record_swipe(DevSkipCompany, dev_id=dev_id, company_id=company_id)
+
+
+def test_group_commit_writes_and_reports_new_rows(app, pair):
+    dev_id, (company_id, _, _) = pair
+    assert skip(dev_id, company_id) is True
+    assert skip(dev_id, company_id) is False
+    assert DevSkipCompany.query.count() == 1
+
+
+def test_failed_rollback_is_reported_and_the_writer_keeps_going(app, pair, monkeypatch):
+    dev_id, (first, second, _) = pair
+    rollback = db.session.rollback
+
+    def broken_rollback():
+        if threading.current_thread().name == 'swipe-writer':
+            raise RuntimeError('conexão perdida')
+        rollback()
+
+    def failing_write():
+        raise ValueError('swipe inválido')
+
+    skip(dev_id, first)  # a thread de gravação já de pé
+    monkeypatch.setattr(db.session, 'rollback', broken_rollback)
+    with pytest.raises(RuntimeError, match='conexão perdida'):
+        main.run_swipe_write(failing_write)
+    monkeypatch.undo()
+
+    writer = app.extensions['swipe_writer']
+    assert writer.thread.is_alive()
+    assert skip(dev_id, second) is True
+    assert app.extensions['swipe_writer'] is writer
+
+
+def test_dead_writer_thread_is_replaced(app, pair, monkeypatch):
+    dev_id, (company_id, _, _) = pair
+    monkeypatch.setattr(main.SwipeWriter, 'run', lambda self: None)
+    dead = app.extensions['swipe_writer'] = main.SwipeWriter(app)
+    dead.thread.join()
+    monkeypatch.undo()
+
+    assert skip(dev_id, company_id) is True
+    assert app.extensions['swipe_writer'] is not dead
+
+
+def test_stuck_writer_falls_back_to_a_direct_write(app, pair, monkeypatch):
+    dev_id, (company_id, _, _) = pair
+    release = threading.Event()
+    monkeypatch.setattr(main.SwipeWriter, 'run', lambda self: release.wait())
+    app.config['SWIPE_WRITE_TIMEOUT'] = 0.2
+    try:
+        assert skip(dev_id, company_id) is True
+    finally:
+        release.set()
+    assert DevSkipCompany.query.filter_by(dev_id=dev_id, company_id=company_id).count() == 1
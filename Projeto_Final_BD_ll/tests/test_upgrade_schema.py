@@ -0,0 +1,43 @@
+# Migração dos matches antigos (sem direção): não podem virar likes nem matches mútuos
+import main
+from main import db, Company, CompanyLikeDev, Developer, DevLikeCompany, LegacyMatch, Match
+
+
+def add_pair():
+    dev = Developer(name='Dev', email='dev@x.com', password='x', cel='1', habilidades='python flask')
+    company = Company(name='Empresa', email='empresa@x.com', password='x', telefone='1', descricao='python')
+    db.session.add_all([dev, company])
+    db.session.commit()
+    return dev.id, company.id
+
+
+def test_one_sided_legacy_match_is_not_a_mutual_match(app):
+    dev_id, company_id = add_pair()
+    db.session.add(Match(dev_id=dev_id, company_id=company_id))  # linha do esquema antigo
+    db.session.commit()
+
+    main.upgrade_schema()
+
+    assert Match.query.count() == 0
+    assert DevLikeCompany.query.count() == 0 and CompanyLikeDev.query.count() == 0
+    assert [(row.dev_id, row.company_id) for row in LegacyMatch.query] == [(dev_id, company_id)]
+    # Continua como "já avaliado" pelos dois lados
+    assert main.already_swiped('dev', dev_id, company_id)
+    assert main.already_swiped('company', company_id, dev_id)
+    assert main.candidate_companies_query(dev_id).all() == []
+    assert main.candidate_devs_query(company_id).all() == []
+    assert company_id in main.load_seen('dev', dev_id)
+    assert dev_id in main.load_seen('company', company_id)
+    assert main.list_matches('dev', dev_id) == ([], None)
+
+
+def test_upgrade_keeps_real_matches(app):
+    dev_id, company_id = add_pair()
+    main.like_and_match('dev', dev_id, company_id)
+    main.like_and_match('company', company_id, dev_id)
+    db.session.commit()
+
+    main.upgrade_schema()
+
+    assert Match.query.count() == 1
+    assert LegacyMatch.query.count() == 0